@@ -0,0 +1,49 @@
+# tajweed_analyzer/__init__.py
+
+import importlib
+
+# Package entry point, for use from the repository root (or with it on sys.path):
+#   import tajweed_analyzer
+#   tajweed_analyzer.quran_processor.process_quran_for_rules(path)
+#   from tajweed_analyzer import rule_registry
+#   python -m tajweed_analyzer.main_qalqalah_finder
+#
+# Submodules are imported lazily, on first attribute access, so `import tajweed_analyzer` costs
+# next to nothing; arabic_characters likewise builds its derived tables on first use and
+# rule_registry imports rule modules the first time a rule is resolved.
+
+# Modules that can be reached as attributes of the package.
+MODULES = (
+    "analysis_cache",
+    "arabic_characters",
+    "batch_runner",
+    "benchmark_pipeline",
+    "columnar_export",
+    "corpus_index",
+    "corpus_loader",
+    "corpus_offsets",
+    "findings_store",
+    "incremental_analysis",
+    "letter_analyzer",
+    "letter_complex_table",
+    "main_qalqalah_finder",
+    "persistent_cache",
+    "profiling",
+    "qalqalah_rules",
+    "qalqalah_service",
+    "quran_processor",
+    "reading_model",
+    "result_records",
+    "result_writers",
+    "rule_registry",
+    "text_parser",
+)
+
+
+def __getattr__(name):
+    if name not in MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return importlib.import_module(f".{name}", __name__)
+
+def __dir__():
+    return sorted(set(globals()) | set(MODULES))
@@ -0,0 +1,86 @@
+# tajweed_analyzer/analysis_cache.py
+
+import collections
+import hashlib
+
+# Content-addressed memo cache for segment analysis. Many segments repeat verbatim (the Bismillah
+# of every sura, refrains such as the one in Surat ar-Rahman), and a rule's findings only depend on
+# the segment text, the considered Waqf marks and the rule itself. Findings are stored without
+# their sura/aya/source ids and rebased onto the segment being analyzed on every hit.
+
+DEFAULT_MAX_ENTRIES = 4096
+
+# Keys of a result dict that describe where a finding is, rather than what was found.
+POSITION_KEYS = ("sura", "aya", "source_type", "word_context", "char_index_in_text",
+                 "word_position", "word_id")
+
+
+def text_digest(text):
+    """Content hash of a segment text."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class SegmentResultCache:
+    """
+    Bounded LRU cache of per-segment rule findings, keyed by (text digest, waqf marks, rule).
+
+    Each entry is a tuple of templates (start_idx, word_context, word_position, finding), where
+    finding holds the rule-specific keys of a result dict. quran_processor rebuilds full result
+    dicts from the templates for the current sura/aya/source_type.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(digest, considered_waqf_marks, rule_check_function):
+        return digest, considered_waqf_marks, rule_check_function
+
+    def get(self, key):
+        """Returns the templates stored under key (marking it most recently used), or None."""
+        templates = self._entries.get(key)
+        if templates is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return templates
+
+    def put(self, key, templates):
+        self._entries[key] = templates
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def instances_to_templates(instances, base_char_offset=0):
+    """Strips the position keys off result dicts, keeping what is needed to rebase them."""
+    templates = []
+    for instance in instances:
+        finding = {key: value for key, value in instance.items() if key not in POSITION_KEYS}
+        templates.append((instance["char_index_in_text"] - base_char_offset,
+                          instance["word_context"], instance["word_position"], finding))
+    return tuple(templates)
@@ -154,8 +154,8 @@ ALL_DIACRITICS_AND_ANNOTATIONS = CORE_DIACRITICS.union(
         SMALL_HIGH_ROUNDED_ZERO, SMALL_LOW_SEEN, SMALL_HIGH_MADDA
     ])
 )
-# String version for easy checking in parsing
-ALL_DIACRITICS_AND_ANNOTATIONS_STR = "".join(list(ALL_DIACRITICS_AND_ANNOTATIONS))
+# String version for easy checking in parsing: ALL_DIACRITICS_AND_ANNOTATIONS_STR (built on first use,
+# see the lazy derived tables at the end of this module)
 
 # --- Punctuation (Commonly used in Arabic texts) ---
 ARABIC_COMMA = '\u060C'             # ،
@@ -226,7 +226,7 @@ LETTERS_OF_IZHAR_HALQI_COMMON = frozenset([
 # --- String of all diacritics for parsing letter complexes ---
 # This should include all characters that can attach to a letter
 # but are not base letters themselves.
-ARABIC_DIACRITICS_CHARS_STR = "".join(list(ALL_DIACRITICS_AND_ANNOTATIONS))
+# (ARABIC_DIACRITICS_CHARS_STR is built on first use, like ALL_DIACRITICS_AND_ANNOTATIONS_STR)
 ARABIC_DIACRITICS_CHARS = ALL_DIACRITICS_AND_ANNOTATIONS # Use the frozenset for 'in' checks
 
 # --- Complete set of characters that are considered "part of a word" but not necessarily letters ---
@@ -245,24 +245,107 @@ ZERO_WIDTH_JOINER = '\u200D'
 
 # --- For general checking if a character is an Arabic letter (including variations) ---
 def is_arabic_letter(char):
-    # Range U+0600 to U+06FF covers most common Arabic block
-    # Add other blocks if necessary (e.g., Arabic Presentation Forms)
-    if '\u0600' <= char <= '\u06FF': # Arabic block
-        # Exclude diacritics, punctuation, digits from this block if strictly "letter"
-        if char not in ALL_DIACRITICS_AND_ANNOTATIONS and \
-           char not in DEFAULT_STOP_WAQF_MARKS and \
-           char not in ARABIC_INDIC_DIGITS and \
-           char not in [ARABIC_COMMA, ARABIC_SEMICOLON, ARABIC_QUESTION_MARK, ARABIC_FULL_STOP, END_OF_AYAH]:
-            return True
-    if '\u0FB50' <= char <= '\uFDFF': # Arabic Presentation Forms-A (includes ﷺ, ﷼, ﴾﴿)
-        # More specific checks needed if using this range for letters vs symbols
-        if char in [SALLALLAHOU_ALAYHE_WASSALLAM, ORNATE_LEFT_PARENTHESIS, ORNATE_RIGHT_PARENTHESIS]: # These are symbols
-            return False
-        return True # Many ligatures are here
-    if '\uFE70' <= char <= '\uFEFF': # Arabic Presentation Forms-B (contextual forms, ligatures like LA)
-        # Most of these are contextual forms of letters or ligatures
-        return True
-    return False
+    """
+    True for letters of the Arabic block (U+0600-U+06FF, minus diacritics, default stop Waqf marks,
+    digits and punctuation) and of the Arabic Presentation Forms A/B (minus their symbols).
+    A single CHAR_CLASSES lookup; see the letter class table below.
+    """
+    return bool(_lazy_table("CHAR_CLASSES").get(char, 0) & CLASS_ARABIC_LETTER)
 
 # More specific list for parsing "base letters" (characters that can take diacritics)
-BASE_ARABIC_LETTERS_FOR_PARSING = ARABIC_LETTERS_EXTENDED.union(frozenset([PEH, CHEH, JEH, GAF])) # Add any other base letters needed
\ No newline at end of file
+BASE_ARABIC_LETTERS_FOR_PARSING = ARABIC_LETTERS_EXTENDED.union(frozenset([PEH, CHEH, JEH, GAF])) # Add any other base letters needed
+
+
+# --- Letter class table ---
+# Every code point the analyzer cares about maps to a bitfield of all its classes, so a letter class
+# test is one dict lookup plus a mask instead of several frozenset checks:
+#     CHAR_CLASSES.get(char, 0) & CLASS_QALQALAH
+# CODE_POINT_CLASSES holds the same bitfields keyed by ord(char), for code-point columns such as
+# letter_complex_table.LetterComplexTable.letters. The frozensets above remain the source of truth.
+# Diacritics are not tested through this table: a letter's diacritics string is short, so `in`
+# tests on it are cheaper, and letter complex tables keep their own per-complex diacritic masks.
+# Both tables are built on first access (see the lazy derived tables below).
+CLASS_ARABIC_LETTER = 1 << 0           # is_arabic_letter
+CLASS_BASE_LETTER = 1 << 1             # BASE_ARABIC_LETTERS_FOR_PARSING
+CLASS_HAMZA = 1 << 2                   # HAMZAS
+CLASS_QALQALAH = 1 << 3                # QALQALAH_LETTERS
+CLASS_ISTILA = 1 << 4                  # LETTERS_OF_ISTILA
+CLASS_IDGHAM_WITH_GHUNNAH = 1 << 5     # IDGHAM_WITH_GHUNNAH_LETTERS_NOON_SAKINAH
+CLASS_IDGHAM_WITHOUT_GHUNNAH = 1 << 6  # IDGHAM_WITHOUT_GHUNNAH_LETTERS_NOON_SAKINAH
+CLASS_IZHAR_HALQI = 1 << 7             # LETTERS_OF_IZHAR_HALQI
+CLASS_DIACRITIC = 1 << 8               # ALL_DIACRITICS_AND_ANNOTATIONS (= ARABIC_DIACRITICS_CHARS)
+CLASS_VOWEL = 1 << 9                   # VOWELS
+CLASS_TANWEEN = 1 << 10                # TANWEENS
+CLASS_SUKOON = 1 << 11
+CLASS_SHADDA = 1 << 12
+CLASS_WAQF_STOP = 1 << 13              # DEFAULT_STOP_WAQF_MARKS
+CLASS_WAQF_LA = 1 << 14                # WAQF_LA (do not stop)
+CLASS_DIGIT = 1 << 15                  # ARABIC_INDIC_DIGITS
+CLASS_PUNCTUATION = 1 << 16            # Arabic punctuation and END_OF_AYAH
+
+_PUNCTUATION_CHARS = frozenset([ARABIC_COMMA, ARABIC_SEMICOLON, ARABIC_QUESTION_MARK, ARABIC_FULL_STOP, END_OF_AYAH])
+_PRESENTATION_FORM_SYMBOLS = frozenset([SALLALLAHOU_ALAYHE_WASSALLAM, ORNATE_LEFT_PARENTHESIS, ORNATE_RIGHT_PARENTHESIS])
+
+def _build_char_classes():
+    classes = {}
+    def mark(chars, class_bit):
+        for char in chars:
+            classes[char] = classes.get(char, 0) | class_bit
+
+    mark(BASE_ARABIC_LETTERS_FOR_PARSING, CLASS_BASE_LETTER)
+    mark(HAMZAS, CLASS_HAMZA)
+    mark(QALQALAH_LETTERS, CLASS_QALQALAH)
+    mark(LETTERS_OF_ISTILA, CLASS_ISTILA)
+    mark(IDGHAM_WITH_GHUNNAH_LETTERS_NOON_SAKINAH, CLASS_IDGHAM_WITH_GHUNNAH)
+    mark(IDGHAM_WITHOUT_GHUNNAH_LETTERS_NOON_SAKINAH, CLASS_IDGHAM_WITHOUT_GHUNNAH)
+    mark(LETTERS_OF_IZHAR_HALQI, CLASS_IZHAR_HALQI)
+    mark(ALL_DIACRITICS_AND_ANNOTATIONS, CLASS_DIACRITIC)
+    mark(VOWELS, CLASS_VOWEL)
+    mark(TANWEENS, CLASS_TANWEEN)
+    mark(SUKOON, CLASS_SUKOON)
+    mark(SHADDA, CLASS_SHADDA)
+    mark(DEFAULT_STOP_WAQF_MARKS, CLASS_WAQF_STOP)
+    mark(WAQF_LA, CLASS_WAQF_LA)
+    mark(ARABIC_INDIC_DIGITS, CLASS_DIGIT)
+    mark(_PUNCTUATION_CHARS, CLASS_PUNCTUATION)
+
+    # Letters of the Arabic block: everything that is not a diacritic, stop mark, digit or punctuation.
+    not_a_letter = CLASS_DIACRITIC | CLASS_WAQF_STOP | CLASS_DIGIT | CLASS_PUNCTUATION
+    for code_point in range(0x0600, 0x0700):
+        char = chr(code_point)
+        if not classes.get(char, 0) & not_a_letter:
+            mark(char, CLASS_ARABIC_LETTER)
+    # Arabic Presentation Forms-A (ligatures, minus symbols) and -B (contextual forms).
+    for code_point in range(0xFB50, 0xFE00):
+        if chr(code_point) not in _PRESENTATION_FORM_SYMBOLS:
+            mark(chr(code_point), CLASS_ARABIC_LETTER)
+    for code_point in range(0xFE70, 0xFF00):
+        mark(chr(code_point), CLASS_ARABIC_LETTER)
+    return classes
+
+
+# --- Lazy derived tables ---
+# Tables derived from the sets above are only built when first accessed (PEP 562 module __getattr__),
+# so importing this module for its constants stays cheap for short-lived CLI runs and workers.
+# Once built, a table is stored in the module globals and later lookups never reach __getattr__.
+_LAZY_TABLES = {
+    "ALL_DIACRITICS_AND_ANNOTATIONS_STR": lambda: "".join(list(ALL_DIACRITICS_AND_ANNOTATIONS)),
+    "ARABIC_DIACRITICS_CHARS_STR": lambda: "".join(list(ALL_DIACRITICS_AND_ANNOTATIONS)),
+    "CHAR_CLASSES": _build_char_classes,
+    "CODE_POINT_CLASSES": lambda: {ord(char): class_bits for char, class_bits in _lazy_table("CHAR_CLASSES").items()},
+}
+
+def __getattr__(name):
+    builder = _LAZY_TABLES.get(name)
+    if builder is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    table = globals()[name] = builder()
+    return table
+
+def _lazy_table(name):
+    """A lazy derived table from inside this module, where globals bypass __getattr__."""
+    table = globals().get(name)
+    return table if table is not None else __getattr__(name)
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_TABLES))
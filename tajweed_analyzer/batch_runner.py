@@ -0,0 +1,200 @@
+# tajweed_analyzer/batch_runner.py
+
+import argparse
+import collections
+import itertools
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from . import analysis_cache
+from . import letter_analyzer
+from . import quran_processor
+from . import rule_registry
+
+# Runs many rules over many corpus files (Nasekh, Uthmani, other encodings) in one job.
+#
+# Editions share most of their segment texts, so work is scheduled over *distinct* texts rather
+# than over (corpus x rule) pairs: every corpus is loaded once, identical texts across corpora are
+# deduplicated, and each distinct text is tokenized, given its stop contexts and run through all
+# rules exactly once, in shards of texts_per_task texts spread over a ProcessPoolExecutor.
+# Workers return position-free templates (analysis_cache.instances_to_templates) that are rebased
+# onto every (corpus, sura, aya, source_type) carrying that text.
+#
+# Cross-corpus disagreements are counted per rule over the segments two corpora have in common.
+# Segments with the same text agree by construction; only segments whose texts differ are compared,
+# on the (word position, finding) pairs of their findings.
+#
+# Usage (from the repository root):
+#   python -m tajweed_analyzer.batch_runner tajweed_analyzer/quran_data/quran_nasekh.json \
+#       tajweed_analyzer/quran_data/quran_uthmani.json --workers 4
+
+DEFAULT_TEXTS_PER_TASK = 512
+
+
+def _analyze_texts(texts, rule_specs, considered_waqf_marks):
+    """Worker entry point: returns {rule_name: templates} for each text of a shard."""
+    rules = rule_registry.resolve_rules(rule_specs)
+    shard_templates = []
+    for text in texts:
+        results_by_rule = quran_processor.analyze_text_for_rules(
+            0, 0, text, quran_processor.SOURCE_TYPE_TEXT, rules, considered_waqf_marks)
+        shard_templates.append({rule_name: analysis_cache.instances_to_templates(instances)
+                                for rule_name, instances in results_by_rule.items()})
+    return shard_templates
+
+def _finding_signature(templates):
+    """What two findings lists of the same segment are compared on (offsets differ across encodings)."""
+    return tuple((word_position, tuple(sorted(finding.items())))
+                 for _, _, word_position, finding in templates)
+
+
+def run_batch(corpus_paths, rules=None, considered_waqf_marks=None,
+              workers=None, texts_per_task=DEFAULT_TEXTS_PER_TASK):
+    """
+    Analyzes several corpora with several rules, analyzing every distinct segment text once.
+
+    Args:
+        corpus_paths: Paths of the Quran JSON files.
+        rules: As in quran_processor.process_quran_for_rules.
+        considered_waqf_marks: A frozenset of Waqf mark characters to consider for stops.
+        workers: Worker processes; None, 0 or 1 analyzes in this process.
+        texts_per_task: Distinct texts per worker task (at least 1).
+
+    Returns:
+        dict: {
+            "results": {corpus_path: {rule_name: [instances]}} (each as process_quran_for_rules returns),
+            "summaries": {corpus_path: {"segments", "findings": {rule: n}, "types": {rule: {type: n}}}},
+            "disagreements": {(corpus_a, corpus_b): {"shared_segments", rule_name: n, ...}},
+            "total_segments", "distinct_texts",
+        }
+        Corpora that cannot be loaded are reported in summaries with an "error" and skipped.
+    """
+    considered_waqf_marks = letter_analyzer.normalize_waqf_marks(considered_waqf_marks)
+    rules = rule_registry.resolve_rules(rules)
+    texts_per_task = max(1, texts_per_task)
+
+    # --- Load every corpus once and deduplicate texts across all of them ---
+    corpus_segments = {}
+    summaries = {}
+    text_ids = {}
+    for corpus_path in corpus_paths:
+        segments = quran_processor.load_quran_segments(corpus_path)
+        if segments is None:
+            summaries[corpus_path] = {"error": "Could not load corpus."}
+            continue
+        corpus_segments[corpus_path] = [
+            (sura_idx, aya_idx, source_type, text_ids.setdefault(text, len(text_ids)))
+            for sura_idx, aya_idx, source_type, text in segments
+        ]
+    distinct_texts = list(text_ids)
+    del text_ids
+
+    # --- Analyze each distinct text once ---
+    templates_by_text = []
+    shards = [distinct_texts[start:start + texts_per_task]
+              for start in range(0, len(distinct_texts), texts_per_task)]
+    if workers is None or workers <= 1:
+        for shard in shards:
+            templates_by_text.extend(_analyze_texts(shard, rules, considered_waqf_marks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for shard_templates in executor.map(_analyze_texts, shards,
+                                                itertools.repeat(rule_registry.rule_specs(rules)),
+                                                itertools.repeat(considered_waqf_marks)):
+                templates_by_text.extend(shard_templates)
+
+    # --- Rebase the templates onto every corpus segment and summarize ---
+    results = {}
+    for corpus_path, segments in corpus_segments.items():
+        corpus_results = {rule_name: [] for rule_name in rules}
+        for sura_idx, aya_idx, source_type, text_id in segments:
+            for rule_name, templates in templates_by_text[text_id].items():
+                if templates:
+                    corpus_results[rule_name].extend(
+                        quran_processor.instances_from_templates(sura_idx, aya_idx, source_type, templates))
+        results[corpus_path] = corpus_results
+        summaries[corpus_path] = {
+            "segments": len(segments),
+            "findings": {rule_name: len(instances) for rule_name, instances in corpus_results.items()},
+            "types": {rule_name: dict(collections.Counter(instance.get("type") for instance in instances))
+                      for rule_name, instances in corpus_results.items()},
+        }
+
+    # --- Pairwise disagreements over shared segments ---
+    segment_text_ids = {
+        corpus_path: {(sura_idx, aya_idx, source_type): text_id for sura_idx, aya_idx, source_type, text_id in segments}
+        for corpus_path, segments in corpus_segments.items()
+    }
+    signatures = {} # (text_id, rule_name) -> signature, computed only for texts that get compared
+    def signature(text_id, rule_name):
+        key = (text_id, rule_name)
+        if key not in signatures:
+            signatures[key] = _finding_signature(templates_by_text[text_id][rule_name])
+        return signatures[key]
+
+    disagreements = {}
+    for corpus_a, corpus_b in itertools.combinations(corpus_segments, 2):
+        texts_a = segment_text_ids[corpus_a]
+        texts_b = segment_text_ids[corpus_b]
+        counts = {"shared_segments": 0, **{rule_name: 0 for rule_name in rules}}
+        for segment_key, text_a in texts_a.items():
+            text_b = texts_b.get(segment_key)
+            if text_b is None:
+                continue
+            counts["shared_segments"] += 1
+            if text_a == text_b:
+                continue
+            for rule_name in rules:
+                if signature(text_a, rule_name) != signature(text_b, rule_name):
+                    counts[rule_name] += 1
+        disagreements[(corpus_a, corpus_b)] = counts
+
+    return {
+        "results": results,
+        "summaries": summaries,
+        "disagreements": disagreements,
+        "total_segments": sum(len(segments) for segments in corpus_segments.values()),
+        "distinct_texts": len(distinct_texts),
+    }
+
+
+def print_report(batch):
+    print(f"Analyzed {batch['total_segments']} segments ({batch['distinct_texts']} distinct texts).")
+    for corpus_path, summary in batch["summaries"].items():
+        if "error" in summary:
+            print(f"\n{corpus_path}: {summary['error']}")
+            continue
+        print(f"\n{corpus_path}: {summary['segments']} segments")
+        for rule_name, count in summary["findings"].items():
+            types = ", ".join(f"{label}: {n}" for label, n in summary["types"][rule_name].items())
+            print(f"  {rule_name}: {count} findings" + (f" ({types})" if types else ""))
+    if batch["disagreements"]:
+        print("\nSegments whose findings disagree:")
+        for (corpus_a, corpus_b), counts in batch["disagreements"].items():
+            rule_counts = ", ".join(f"{rule_name}: {n}" for rule_name, n in counts.items() if rule_name != "shared_segments")
+            print(f"  {corpus_a} vs {corpus_b} ({counts['shared_segments']} shared segments): {rule_counts}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Tajweed rules over several Quran corpora in one job.")
+    parser.add_argument("corpora", nargs="+", help="Quran JSON files.")
+    parser.add_argument("--rules", nargs="+", help="Registered rule names (default: all).")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--texts-per-task", type=int, default=DEFAULT_TEXTS_PER_TASK)
+    parser.add_argument("--summary-json", metavar="PATH", help="Also write the summaries and disagreements as JSON.")
+    args = parser.parse_args(argv)
+
+    batch = run_batch(args.corpora, args.rules, workers=args.workers, texts_per_task=args.texts_per_task)
+    print_report(batch)
+    if args.summary_json:
+        with open(args.summary_json, 'w', encoding='utf-8') as f:
+            json.dump({
+                "summaries": batch["summaries"],
+                "disagreements": [{"corpora": list(pair), **counts} for pair, counts in batch["disagreements"].items()],
+                "total_segments": batch["total_segments"],
+                "distinct_texts": batch["distinct_texts"],
+            }, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
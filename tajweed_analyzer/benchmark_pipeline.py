@@ -0,0 +1,317 @@
+# tajweed_analyzer/benchmark_pipeline.py
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from . import arabic_characters as ac
+from . import corpus_loader
+from . import letter_analyzer
+from . import qalqalah_rules
+from . import quran_processor
+from . import text_parser
+
+# Benchmark harness for the analysis pipeline. Each stage is timed separately on a deterministic
+# synthetic corpus generated from the arabic_characters tables, so it runs without the real data file:
+#   json_load      corpus_loader segments from the JSON file
+#   parse          text_parser.get_letter_complexes
+#   stop_context   letter_analyzer.get_stop_contexts
+#   rule           qalqalah_rules.check_qalqalah_for_letter_complex on every complex
+#   assemble       result dicts for the hits (word lookups and instance construction)
+#   end_to_end     quran_processor.process_quran_for_rule
+# Throughput is reported in letters/sec and ayahs/sec, plus the peak traced memory of each stage.
+#
+# The import-time budget check imports a module (main_qalqalah_finder by default) in a fresh
+# interpreter with `-X importtime` and fails if its cumulative import time exceeds the budget,
+# so the start-up of short-lived CLI runs and worker processes stays in the low milliseconds.
+#
+# Usage (from the repository root):
+#   python -m tajweed_analyzer.benchmark_pipeline --scales 1 10 --save-baseline bench_baseline.json
+#   python -m tajweed_analyzer.benchmark_pipeline --scales 1 10 --compare bench_baseline.json
+#   python -m tajweed_analyzer.benchmark_pipeline --import-budget-ms
+
+# Size of the 1x synthetic corpus; scale N multiplies the number of suras.
+UNIT_SURAS = 12
+UNIT_AYAS_PER_SURA = (3, 60)
+WORDS_PER_AYA = (3, 18)
+LETTERS_PER_WORD = (2, 7)
+
+DEFAULT_SEED = 1234
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_REPEAT = 3
+# A stage is reported as a regression when its throughput drops by more than this fraction.
+DEFAULT_REGRESSION_TOLERANCE = 0.15
+
+STAGES = ("json_load", "parse", "stop_context", "rule", "assemble", "end_to_end")
+
+DEFAULT_IMPORT_MODULE = "tajweed_analyzer.main_qalqalah_finder"
+DEFAULT_IMPORT_BUDGET_MS = 25.0
+
+_LETTERS = sorted(ac.ARABIC_LETTERS_EXTENDED)
+_QALQALAH_LETTERS = sorted(ac.QALQALAH_LETTERS)
+_VOWELS_TANWEEN = sorted(ac.VOWELS_TANWEEN)
+_WAQF_MARKS = sorted(ac.DEFAULT_STOP_WAQF_MARKS.union([ac.WAQF_LA]))
+
+
+def generate_synthetic_corpus(scale=1, seed=DEFAULT_SEED):
+    """
+    Builds a deterministic corpus in the {"quran": {"suras": [...]}} shape.
+    Letters carry a vowel, sukoon, shadda+vowel or nothing; Qalqalah letters are over-sampled
+    and some words are followed by a Waqf mark, so every Qalqalah branch gets exercised.
+    """
+    rng = random.Random(seed)
+    bismillah = "بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ"
+    suras = []
+    for sura_idx in range(1, UNIT_SURAS * scale + 1):
+        ayas = []
+        for aya_idx in range(1, rng.randint(*UNIT_AYAS_PER_SURA) + 1):
+            words = []
+            for _ in range(rng.randint(*WORDS_PER_AYA)):
+                word = []
+                for _ in range(rng.randint(*LETTERS_PER_WORD)):
+                    letter = rng.choice(_QALQALAH_LETTERS) if rng.random() < 0.15 else rng.choice(_LETTERS)
+                    roll = rng.random()
+                    if roll < 0.6:
+                        diacritics = rng.choice(_VOWELS_TANWEEN)
+                    elif roll < 0.8:
+                        diacritics = ac.SUKOON
+                    elif roll < 0.9:
+                        diacritics = ac.SHADDA + rng.choice(_VOWELS_TANWEEN)
+                    else:
+                        diacritics = ""
+                    word.append(letter + diacritics)
+                words.append("".join(word))
+                if rng.random() < 0.08:
+                    words.append(rng.choice(_WAQF_MARKS))
+            aya = {"index": aya_idx, "text": " ".join(words)}
+            if aya_idx == 1 and sura_idx != 9:
+                aya["bismillah"] = bismillah
+            ayas.append(aya)
+        suras.append({"index": sura_idx, "name": f"Synthetic {sura_idx}", "ayas": ayas})
+    return {"quran": {"suras": suras}}
+
+
+def _time_stage(stage_fn, repeat, measure_memory):
+    """Returns (best wall time in seconds, peak traced bytes or None, last result) of stage_fn."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = stage_fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if measure_memory:
+        tracemalloc.start()
+        stage_fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def benchmark_corpus(json_file_path, repeat=DEFAULT_REPEAT, measure_memory=True):
+    """Runs every stage on one corpus file and returns {stage: {seconds, letters_per_sec, ...}}."""
+    waqf_marks = ac.DEFAULT_STOP_WAQF_MARKS
+    rule = qalqalah_rules.check_qalqalah_for_letter_complex
+
+    def json_load():
+        return list(corpus_loader.iter_corpus_segments(json_file_path))
+    load_time, load_peak, segments = _time_stage(json_load, repeat, measure_memory)
+
+    def parse():
+        return [text_parser.get_letter_complexes(text) for _, _, _, text in segments]
+    parse_time, parse_peak, complexes = _time_stage(parse, repeat, measure_memory)
+
+    def stop_context():
+        return [
+            letter_analyzer.get_stop_contexts(text, segment_complexes, waqf_marks)
+            for (_, _, _, text), segment_complexes in zip(segments, complexes)
+        ]
+    stop_time, stop_peak, stop_contexts = _time_stage(stop_context, repeat, measure_memory)
+
+    def rule_calls():
+        hits = []
+        for segment_idx, (segment_complexes, segment_stops) in enumerate(zip(complexes, stop_contexts)):
+            for i, (cx, stop) in enumerate(zip(segment_complexes, segment_stops)):
+                finding = rule(cx, stop, segment_complexes, i)
+                if finding:
+                    hits.append((segment_idx, cx[2], stop, finding))
+        return hits
+    rule_time, rule_peak, hits = _time_stage(rule_calls, repeat, measure_memory)
+
+    def assemble():
+        instances = []
+        word_table_segment_idx = None
+        for segment_idx, start_idx, stop, finding in hits:
+            sura_idx, aya_idx, source_type, text = segments[segment_idx]
+            if segment_idx != word_table_segment_idx:
+                word_table = text_parser.WordSpanTable(text)
+                word_table_segment_idx = segment_idx
+            word_context, word_position = word_table.word_and_position_at(start_idx)
+            instance = {
+                "sura": sura_idx, "aya": aya_idx, "source_type": source_type,
+                "word_context": word_context,
+                "char_index_in_text": start_idx,
+                "word_position": word_position,
+                "word_id": text_parser.make_word_id(sura_idx, aya_idx, source_type, word_position),
+                "stop_reason": stop["reason"],
+                "waqf_char": stop["waqf_char"],
+            }
+            instance.update(finding)
+            instances.append(instance)
+        return instances
+    assemble_time, assemble_peak, _ = _time_stage(assemble, repeat, measure_memory)
+
+    def end_to_end():
+        return quran_processor.process_quran_for_rule(json_file_path, rule, waqf_marks)
+    e2e_time, e2e_peak, _ = _time_stage(end_to_end, repeat, measure_memory)
+
+    letters = sum(len(segment_complexes) for segment_complexes in complexes)
+    ayas = len(segments)
+    report = {}
+    for stage, seconds, peak in zip(
+            STAGES,
+            (load_time, parse_time, stop_time, rule_time, assemble_time, e2e_time),
+            (load_peak, parse_peak, stop_peak, rule_peak, assemble_peak, e2e_peak)):
+        report[stage] = {
+            "seconds": seconds,
+            "letters_per_sec": letters / seconds if seconds else None,
+            "ayahs_per_sec": ayas / seconds if seconds else None,
+            "peak_memory_bytes": peak,
+        }
+    return {"letters": letters, "segments": ayas, "hits": len(hits), "stages": report}
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED, measure_memory=True):
+    """Generates the synthetic corpus at each scale and benchmarks it. Returns the JSON-able results."""
+    results = {"seed": seed, "repeat": repeat, "python": sys.version.split()[0], "scales": {}}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in scales:
+            json_file_path = os.path.join(tmp_dir, f"synthetic_{scale}x.json")
+            with open(json_file_path, 'w', encoding='utf-8') as f:
+                json.dump(generate_synthetic_corpus(scale, seed), f, ensure_ascii=False)
+            results["scales"][f"{scale}x"] = benchmark_corpus(json_file_path, repeat, measure_memory)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_REGRESSION_TOLERANCE):
+    """
+    Compares letters/sec of every stage against a baseline produced by this script.
+    Returns a list of (scale, stage, baseline_rate, current_rate) for stages slower than tolerance allows.
+    """
+    regressions = []
+    for scale, scale_results in results["scales"].items():
+        baseline_scale = baseline.get("scales", {}).get(scale)
+        if not baseline_scale:
+            continue
+        for stage, stage_results in scale_results["stages"].items():
+            baseline_rate = baseline_scale["stages"].get(stage, {}).get("letters_per_sec")
+            current_rate = stage_results["letters_per_sec"]
+            if baseline_rate and current_rate and current_rate < baseline_rate * (1 - tolerance):
+                regressions.append((scale, stage, baseline_rate, current_rate))
+    return regressions
+
+
+def measure_import_time(module_name=DEFAULT_IMPORT_MODULE, repeat=DEFAULT_REPEAT, env=None):
+    """
+    Imports module_name in fresh interpreters (run from the repository root) with `-X importtime`.
+    A first, untimed run lets the interpreter write the bytecode caches.
+    env, if given, replaces the environment of the interpreters (e.g. to set PYTHONPYCACHEPREFIX).
+
+    Returns:
+        dict: {"module", "total_ms": best cumulative import time of the module,
+               "slowest": [(imported module, cumulative ms)] of its ten slowest imports in that run},
+              or None if the module cannot be imported.
+    """
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module_name}"]
+    repository_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best = None
+    for run in range(repeat + 1):
+        completed = subprocess.run(command, cwd=repository_root, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"Error: Could not import '{module_name}':\n{completed.stderr.strip()}")
+            return None
+        if run == 0:
+            continue
+        # Lines look like "import time:  self [us] | cumulative | <indented module name>".
+        cumulative = {}
+        for line in completed.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) != 3 or not fields[1].strip().isdigit():
+                continue
+            cumulative[fields[2].strip()] = int(fields[1]) / 1000
+        total_ms = cumulative.get(module_name)
+        if total_ms is not None and (best is None or total_ms < best["total_ms"]):
+            slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)
+            best = {"module": module_name, "total_ms": total_ms,
+                    "slowest": [item for item in slowest if item[0] != module_name][:10]}
+    return best
+
+
+def print_report(results):
+    for scale, scale_results in results["scales"].items():
+        print(f"\n== {scale}: {scale_results['segments']} segments, {scale_results['letters']} letters, "
+              f"{scale_results['hits']} Qalqalah hits ==")
+        print(f"{'stage':<14}{'seconds':>10}{'letters/s':>14}{'ayahs/s':>12}{'peak MiB':>10}")
+        for stage, stage_results in scale_results["stages"].items():
+            peak = stage_results["peak_memory_bytes"]
+            peak_display = f"{peak / (1 << 20):.1f}" if peak is not None else "-"
+            print(f"{stage:<14}{stage_results['seconds']:>10.4f}{stage_results['letters_per_sec'] or 0:>14,.0f}"
+                  f"{stage_results['ayahs_per_sec'] or 0:>12,.0f}{peak_display:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tajweed analysis pipeline on a synthetic corpus.")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES),
+                        help=f"Corpus scales to run (1x = {UNIT_SURAS} synthetic suras).")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per stage (best is kept).")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced peak-memory runs.")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write the results as a JSON baseline.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a JSON baseline; exit 1 on regression.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_REGRESSION_TOLERANCE)
+    parser.add_argument("--import-budget-ms", type=float, nargs="?", const=DEFAULT_IMPORT_BUDGET_MS, metavar="MS",
+                        help="Only check the import time of --import-module against a budget "
+                             f"(default {DEFAULT_IMPORT_BUDGET_MS:g} ms); exit 1 if it is over.")
+    parser.add_argument("--import-module", default=DEFAULT_IMPORT_MODULE)
+    args = parser.parse_args(argv)
+
+    if args.import_budget_ms is not None:
+        timing = measure_import_time(args.import_module, args.repeat)
+        if timing is None:
+            return 1
+        print(f"import {timing['module']}: {timing['total_ms']:.1f} ms (budget {args.import_budget_ms:g} ms)")
+        for imported, cumulative_ms in timing["slowest"]:
+            print(f"  {imported:<32}{cumulative_ms:>8.1f} ms")
+        if timing["total_ms"] > args.import_budget_ms:
+            print("Over the import-time budget.")
+            return 1
+        return 0
+
+    results = run_benchmarks(args.scales, args.repeat, args.seed, not args.no_memory)
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for scale, stage, baseline_rate, current_rate in regressions:
+                print(f"  {scale} {stage}: {baseline_rate:,.0f} -> {current_rate:,.0f} letters/s")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+# tajweed_analyzer/columnar_export.py
+
+import array
+import collections
+import json
+import mmap
+import struct
+import sys
+
+# Columnar export of rule findings for analytics (a stdlib stand-in for Parquet/Arrow).
+#
+# File layout (native byte order, recorded in the footer):
+#   MAGIC
+#   row group 0: one contiguous, 8-byte aligned array per column
+#   row group 1: ...
+#   footer: UTF-8 JSON {version, byteorder, rows, columns: {name: typecode},
+#                       dictionaries: {name: [values]}, row_groups: [{rows, columns: {name: [offset, nbytes]}}]}
+#   uint64 footer length, MAGIC
+#
+# String-valued columns (source_type, rule, type, letter, stop_reason, waqf_char) hold codes into
+# the per-column dictionaries stored in the footer; None is a regular dictionary value.
+# Rows are accumulated straight into per-column arrays and flushed every chunk_rows rows, so
+# writing never builds another per-row object and memory is bounded by one row group.
+# ColumnarFindings memory-maps a file back; columns are zero-copy memoryviews per row group.
+
+COLUMNAR_MAGIC = b"TJWCOL01"
+COLUMNAR_VERSION = 1
+COLUMNAR_FILE_EXTENSION = ".tjcol"
+DEFAULT_CHUNK_ROWS = 65536
+_ALIGNMENT = 8
+
+# (column name, array typecode, whether it is dictionary-encoded)
+COLUMNS = (
+    ("sura", 'H', False),
+    ("aya", 'H', False),
+    ("source_type", 'B', True),
+    ("char_index", 'I', False),
+    ("word_position", 'I', False),
+    ("rule", 'H', True),
+    ("type", 'H', True),
+    ("letter", 'H', True),
+    ("stop_reason", 'B', True),
+    ("waqf_char", 'H', True),
+)
+DICTIONARY_COLUMNS = tuple(name for name, _, encoded in COLUMNS if encoded)
+_COLUMN_TYPECODES = {name: typecode for name, typecode, _ in COLUMNS}
+
+
+def write_columnar(rule_instance_pairs, destination, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Writes (rule_name, instance) pairs (e.g. from quran_processor.iter_rule_instances, or
+    ("qalqalah", instance) for process_quran_for_rule results) as a columnar file.
+    Instances may be result dicts or result_records.ResultRecord views.
+    Returns the number of rows written.
+    """
+    dictionaries = {name: {} for name in DICTIONARY_COLUMNS}
+    def code(name, value):
+        codes = dictionaries[name]
+        value_code = codes.get(value)
+        if value_code is None:
+            value_code = codes[value] = len(codes)
+        return value_code
+
+    row_groups = []
+    total_rows = 0
+    with open(destination, 'wb') as f:
+        f.write(COLUMNAR_MAGIC)
+        position = len(COLUMNAR_MAGIC)
+
+        def flush(columns, rows):
+            nonlocal position
+            group = {"rows": rows, "columns": {}}
+            for name, _, _ in COLUMNS:
+                padding = -position % _ALIGNMENT
+                f.write(b"\0" * padding)
+                position += padding
+                data = columns[name].tobytes()
+                f.write(data)
+                group["columns"][name] = [position, len(data)]
+                position += len(data)
+            row_groups.append(group)
+
+        columns = {name: array.array(typecode) for name, typecode in _COLUMN_TYPECODES.items()}
+        rows = 0
+        for rule_name, instance in rule_instance_pairs:
+            columns["sura"].append(instance["sura"])
+            columns["aya"].append(instance["aya"])
+            columns["source_type"].append(code("source_type", instance["source_type"]))
+            columns["char_index"].append(instance["char_index_in_text"])
+            columns["word_position"].append(instance["word_position"])
+            columns["rule"].append(code("rule", rule_name))
+            columns["type"].append(code("type", instance.get("type")))
+            columns["letter"].append(code("letter", instance.get("qalqalah_letter")))
+            columns["stop_reason"].append(code("stop_reason", instance.get("stop_reason")))
+            columns["waqf_char"].append(code("waqf_char", instance.get("waqf_char")))
+            rows += 1
+            if rows == chunk_rows:
+                flush(columns, rows)
+                total_rows += rows
+                columns = {name: array.array(typecode) for name, typecode in _COLUMN_TYPECODES.items()}
+                rows = 0
+        if rows:
+            flush(columns, rows)
+            total_rows += rows
+
+        footer = json.dumps({
+            "version": COLUMNAR_VERSION,
+            "byteorder": sys.byteorder,
+            "rows": total_rows,
+            "columns": {name: typecode for name, typecode, _ in COLUMNS},
+            "dictionaries": {name: list(codes) for name, codes in dictionaries.items()},
+            "row_groups": row_groups,
+        }, ensure_ascii=False).encode('utf-8')
+        f.write(footer)
+        f.write(struct.pack('<Q', len(footer)))
+        f.write(COLUMNAR_MAGIC)
+    return total_rows
+
+
+class ColumnarFindings:
+    """Read-only, mmap-backed view of a file written by write_columnar."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._load_footer()
+        except Exception:
+            self.close()
+            raise
+
+    def _load_footer(self):
+        buf = memoryview(self._mmap)
+        magic_len = len(COLUMNAR_MAGIC)
+        if bytes(buf[:magic_len]) != COLUMNAR_MAGIC or bytes(buf[-magic_len:]) != COLUMNAR_MAGIC:
+            raise ValueError(f"'{self.path}' is not a columnar findings file.")
+        (footer_len,) = struct.unpack_from('<Q', buf, len(buf) - magic_len - 8)
+        footer_start = len(buf) - magic_len - 8 - footer_len
+        footer = json.loads(bytes(buf[footer_start:footer_start + footer_len]).decode('utf-8'))
+        if footer.get("version") != COLUMNAR_VERSION or footer.get("byteorder") != sys.byteorder:
+            raise ValueError(f"'{self.path}' was written by an incompatible version.")
+        self.rows = footer["rows"]
+        self.dictionaries = footer["dictionaries"]
+        self._chunks = {name: [] for name in footer["columns"]}
+        for group in footer["row_groups"]:
+            for name, (offset, nbytes) in group["columns"].items():
+                self._chunks[name].append(buf[offset:offset + nbytes].cast(footer["columns"][name]))
+
+    def close(self):
+        for chunks in getattr(self, "_chunks", {}).values():
+            for chunk in chunks:
+                chunk.release()
+        self._chunks = {}
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass # Views handed out to callers are still alive; the map closes when they go.
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.rows
+
+    def column_chunks(self, name):
+        """Zero-copy memoryviews of a column, one per row group."""
+        return self._chunks[name]
+
+    def column(self, name):
+        """The whole column as one array (codes for dictionary-encoded columns)."""
+        column = array.array(_COLUMN_TYPECODES[name])
+        for chunk in self._chunks[name]:
+            column.frombytes(chunk.cast('B'))
+        return column
+
+    def decode(self, name, value_code):
+        return self.dictionaries[name][value_code]
+
+    def decoded_column(self, name):
+        """A dictionary-encoded column as a list of its values."""
+        values = self.dictionaries[name]
+        return [values[value_code] for chunk in self._chunks[name] for value_code in chunk]
+
+    def count_by(self, *names):
+        """
+        Row counts grouped by one or more columns, e.g. count_by("type", "letter"), with
+        dictionary-encoded values decoded. Keys are single values for one column, tuples otherwise.
+        """
+        counts = collections.Counter()
+        for group_chunks in zip(*(self._chunks[name] for name in names)):
+            if len(names) == 1:
+                counts.update(group_chunks[0])
+            else:
+                counts.update(zip(*group_chunks))
+        decoders = [self.dictionaries.get(name) for name in names]
+        def decoded(key):
+            if len(names) == 1:
+                return decoders[0][key] if decoders[0] is not None else key
+            return tuple(decoder[part] if decoder is not None else part for decoder, part in zip(decoders, key))
+        return {decoded(key): count for key, count in counts.items()}
@@ -0,0 +1,308 @@
+# tajweed_analyzer/corpus_index.py
+
+import array
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from . import corpus_loader
+from . import text_parser
+from . import letter_analyzer
+
+# On-disk layout of a corpus index file:
+#   MAGIC (8 bytes) | header length (uint32, little endian) | header JSON (UTF-8) | padded sections
+# The header records the SHA-256 of the source JSON, the counts and the (offset, length, typecode)
+# of every section. Sections are flat `array` columns, 8-byte aligned, so they can be viewed
+# directly from an mmap without copying:
+#   seg_sura, seg_aya, seg_source_type   one entry per segment (source_type: index in SOURCE_TYPES)
+#   seg_text_start                       byte offsets into the UTF-8 text blob (segments + 1)
+#   seg_complex_start, seg_word_start    offsets into the complex/word columns (segments + 1)
+#   cx_start, cx_end                     char offsets of each letter complex within its segment text
+#   cx_word                              word index (within the segment) of each complex
+#   cx_next_char                         code point of the next non-space char after cx_end, -1 if none
+#   word_start, word_end                 char offsets of each whitespace-separated word
+#   text                                 UTF-8 blob of all segment texts
+# The letter of a complex is text[cx_start] and its diacritics are text[cx_start + 1 : cx_end],
+# so the complexes themselves need no separate string storage.
+
+INDEX_MAGIC = b"TJWIDX01"
+INDEX_VERSION = 1
+INDEX_FILE_EXTENSION = ".tjidx"
+
+SOURCE_TYPES = (corpus_loader.SOURCE_TYPE_TEXT, corpus_loader.SOURCE_TYPE_BISMILLAH)
+
+_INT_SECTIONS = (
+    "seg_sura", "seg_aya", "seg_text_start", "seg_complex_start", "seg_word_start",
+    "cx_start", "cx_end", "cx_word", "cx_next_char",
+    "word_start", "word_end",
+)
+_SECTION_ALIGNMENT = 8
+_NO_NEXT_CHAR = -1
+_MAX_INDEX_ID = (1 << (8 * array.array('i').itemsize - 1)) - 1
+_MIN_INDEX_ID = -_MAX_INDEX_ID - 1
+
+
+def default_index_path(json_file_path):
+    """Returns the index path used for json_file_path when none is given (next to the JSON file)."""
+    return os.path.splitext(json_file_path)[0] + INDEX_FILE_EXTENSION
+
+def hash_source_file(json_file_path):
+    """SHA-256 hex digest of the source JSON file, used to validate an index against its corpus."""
+    digest = hashlib.sha256()
+    with open(json_file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_index_id(value):
+    """True if value can be stored as a sura/aya id (an int that fits the 'i' index columns)."""
+    return isinstance(value, int) and not isinstance(value, bool) and \
+        _MIN_INDEX_ID <= value <= _MAX_INDEX_ID
+
+def build_corpus_index(json_file_path, index_path=None, source_hash=None):
+    """
+    Parses the Quran JSON once and writes the compact letter-complex index to index_path.
+
+    Returns:
+        str: The path of the written index, or None if the corpus could not be loaded or its
+             sura/aya ids do not fit the index (a warning is printed; callers then parse the JSON).
+    """
+    reader = corpus_loader.open_corpus(json_file_path)
+    if reader is None:
+        return None
+    with reader:
+        segments = list(reader.iter_segments())
+    if reader.errors: # never index a partially read corpus
+        return None
+    for sura_idx, aya_idx, _, _ in segments:
+        if not _is_index_id(sura_idx) or not _is_index_id(aya_idx):
+            print(f"Warning: Not indexing '{json_file_path}': sura {sura_idx!r}, aya {aya_idx!r} "
+                  f"is not an integer id the index can store.")
+            return None
+    if index_path is None:
+        index_path = default_index_path(json_file_path)
+    if source_hash is None:
+        source_hash = hash_source_file(json_file_path)
+
+    columns = {name: array.array('i') for name in _INT_SECTIONS}
+    seg_source_type = array.array('B')
+    text_blob = bytearray()
+
+    columns["seg_text_start"].append(0)
+    columns["seg_complex_start"].append(0)
+    columns["seg_word_start"].append(0)
+    for sura_idx, aya_idx, source_type, text in segments:
+        columns["seg_sura"].append(sura_idx)
+        columns["seg_aya"].append(aya_idx)
+        seg_source_type.append(SOURCE_TYPES.index(source_type))
+
+        word_spans = text_parser.get_word_spans(text)
+        word_idx = 0
+        for _, _, start_idx, end_idx in text_parser.get_letter_complexes(text):
+            while word_spans[word_idx][1] <= start_idx:
+                word_idx += 1
+            next_char, _ = letter_analyzer.get_next_meaningful_char_and_index(text, end_idx)
+            columns["cx_start"].append(start_idx)
+            columns["cx_end"].append(end_idx)
+            columns["cx_word"].append(word_idx)
+            columns["cx_next_char"].append(ord(next_char) if next_char else _NO_NEXT_CHAR)
+        for word_start, word_end in word_spans:
+            columns["word_start"].append(word_start)
+            columns["word_end"].append(word_end)
+
+        text_blob += text.encode('utf-8')
+        columns["seg_text_start"].append(len(text_blob))
+        columns["seg_complex_start"].append(len(columns["cx_start"]))
+        columns["seg_word_start"].append(len(columns["word_start"]))
+
+    sections = [(name, columns[name]) for name in _INT_SECTIONS]
+    sections.append(("seg_source_type", seg_source_type))
+    sections.append(("text", text_blob))
+
+    header = {
+        "version": INDEX_VERSION,
+        "byteorder": sys.byteorder,
+        "source_sha256": source_hash,
+        "segment_count": len(segments),
+        "sections": {},
+    }
+    # Section offsets are relative to the start of the (aligned) data area after the header.
+    offset = 0
+    for name, data in sections:
+        typecode = data.typecode if isinstance(data, array.array) else 'B'
+        nbytes = len(data) * (data.itemsize if isinstance(data, array.array) else 1)
+        header["sections"][name] = [offset, nbytes, typecode]
+        offset += nbytes + (-nbytes % _SECTION_ALIGNMENT)
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(INDEX_MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (-f.tell() % _SECTION_ALIGNMENT))
+        for _, data in sections:
+            raw = data.tobytes() if isinstance(data, array.array) else bytes(data)
+            f.write(raw)
+            f.write(b"\0" * (-len(raw) % _SECTION_ALIGNMENT))
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+class CorpusIndex:
+    """
+    Read-only, mmap-backed view of a corpus index file.
+    Columns are memoryviews into the mapped file; segment texts are decoded on demand.
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        with open(index_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._load_header()
+        except Exception:
+            self.close()
+            raise
+
+    def _load_header(self):
+        buf = memoryview(self._mmap)
+        if bytes(buf[:len(INDEX_MAGIC)]) != INDEX_MAGIC:
+            raise ValueError(f"'{self.index_path}' is not a corpus index file.")
+        (header_len,) = struct.unpack_from('<I', buf, len(INDEX_MAGIC))
+        header_start = len(INDEX_MAGIC) + 4
+        self.header = json.loads(bytes(buf[header_start:header_start + header_len]).decode('utf-8'))
+        if self.header.get("version") != INDEX_VERSION or self.header.get("byteorder") != sys.byteorder:
+            raise ValueError(f"'{self.index_path}' was written by an incompatible index version.")
+
+        data_start = header_start + header_len
+        data_start += -data_start % _SECTION_ALIGNMENT
+        self._columns = {}
+        for name, (offset, nbytes, typecode) in self.header["sections"].items():
+            section = buf[data_start + offset : data_start + offset + nbytes]
+            self._columns[name] = section if name == "text" else section.cast(typecode)
+        self.source_sha256 = self.header["source_sha256"]
+        self.segment_count = self.header["segment_count"]
+
+    def close(self):
+        """Releases the column views and the underlying mmap."""
+        for column in getattr(self, "_columns", {}).values():
+            column.release()
+        self._columns = {}
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass # Views handed out to callers are still alive; the map closes when they go.
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.segment_count
+
+    def column(self, name):
+        """Returns the raw memoryview of a section (see the layout notes at the top of this module)."""
+        return self._columns[name]
+
+    def segment_text(self, segment_idx):
+        text_start = self._columns["seg_text_start"]
+        return bytes(self._columns["text"][text_start[segment_idx]:text_start[segment_idx + 1]]).decode('utf-8')
+
+    def segment(self, segment_idx):
+        """Returns (sura_idx, aya_idx, source_type, text) of a segment."""
+        return (self._columns["seg_sura"][segment_idx],
+                self._columns["seg_aya"][segment_idx],
+                SOURCE_TYPES[self._columns["seg_source_type"][segment_idx]],
+                self.segment_text(segment_idx))
+
+    def iter_segments(self):
+        for segment_idx in range(self.segment_count):
+            yield self.segment(segment_idx)
+
+    def letter_complexes(self, segment_idx, text=None):
+        """
+        Rebuilds the text_parser.get_letter_complexes tuples of a segment without scanning its text.
+        Pass text if it has already been decoded.
+        """
+        if text is None:
+            text = self.segment_text(segment_idx)
+        cx_from = self._columns["seg_complex_start"][segment_idx]
+        cx_to = self._columns["seg_complex_start"][segment_idx + 1]
+        starts = self._columns["cx_start"][cx_from:cx_to]
+        ends = self._columns["cx_end"][cx_from:cx_to]
+        return [(text[start], text[start + 1:end], start, end) for start, end in zip(starts, ends)]
+
+    def word_spans(self, segment_idx):
+        """Returns the (start_idx, end_idx_exclusive) word spans of a segment."""
+        w_from = self._columns["seg_word_start"][segment_idx]
+        w_to = self._columns["seg_word_start"][segment_idx + 1]
+        return list(zip(self._columns["word_start"][w_from:w_to], self._columns["word_end"][w_from:w_to]))
+
+    def complex_word_indices(self, segment_idx):
+        """Returns the word index (into word_spans) of every letter complex of a segment."""
+        cx_from = self._columns["seg_complex_start"][segment_idx]
+        cx_to = self._columns["seg_complex_start"][segment_idx + 1]
+        return self._columns["cx_word"][cx_from:cx_to].tolist()
+
+    def stop_contexts(self, segment_idx, considered_waqf_marks, text_length=None):
+        """
+        Returns the letter_analyzer stop context of every letter complex of a segment,
+        derived from the stored next-meaningful-char column instead of scanning the text.
+        """
+        if text_length is None:
+            text_length = len(self.segment_text(segment_idx))
+        cx_from = self._columns["seg_complex_start"][segment_idx]
+        cx_to = self._columns["seg_complex_start"][segment_idx + 1]
+        ends = self._columns["cx_end"][cx_from:cx_to]
+        next_chars = self._columns["cx_next_char"][cx_from:cx_to]
+        return [
+            letter_analyzer.shared_stop_context(
+                end == text_length,
+                chr(next_code) if next_code != _NO_NEXT_CHAR else None,
+                considered_waqf_marks)
+            for end, next_code in zip(ends, next_chars)
+        ]
+
+
+def load_corpus_index(json_file_path, index_path=None, rebuild=True):
+    """
+    Opens the corpus index for json_file_path, (re)building it if it is missing or stale.
+    An index is stale when the SHA-256 of the source JSON differs from the one it was built from.
+
+    Returns:
+        CorpusIndex, or None if no valid index is available (errors are printed, as elsewhere).
+    """
+    if index_path is None:
+        index_path = default_index_path(json_file_path)
+    try:
+        source_hash = hash_source_file(json_file_path)
+    except FileNotFoundError:
+        print(f"Error: JSON file '{json_file_path}' not found.")
+        return None
+
+    if os.path.exists(index_path):
+        try:
+            index = CorpusIndex(index_path)
+            if index.source_sha256 == source_hash:
+                return index
+            index.close()
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable corpus index '{index_path}': {e}")
+
+    if not rebuild:
+        return None
+    try:
+        if build_corpus_index(json_file_path, index_path, source_hash=source_hash) is None:
+            return None
+    except OSError as e:
+        print(f"Warning: Could not write corpus index '{index_path}': {e}")
+        return None
+    return CorpusIndex(index_path)
@@ -0,0 +1,267 @@
+# tajweed_analyzer/corpus_loader.py
+
+import collections
+import json
+
+# Incremental loader for the supported Quran JSON shapes. Instead of json.load-ing the whole file,
+# the reader walks the JSON text up to the array of suras and then decodes one sura object at a
+# time, so memory stays bounded by the largest sura and analysis can start after the first one.
+#
+# Supported shapes (the path leads from the top-level value to the array of sura objects):
+#   {"quran": {"suras": [{"index": 1, "ayas": [{"index": 1, "text": ..., "bismillah": ...}]}]}}
+#   [{"sura_number": 1, "verses": [{"verse_number": 1, "text": ...}]}]   (or index/ayas keys)
+# Further shapes can be supported by adding their path to SURA_ARRAY_PATHS; the per-sura keys are
+# detected from the first sura object by detect_schema.
+
+SOURCE_TYPE_TEXT = "text"
+SOURCE_TYPE_BISMILLAH = "bismillah"
+
+SURA_ARRAY_PATHS = (
+    ("quran", "suras"),
+    (),
+)
+
+CorpusSchema = collections.namedtuple(
+    "CorpusSchema", ["sura_key", "ayas_list_key", "aya_key", "text_key", "bismillah_key"]
+)
+
+_READ_CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\n\r"
+
+
+class CorpusReadError(Exception):
+    """
+    Raised by streaming analyses (e.g. quran_processor.iter_rule_instances) when the corpus could
+    not be opened or was only read in part, after the findings of the part that was read.
+    """
+
+
+class _JsonStreamReader:
+    """Minimal pull reader over a JSON text file: skips whitespace, matches punctuation, decodes values."""
+
+    def __init__(self, f):
+        self._file = f
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, min_size):
+        """Reads until at least min_size chars are buffered past the current position (or EOF)."""
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        while not self._eof and len(self._buffer) < min_size:
+            chunk = self._file.read(max(_READ_CHUNK_SIZE, min_size - len(self._buffer)))
+            if not chunk:
+                self._eof = True
+            self._buffer += chunk
+
+    def peek(self):
+        """Returns the next non-whitespace char without consuming it ("" at end of input)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._eof:
+                return ""
+            self._fill(1)
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expected '{char}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def decode_value(self):
+        """Decodes the next complete JSON value, reading more input as needed."""
+        self.peek()
+        want = _READ_CHUNK_SIZE
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A value ending exactly at the buffer edge may be a truncated number; read on.
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            want = 2 * max(want, len(self._buffer) - self._pos)
+            self._fill(want)
+
+    def enter_path(self, path):
+        """
+        Descends from the current value through the object keys in path, skipping other members.
+        Returns True when positioned at the value of the last key, False if a key is missing.
+        """
+        for key in path:
+            if self.peek() != "{":
+                return False
+            self.expect("{")
+            while True:
+                if self.peek() == "}":
+                    return False
+                member_key = self.decode_value()
+                self.expect(":")
+                if member_key == key:
+                    break
+                self.decode_value() # Skip the value of an unrelated member
+                if self.peek() == ",":
+                    self.expect(",")
+        return True
+
+    def iter_array(self):
+        """Yields the elements of the array starting at the current position, one at a time."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.expect("]")
+            return
+        while True:
+            yield self.decode_value()
+            if self.peek() == ",":
+                self.expect(",")
+                continue
+            self.expect("]")
+            return
+
+
+def detect_schema(sura_example):
+    """
+    Determines the key names of a corpus from its first sura object.
+    Returns a CorpusSchema, or None (with an error printed) if the structure is not recognized.
+    """
+    if not isinstance(sura_example, dict) or not ("sura_number" in sura_example or "index" in sura_example):
+        print("Error: JSON structure is not recognized. Please adapt corpus_loader.py.")
+        return None
+    sura_key = "sura_number" if "sura_number" in sura_example else "index"
+
+    ayas_list_key = "verses" if "verses" in sura_example and sura_example["verses"] else \
+                    "ayas" if "ayas" in sura_example and sura_example["ayas"] else None
+    if not ayas_list_key or not sura_example[ayas_list_key]:
+         print("Error: Could not determine ayas list key or ayas list is empty in the JSON structure.")
+         return None
+
+    aya_example = sura_example[ayas_list_key][0]
+    aya_key = "verse_number" if "verse_number" in aya_example else "index"
+    text_key = "text" if "text" in aya_example else None # text is crucial
+    if not text_key:
+        print(f"Error: Could not determine 'text_key' for ayas in JSON structure for sura {sura_example.get(sura_key)}")
+        return None
+
+    bismillah_key = "bismillah" # This might not exist in simpler structures or be part of text
+    return CorpusSchema(sura_key, ayas_list_key, aya_key, text_key, bismillah_key)
+
+
+class CorpusReader:
+    """
+    An opened corpus whose schema has been detected. Iterating it parses the file incrementally,
+    one sura at a time. Use open_corpus() to create one; use as a context manager or call close().
+    """
+
+    def __init__(self, json_file_path, f, stream, first_sura, schema):
+        self.json_file_path = json_file_path
+        self.schema = schema
+        self._file = f
+        self._stream = stream
+        self._first_sura = first_sura
+        self.errors = [] # errors met while iterating, e.g. a truncated file; the read is then partial
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def iter_suras(self):
+        """Yields the raw sura objects. Can only be iterated once."""
+        first_sura, self._first_sura = self._first_sura, None
+        if first_sura is None:
+            return
+        yield first_sura
+        try:
+            yield from self._stream
+        except json.JSONDecodeError as e:
+            message = f"Error decoding JSON from '{self.json_file_path}': {e}"
+            print(message)
+            self.errors.append(message)
+
+    def iter_segments(self):
+        """
+        Yields (sura_idx, aya_idx, source_type, text) for every segment in canonical order:
+        each Ayah text followed by its Bismillah, if any.
+        """
+        sura_key, ayas_list_key, aya_key, text_key, bismillah_key = self.schema
+        for sura_obj in self.iter_suras():
+            sura_idx = sura_obj.get(sura_key)
+            if not sura_idx: # Skip if sura index is missing
+                print(f"Warning: Missing Sura index for object: {sura_obj}")
+                continue
+
+            for aya_obj in sura_obj.get(ayas_list_key, ()):
+                aya_idx = aya_obj.get(aya_key)
+                text = aya_obj.get(text_key, "")
+                bismillah = aya_obj.get(bismillah_key)
+
+                if text:
+                    yield sura_idx, aya_idx, SOURCE_TYPE_TEXT, text
+                if bismillah:
+                    # Bismillah from aya_obj is associated with that aya_idx.
+                    # If your JSON means Bismillah is *before* aya 1 of most Suras,
+                    # you might want a fixed aya_idx (like 0) for bismillah.
+                    yield sura_idx, aya_idx, SOURCE_TYPE_BISMILLAH, bismillah
+
+
+def open_corpus(json_file_path):
+    """
+    Opens a Quran JSON file, locates its array of suras and detects the schema from the first sura.
+
+    Returns:
+        CorpusReader, or None on error (errors are printed, as elsewhere in the analyzer).
+    """
+    try:
+        f = open(json_file_path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        print(f"Error: JSON file '{json_file_path}' not found.")
+        return None
+
+    try:
+        for path in SURA_ARRAY_PATHS:
+            f.seek(0)
+            stream = _JsonStreamReader(f)
+            if stream.enter_path(path) and stream.peek() == "[":
+                suras = stream.iter_array()
+                first_sura = next(suras, None)
+                if first_sura is None:
+                    print(f"Warning: No suras found in '{json_file_path}'.")
+                    break
+                schema = detect_schema(first_sura)
+                if schema is None:
+                    break
+                return CorpusReader(json_file_path, f, suras, first_sura, schema)
+        else:
+            print("Error: JSON structure is not recognized. Please adapt corpus_loader.py.")
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON from '{json_file_path}': {e}")
+    f.close()
+    return None
+
+def iter_corpus_segments(json_file_path, errors=None):
+    """
+    Yields the (sura_idx, aya_idx, source_type, text) segments of a corpus file, parsed incrementally.
+    If an errors list is given, it receives a message when the corpus could not be opened or was
+    only read in part (errors are printed either way).
+    """
+    reader = open_corpus(json_file_path)
+    if reader is None:
+        if errors is not None:
+            errors.append(f"Could not open corpus '{json_file_path}'.")
+        return
+    with reader:
+        yield from reader.iter_segments()
+        if errors is not None:
+            errors.extend(reader.errors)
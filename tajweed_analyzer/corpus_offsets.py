@@ -0,0 +1,192 @@
+# tajweed_analyzer/corpus_offsets.py
+
+import array
+import bisect
+import json
+from . import corpus_loader
+
+# Global character offsets over a whole corpus. Segments are laid out end to end in corpus order,
+# each followed by SEGMENT_SEPARATOR_LENGTH separator character(s), so every (sura, aya, source_type,
+# char_index_in_text) has one absolute position and every position maps back to one segment by
+# binary search over the cumulative segment starts.
+#
+# Optional divisions (juz, hizb, page, ...) are given by the (sura, aya) each one starts at and
+# are stored as sorted absolute offsets as well:
+#   offsets = corpus_offsets.CorpusOffsetIndex.from_corpus(path)
+#   offsets.load_divisions("divisions.json") # {"juz": [[1, 1], [2, 142], ...], "page": [...]}
+#   findings = corpus_offsets.PositionedFindings(offsets, instances)
+#   findings.in_division(corpus_offsets.DIVISION_JUZ, 30)
+#
+# quran_processor.process_quran_for_rules(..., absolute_char_index=True) uses the same layout to
+# report char_index_in_text as the absolute position directly.
+
+SEGMENT_SEPARATOR_LENGTH = 1
+
+DIVISION_JUZ = "juz"
+DIVISION_HIZB = "hizb"
+DIVISION_PAGE = "page"
+
+
+class CorpusOffsetIndex:
+    """Cumulative segment offsets of a corpus, plus optional division boundaries."""
+
+    def __init__(self):
+        self.suras = array.array('H')
+        self.ayas = array.array('H')
+        self.source_types = []
+        self.starts = array.array('Q') # absolute offset of each segment's first character
+        self.lengths = array.array('I')
+        self.total_length = 0
+        self.divisions = {} # name -> array of absolute start offsets, division n starts at [n - 1]
+        self._segment_lookup = {}
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Builds the index from (sura_idx, aya_idx, source_type, text) tuples in corpus order."""
+        offsets = cls()
+        for sura_idx, aya_idx, source_type, text in segments:
+            offsets.append_segment(sura_idx, aya_idx, source_type, len(text))
+        return offsets
+
+    @classmethod
+    def from_corpus(cls, json_file_path):
+        """Builds the index of a Quran JSON file (streamed). Returns None if it cannot be read."""
+        reader = corpus_loader.open_corpus(json_file_path)
+        if reader is None:
+            return None
+        with reader:
+            return cls.from_segments(reader.iter_segments())
+
+    def append_segment(self, sura_idx, aya_idx, source_type, text_length):
+        self._segment_lookup[(sura_idx, aya_idx, source_type)] = len(self.starts)
+        self.suras.append(sura_idx)
+        self.ayas.append(aya_idx)
+        self.source_types.append(source_type)
+        self.starts.append(self.total_length)
+        self.lengths.append(text_length)
+        self.total_length += text_length + SEGMENT_SEPARATOR_LENGTH
+
+    def __len__(self):
+        return len(self.starts)
+
+    def segment_index(self, sura_idx, aya_idx, source_type=corpus_loader.SOURCE_TYPE_TEXT):
+        """Index of a segment in corpus order; raises KeyError if the corpus has no such segment."""
+        try:
+            return self._segment_lookup[(sura_idx, aya_idx, source_type)]
+        except KeyError:
+            raise KeyError(f"No {source_type} segment for sura {sura_idx}, aya {aya_idx}.") from None
+
+    def segment_start(self, sura_idx, aya_idx, source_type=corpus_loader.SOURCE_TYPE_TEXT):
+        return self.starts[self.segment_index(sura_idx, aya_idx, source_type)]
+
+    def _aya_segment_indexes(self, sura_idx, aya_idx):
+        """Indexes of every segment of an Ayah (its text and Bismillah); raises KeyError if none."""
+        segment_indexes = [segment_idx for segment_idx in (
+            self._segment_lookup.get((sura_idx, aya_idx, corpus_loader.SOURCE_TYPE_BISMILLAH)),
+            self._segment_lookup.get((sura_idx, aya_idx, corpus_loader.SOURCE_TYPE_TEXT))
+        ) if segment_idx is not None]
+        if not segment_indexes:
+            raise KeyError(f"No segment for sura {sura_idx}, aya {aya_idx}.")
+        return segment_indexes
+
+    def aya_start(self, sura_idx, aya_idx):
+        """Offset of the first segment of an Ayah (its Bismillah, if the corpus has one before it)."""
+        return min(self.starts[segment_idx] for segment_idx in self._aya_segment_indexes(sura_idx, aya_idx))
+
+    def aya_end(self, sura_idx, aya_idx):
+        """
+        Offset just past the last segment of an Ayah, including its separator (and its Bismillah,
+        if the corpus has one after the text), so an Ayah covers aya_start <= position < aya_end.
+        """
+        last_segment = max(self._aya_segment_indexes(sura_idx, aya_idx))
+        return self.starts[last_segment] + self.lengths[last_segment] + SEGMENT_SEPARATOR_LENGTH
+
+    def absolute_position(self, sura_idx, aya_idx, source_type, char_index_in_text):
+        return self.segment_start(sura_idx, aya_idx, source_type) + char_index_in_text
+
+    def position_of(self, instance):
+        """Absolute position of a result dict (with a segment-relative char_index_in_text)."""
+        return self.absolute_position(instance["sura"], instance["aya"], instance["source_type"],
+                                      instance["char_index_in_text"])
+
+    def resolve(self, position):
+        """
+        Maps an absolute position back to (sura_idx, aya_idx, source_type, char_index_in_text).
+        Positions on a segment separator resolve to the end of that segment. Raises ValueError
+        outside the corpus.
+        """
+        if not 0 <= position < self.total_length:
+            raise ValueError(f"Position {position} is outside the corpus (0..{self.total_length - 1}).")
+        segment_idx = bisect.bisect_right(self.starts, position) - 1
+        return (self.suras[segment_idx], self.ayas[segment_idx], self.source_types[segment_idx],
+                position - self.starts[segment_idx])
+
+    def add_divisions(self, name, division_starts):
+        """
+        Registers a division scheme from the (sura_idx, aya_idx) at which each division starts,
+        in order (division 1 first).
+        """
+        offsets = array.array('Q', (self.aya_start(sura_idx, aya_idx) for sura_idx, aya_idx in division_starts))
+        if any(later < earlier for earlier, later in zip(offsets, offsets[1:])):
+            raise ValueError(f"'{name}' division starts are not in corpus order.")
+        self.divisions[name] = offsets
+
+    def load_divisions(self, path):
+        """Adds every division scheme of a JSON file of {name: [[sura, aya], ...]}."""
+        with open(path, 'r', encoding='utf-8') as f:
+            for name, division_starts in json.load(f).items():
+                self.add_divisions(name, division_starts)
+
+    def division_at(self, name, position):
+        """1-based number of the division containing position (0 if before the first one)."""
+        return bisect.bisect_right(self.divisions[name], position)
+
+    def division_range(self, name, number):
+        """(start, end) absolute offsets of division number (1-based), end exclusive."""
+        offsets = self.divisions[name]
+        if not 1 <= number <= len(offsets):
+            raise ValueError(f"'{name}' has divisions 1..{len(offsets)}, not {number}.")
+        end = offsets[number] if number < len(offsets) else self.total_length
+        return offsets[number - 1], end
+
+
+class PositionedFindings:
+    """
+    Findings sorted by absolute position, for slicing by corpus range without a scan.
+
+    Args:
+        offset_index: CorpusOffsetIndex of the corpus the findings come from.
+        instances: Result dicts (or other mappings with the same keys).
+        absolute_char_index: True if char_index_in_text already holds absolute positions
+                             (process_quran_for_rules(..., absolute_char_index=True)).
+    """
+
+    def __init__(self, offset_index, instances, absolute_char_index=False):
+        self.offset_index = offset_index
+        if absolute_char_index:
+            positioned = sorted((instance["char_index_in_text"], order, instance)
+                                for order, instance in enumerate(instances))
+        else:
+            positioned = sorted((offset_index.position_of(instance), order, instance)
+                                for order, instance in enumerate(instances))
+        self.positions = array.array('Q', (position for position, _, _ in positioned))
+        self.instances = [instance for _, _, instance in positioned]
+
+    def __len__(self):
+        return len(self.instances)
+
+    def slice(self, start, end):
+        """Findings with start <= absolute position < end, in corpus order."""
+        lo = bisect.bisect_left(self.positions, start)
+        hi = bisect.bisect_left(self.positions, end)
+        return self.instances[lo:hi]
+
+    def count(self, start, end):
+        return bisect.bisect_left(self.positions, end) - bisect.bisect_left(self.positions, start)
+
+    def in_ayas(self, first, last):
+        """Findings from Ayah first to Ayah last inclusive, both given as (sura_idx, aya_idx)."""
+        return self.slice(self.offset_index.aya_start(*first), self.offset_index.aya_end(*last))
+
+    def in_division(self, name, number):
+        return self.slice(*self.offset_index.division_range(name, number))
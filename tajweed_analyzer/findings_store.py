@@ -0,0 +1,176 @@
+# tajweed_analyzer/findings_store.py
+
+import array
+import bisect
+from . import persistent_cache
+
+# Queryable store of rule findings. Every finding gets a record id (its insertion position), and
+# inverted indexes map each value of the INDEXED_FIELDS to the sorted ids of the records holding it,
+# so filtered queries and counts cost O(matches * log n) instead of a scan over every finding:
+#
+#   store = findings_store.FindingsStore.from_rule_results(
+#       quran_processor.process_quran_for_rules(path, ["qalqalah"]))
+#   store.query(type=qalqalah_rules.QALQALAH_AKBAR, qalqalah_letter=ac.DAL, sura_range=((78, 1), (114, 6)))
+#   store.count(waqf_char=ac.WAQF_MEEM, type=qalqalah_rules.QALQALAH_KUBRA)
+#
+# stop_reason and waqf_char are the structured stop fields quran_processor puts on every finding
+# (see quran_processor.stop_fields).
+
+STORE_FORMAT_VERSION = 1
+
+FIELD_RULE = "rule"
+FIELD_STOP_REASON = "stop_reason"
+FIELD_WAQF_CHAR = "waqf_char"
+INDEXED_FIELDS = (FIELD_RULE, "type", "qalqalah_letter", FIELD_STOP_REASON, FIELD_WAQF_CHAR,
+                  "sura", "aya", "source_type")
+
+def _sura_aya_key(sura_idx, aya_idx):
+    """Sort key of a (sura, aya) position, or None if either index is missing or not an int."""
+    if not isinstance(sura_idx, int) or not isinstance(aya_idx, int):
+        return None
+    return (sura_idx << 16) | aya_idx
+
+
+class FindingsStore:
+    """Findings with inverted indexes on INDEXED_FIELDS and a sorted (sura, aya) index."""
+
+    def __init__(self):
+        self.records = [] # (rule_name, instance) in insertion order
+        self._postings = {field: {} for field in INDEXED_FIELDS} # field -> value -> array of ids
+        self._range_keys = None # sorted (sura, aya) keys, built on the first range query
+        self._range_ids = None
+
+    @classmethod
+    def from_rule_instances(cls, rule_instance_pairs):
+        """Builds a store from (rule_name, instance) pairs, e.g. quran_processor.iter_rule_instances."""
+        store = cls()
+        store.extend(rule_instance_pairs)
+        return store
+
+    @classmethod
+    def from_rule_results(cls, results_by_rule):
+        """Builds a store from a {rule_name: [instances]} dict, e.g. process_quran_for_rules."""
+        return cls.from_rule_instances(
+            (rule_name, instance) for rule_name, instances in results_by_rule.items() for instance in instances
+        )
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, rule_name, instance):
+        record_id = len(self.records)
+        self.records.append((rule_name, instance))
+        for field in INDEXED_FIELDS:
+            value = rule_name if field == FIELD_RULE else instance.get(field)
+            if value is None:
+                continue
+            ids = self._postings[field].get(value)
+            if ids is None:
+                ids = self._postings[field][value] = array.array('I')
+            ids.append(record_id)
+        self._range_keys = self._range_ids = None
+        return record_id
+
+    def extend(self, rule_instance_pairs):
+        for rule_name, instance in rule_instance_pairs:
+            self.add(rule_name, instance)
+
+    def values(self, field):
+        """Distinct indexed values of field with their counts, e.g. values("type")."""
+        return {value: len(ids) for value, ids in self._postings[field].items()}
+
+    def _build_range_index(self):
+        # Records without an int sura and aya have no position, so no range query matches them.
+        keyed = []
+        for record_id, (_, instance) in enumerate(self.records):
+            key = _sura_aya_key(instance.get("sura"), instance.get("aya"))
+            if key is not None:
+                keyed.append((key, record_id))
+        keyed.sort()
+        self._range_keys = array.array('Q', (key for key, _ in keyed))
+        self._range_ids = array.array('I', (record_id for _, record_id in keyed))
+
+    def _range_slice(self, sura_range):
+        """Sorted ids of records with first <= (sura, aya) <= last, sura_range = ((sura, aya), (sura, aya))."""
+        if self._range_keys is None:
+            self._build_range_index()
+        (first_sura, first_aya), (last_sura, last_aya) = sura_range
+        first_key = _sura_aya_key(first_sura, first_aya)
+        last_key = _sura_aya_key(last_sura, last_aya)
+        if first_key is None or last_key is None:
+            raise ValueError(f"sura_range bounds must be (sura, aya) ints, got {sura_range!r}.")
+        lo = bisect.bisect_left(self._range_keys, first_key)
+        hi = bisect.bisect_right(self._range_keys, last_key)
+        return array.array('I', sorted(self._range_ids[lo:hi]))
+
+    def _matching_ids(self, filters, sura_range):
+        candidate_lists = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field not in self._postings:
+                raise KeyError(f"'{field}' is not an indexed field; choose from {', '.join(INDEXED_FIELDS)}.")
+            ids = self._postings[field].get(value)
+            if ids is None:
+                return []
+            candidate_lists.append(ids)
+        if sura_range is not None:
+            candidate_lists.append(self._range_slice(sura_range))
+        if not candidate_lists:
+            return range(len(self.records))
+
+        # Walk the shortest list and binary-search the others.
+        candidate_lists.sort(key=len)
+        shortest, others = candidate_lists[0], candidate_lists[1:]
+        matches = []
+        for record_id in shortest:
+            for ids in others:
+                pos = bisect.bisect_left(ids, record_id)
+                if pos == len(ids) or ids[pos] != record_id:
+                    break
+            else:
+                matches.append(record_id)
+        return matches
+
+    def query(self, sura_range=None, **filters):
+        """
+        Returns the instances matching every filter, in insertion order.
+
+        Args:
+            sura_range: Optional ((first_sura, first_aya), (last_sura, last_aya)), both inclusive.
+            **filters: field=value for any of INDEXED_FIELDS; None values are ignored.
+        """
+        return [self.records[record_id][1] for record_id in self._matching_ids(filters, sura_range)]
+
+    def query_pairs(self, sura_range=None, **filters):
+        """Like query, but returns (rule_name, instance) pairs."""
+        return [self.records[record_id] for record_id in self._matching_ids(filters, sura_range)]
+
+    def count(self, sura_range=None, **filters):
+        """Number of instances matching the filters (see query)."""
+        if sura_range is None:
+            active = [(field, value) for field, value in filters.items() if value is not None]
+            if len(active) == 1 and active[0][0] in self._postings:
+                return len(self._postings[active[0][0]].get(active[0][1], ()))
+        return len(self._matching_ids(filters, sura_range))
+
+    def save(self, path):
+        """Writes the findings and their indexes (see persistent_cache.write_compressed_json)."""
+        payload = {
+            "findings": persistent_cache.pack_rule_instances(self.records),
+            "postings": {field: [[value, ids.tolist()] for value, ids in postings.items()]
+                         for field, postings in self._postings.items()},
+        }
+        persistent_cache.write_compressed_json(path, payload, STORE_FORMAT_VERSION)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a store written by save, without re-indexing. Returns None if it cannot be read."""
+        payload = persistent_cache.read_compressed_json(path, STORE_FORMAT_VERSION, "findings store")
+        if payload is None:
+            return None
+        store = cls()
+        store.records = persistent_cache.unpack_rule_instances(payload["findings"])
+        for field, postings in payload["postings"].items():
+            store._postings[field] = {value: array.array('I', ids) for value, ids in postings}
+        return store
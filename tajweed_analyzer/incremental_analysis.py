@@ -0,0 +1,159 @@
+# tajweed_analyzer/incremental_analysis.py
+
+from . import analysis_cache
+from . import corpus_loader
+from . import letter_analyzer
+from . import persistent_cache
+from . import quran_processor
+from . import rule_registry
+
+# Diff-aware re-analysis of corpus variants (other mushaf editions, orthographies, corrected texts).
+# An AnalysisSnapshot keeps the findings of a run together with the content digest of every
+# (sura, aya, source_type) segment. Analyzing a new corpus against a snapshot only re-runs the
+# segments whose digest changed (or that are new) and reuses the previous findings of the rest,
+# so the analysis cost is proportional to the number of changed segments; the new corpus is
+# still read and hashed in full.
+#
+#   snapshot, _ = incremental_analysis.analyze_incrementally("nasekh.json")
+#   snapshot.save("nasekh.tjsnap")
+#   variant, changes = incremental_analysis.analyze_incrementally(
+#       "variant.json", incremental_analysis.AnalysisSnapshot.load("nasekh.tjsnap"))
+
+SNAPSHOT_FORMAT_VERSION = 2
+
+
+class AnalysisSnapshot:
+    """
+    Findings of one run plus what is needed to reuse them.
+
+    Attributes:
+        rule_identities: {rule_name: persistent_cache.rule_identity(...) or None}.
+        waqf_marks: frozenset of considered Waqf marks.
+        digests: {(sura_idx, aya_idx, source_type): analysis_cache.text_digest(text)}, in corpus order.
+        results: {rule_name: [result dicts]}, as process_quran_for_rules returns.
+        pipeline: persistent_cache.pipeline_fingerprint() of the run.
+    """
+
+    def __init__(self, rule_identities, waqf_marks, digests, results, pipeline):
+        self.rule_identities = rule_identities
+        self.waqf_marks = waqf_marks
+        self.digests = digests
+        self.results = results
+        self.pipeline = pipeline
+
+    def is_compatible(self, rules, considered_waqf_marks):
+        """
+        True if this snapshot's findings are valid for rules ({name: function}) and marks under the
+        current analyzer code (the same pipeline fingerprint as the persistent results cache).
+        """
+        if frozenset(considered_waqf_marks) != self.waqf_marks or list(rules) != list(self.rule_identities):
+            return False
+        if self.pipeline != persistent_cache.pipeline_fingerprint():
+            return False
+        for rule_name, rule_check_function in rules.items():
+            identity = persistent_cache.rule_identity(rule_name, rule_check_function)
+            # Functions without a stable identity (lambdas, closures) cannot be proven unchanged.
+            if identity is None or identity != self.rule_identities[rule_name]:
+                return False
+        return True
+
+    def instances_by_segment(self):
+        """Groups the findings as {segment key: {rule_name: [instances]}}."""
+        grouped = {}
+        for rule_name, instances in self.results.items():
+            for instance in instances:
+                segment_key = (instance["sura"], instance["aya"], instance["source_type"])
+                grouped.setdefault(segment_key, {}).setdefault(rule_name, []).append(instance)
+        return grouped
+
+    def save(self, path):
+        """Writes the snapshot (see persistent_cache.write_compressed_json)."""
+        payload = {
+            "rule_identities": self.rule_identities,
+            "waqf_marks": sorted(self.waqf_marks),
+            "pipeline": self.pipeline,
+            "segments": [[sura_idx, aya_idx, source_type, digest.hex()]
+                         for (sura_idx, aya_idx, source_type), digest in self.digests.items()],
+            "findings": persistent_cache.pack_rule_instances(
+                (rule_name, instance) for rule_name, instances in self.results.items() for instance in instances),
+        }
+        persistent_cache.write_compressed_json(path, payload, SNAPSHOT_FORMAT_VERSION)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a snapshot written by save. Returns None if it cannot be read."""
+        payload = persistent_cache.read_compressed_json(path, SNAPSHOT_FORMAT_VERSION, "analysis snapshot")
+        if payload is None:
+            return None
+        results = {rule_name: [] for rule_name in payload["rule_identities"]}
+        for rule_name, instance in persistent_cache.unpack_rule_instances(payload["findings"]):
+            results[rule_name].append(instance)
+        digests = {(sura_idx, aya_idx, source_type): bytes.fromhex(digest)
+                   for sura_idx, aya_idx, source_type, digest in payload["segments"]}
+        return cls(payload["rule_identities"], frozenset(payload["waqf_marks"]), digests, results,
+                   payload["pipeline"])
+
+
+def analyze_incrementally(json_file_path, previous=None, rules=None, considered_waqf_marks=None):
+    """
+    Analyzes a corpus, reusing the findings of previous for every segment whose text is unchanged.
+
+    Args:
+        json_file_path: Path to the (new) Quran JSON file.
+        previous: AnalysisSnapshot of an earlier run, or None for a full run. It is ignored (with a
+                  warning) if it was made with other rules, rule code, analyzer code
+                  (persistent_cache.pipeline_fingerprint) or Waqf marks.
+        rules: As in quran_processor.process_quran_for_rules; defaults to the rules of previous,
+               or every registered rule.
+        considered_waqf_marks: Defaults to the marks of previous, or DEFAULT_STOP_WAQF_MARKS.
+
+    Returns:
+        tuple: (AnalysisSnapshot of the new corpus, changes), where changes is a dict with the
+               "added", "changed" and "removed" segment keys and the "unchanged" segment count.
+               snapshot.results equals process_quran_for_rules on the new corpus.
+
+    Raises:
+        corpus_loader.CorpusReadError: If the corpus could not be opened or was only read in part;
+            a snapshot of part of the corpus would report every unread segment as removed.
+    """
+    if considered_waqf_marks is None and previous is not None:
+        considered_waqf_marks = previous.waqf_marks
+    considered_waqf_marks = letter_analyzer.normalize_waqf_marks(considered_waqf_marks)
+    if rules is None and previous is not None:
+        rules = list(previous.rule_identities)
+    rules = rule_registry.resolve_rules(rules)
+
+    if previous is not None and not previous.is_compatible(rules, considered_waqf_marks):
+        print("Warning: Previous snapshot was made with other rules, analyzer code or Waqf marks; "
+              "re-analyzing everything.")
+        previous = None
+    previous_digests = previous.digests if previous is not None else {}
+    previous_instances = previous.instances_by_segment() if previous is not None else {}
+
+    digests = {}
+    results = {rule_name: [] for rule_name in rules}
+    changes = {"added": [], "changed": [], "removed": [], "unchanged": 0}
+    load_errors = []
+    for sura_idx, aya_idx, source_type, text in corpus_loader.iter_corpus_segments(json_file_path, load_errors):
+        segment_key = (sura_idx, aya_idx, source_type)
+        digest = analysis_cache.text_digest(text)
+        digests[segment_key] = digest
+
+        previous_digest = previous_digests.get(segment_key)
+        if previous_digest == digest:
+            changes["unchanged"] += 1
+            segment_results = previous_instances.get(segment_key, {})
+        else:
+            changes["added" if previous_digest is None else "changed"].append(segment_key)
+            segment_results = quran_processor.analyze_text_for_rules(
+                sura_idx, aya_idx, text, source_type, rules, considered_waqf_marks)
+        for rule_name, instances in segment_results.items():
+            results[rule_name].extend(instances)
+
+    if load_errors:
+        raise corpus_loader.CorpusReadError("; ".join(load_errors))
+    changes["removed"] = [segment_key for segment_key in previous_digests if segment_key not in digests]
+    rule_identities = {rule_name: persistent_cache.rule_identity(rule_name, rule_check_function)
+                       for rule_name, rule_check_function in rules.items()}
+    return AnalysisSnapshot(rule_identities, frozenset(considered_waqf_marks), digests, results,
+                            persistent_cache.pipeline_fingerprint()), changes
@@ -1,6 +1,7 @@
 # tajweed_analyzer/letter_analyzer.py
 
-import arabic_characters as ac
+import types
+from . import arabic_characters as ac
 
 def is_end_of_text(text_length, char_end_index_after_diacritics):
     """Checks if the letter (including its diacritics) is at the very end of the text."""
@@ -65,24 +66,110 @@ def get_letter_stop_context(text_content, char_end_index_after_diacritics, consi
         "waqf_char": actual waqf character if reason is "waqf_mark", else None
         "details": string description
     }
+
+    See get_stop_contexts for the contexts of every letter complex of a text at once.
+    """
+    at_end_of_text = is_end_of_text(len(text_content), char_end_index_after_diacritics)
+    next_char = None
+    if not at_end_of_text:
+        next_char, _ = get_next_meaningful_char_and_index(text_content, char_end_index_after_diacritics)
+    return build_stop_context(at_end_of_text, next_char, considered_waqf_marks)
+
+def normalize_waqf_marks(considered_waqf_marks):
+    """
+    Returns considered_waqf_marks as a frozenset (ac.DEFAULT_STOP_WAQF_MARKS if None).
+    Stop contexts are cached per set of marks, so callers passing a set or list are normalized
+    once at the API entry points.
+    """
+    if considered_waqf_marks is None:
+        return ac.DEFAULT_STOP_WAQF_MARKS
+    if isinstance(considered_waqf_marks, frozenset):
+        return considered_waqf_marks
+    return frozenset(considered_waqf_marks)
+
+def build_stop_context(at_end_of_text, next_meaningful_char, considered_waqf_marks):
+    """
+    Builds the stop context dictionary (see get_letter_stop_context) from precomputed facts:
+    whether the letter ends the text, and the next non-space character after it (or None).
+    Used when those facts come from a precompiled corpus index instead of a text scan.
     """
     stop_context = {"is_stop": False, "reason": None, "waqf_char": None, "details": ""}
 
     # Check 1: End of the entire text (Ayah or Bismillah)
-    if is_end_of_text(len(text_content), char_end_index_after_diacritics):
+    if at_end_of_text:
         stop_context["is_stop"] = True
         stop_context["reason"] = STOP_REASON_END_OF_AYAH
         stop_context["details"] = "End of text."
         return stop_context
 
     # Check 2: Followed by a Waqf mark (potentially with spaces in between)
-    waqf_mark_found = is_followed_by_waqf(text_content, char_end_index_after_diacritics, considered_waqf_marks)
-    if waqf_mark_found:
+    if next_meaningful_char and next_meaningful_char in considered_waqf_marks:
         stop_context["is_stop"] = True
         stop_context["reason"] = STOP_REASON_WAQF_MARK
-        stop_context["waqf_char"] = waqf_mark_found
-        waqf_display = ac.WAQF_MARK_NAMES.get(waqf_mark_found, waqf_mark_found)
+        stop_context["waqf_char"] = next_meaningful_char
+        waqf_display = ac.WAQF_MARK_NAMES.get(next_meaningful_char, next_meaningful_char)
         stop_context["details"] = f"Followed by Waqf mark '{waqf_display}'."
         return stop_context
         
-    return stop_context
\ No newline at end of file
+    return stop_context
+
+
+# Stop contexts shared by every letter that has the same one, e.g. the one "no stop" context of
+# most letters. Read-only (mappingproxy), so one rule cannot alter the context another rule sees.
+NO_STOP_CONTEXT = types.MappingProxyType(build_stop_context(False, None, ()))
+END_OF_TEXT_STOP_CONTEXT = types.MappingProxyType(build_stop_context(True, None, ()))
+_WAQF_STOP_CONTEXTS = {} # waqf char -> shared context; one entry per mark ever stopped at
+
+def shared_stop_context(at_end_of_text, next_meaningful_char, considered_waqf_marks):
+    """Read-only, shared equivalent of build_stop_context."""
+    if at_end_of_text:
+        return END_OF_TEXT_STOP_CONTEXT
+    if next_meaningful_char is None or next_meaningful_char not in considered_waqf_marks:
+        return NO_STOP_CONTEXT
+    stop_context = _WAQF_STOP_CONTEXTS.get(next_meaningful_char)
+    if stop_context is None:
+        stop_context = _WAQF_STOP_CONTEXTS[next_meaningful_char] = types.MappingProxyType(
+            build_stop_context(False, next_meaningful_char, (next_meaningful_char,)))
+    return stop_context
+
+def get_next_meaningful_char(text, char_end_index_after_diacritics):
+    """The next non-space character at or after the index, or None (also at the end of the text)."""
+    text_length = len(text)
+    idx = char_end_index_after_diacritics
+    while idx < text_length:
+        char = text[idx]
+        if not char.isspace():
+            return char
+        idx += 1
+    return None
+
+def stop_context_at(text, char_end_index_after_diacritics, considered_waqf_marks):
+    """Read-only, shared equivalent of get_letter_stop_context."""
+    if char_end_index_after_diacritics == len(text):
+        return END_OF_TEXT_STOP_CONTEXT
+    return shared_stop_context(False, get_next_meaningful_char(text, char_end_index_after_diacritics),
+                               considered_waqf_marks)
+
+def get_stop_contexts(text, letter_complexes, considered_waqf_marks):
+    """
+    Returns the stop context of every (letter, diacritics, start_idx, end_idx) complex of text, as
+    get_letter_stop_context computes it. Only the characters after each complex end are looked at,
+    and the contexts are the shared read-only ones (see shared_stop_context).
+    """
+    text_length = len(text)
+    no_stop_context = NO_STOP_CONTEXT
+    stop_contexts = []
+    append = stop_contexts.append
+    for complex_tuple in letter_complexes:
+        end_idx = complex_tuple[3]
+        if end_idx == text_length:
+            append(END_OF_TEXT_STOP_CONTEXT)
+            continue
+        next_char = text[end_idx]
+        if next_char.isspace():
+            next_char = get_next_meaningful_char(text, end_idx + 1)
+        if next_char is not None and next_char in considered_waqf_marks:
+            append(shared_stop_context(False, next_char, considered_waqf_marks))
+        else:
+            append(no_stop_context)
+    return stop_contexts
@@ -0,0 +1,144 @@
+# tajweed_analyzer/letter_complex_table.py
+
+import array
+from . import arabic_characters as ac
+
+# --- Diacritic bitmask ---
+# Every character in ARABIC_DIACRITICS_CHARS gets one bit, assigned in code point order so masks
+# are stable across runs. A letter complex's diacritics are summarised by the OR of their bits,
+# which turns checks like `ac.SUKOON in diacritics` into `mask & SUKOON_BIT`.
+DIACRITIC_BITS = {char: 1 << bit for bit, char in enumerate(sorted(ac.ARABIC_DIACRITICS_CHARS))}
+
+def diacritics_to_mask(diacritics):
+    """Returns the bitmask of a diacritics string (or any iterable of diacritic characters)."""
+    mask = 0
+    for char in diacritics:
+        mask |= DIACRITIC_BITS.get(char, 0)
+    return mask
+
+SUKOON_BIT = DIACRITIC_BITS[ac.SUKOON]
+SHADDA_BIT = DIACRITIC_BITS[ac.SHADDA]
+VOWELS_MASK = diacritics_to_mask(ac.VOWELS)
+TANWEENS_MASK = diacritics_to_mask(ac.TANWEENS)
+VOWELS_TANWEEN_MASK = VOWELS_MASK | TANWEENS_MASK
+
+
+class LetterComplexTable:
+    """
+    Columnar storage for the letter complexes of one or more text segments.
+
+    Parallel `array` columns replace the list of (letter, diacritics_str, start_idx, end_idx) tuples:
+        letters         code point of the base letter
+        diacritic_masks OR of DIACRITIC_BITS of the letter's diacritics
+        starts, ends    char offsets of the complex within its segment text (end is exclusive)
+        word_ids        0-based index (within the segment) of the word holding the letter, counting
+                        only words that contain a letter, as text_parser.WordSpanTable does
+                        (-1 for a Waqf-mark run tokenized as a letter under custom waqf_marks)
+        segment_ids     index into `texts` of the segment the complex belongs to
+
+    The table is also a read-only sequence of the classic tuples (built on access, with the
+    diacritics sliced from the segment text), so it can be passed wherever rule functions
+    expect `all_complexes_in_segment`.
+    """
+
+    __slots__ = ("letters", "diacritic_masks", "starts", "ends", "word_ids", "segment_ids",
+                 "texts", "_segment_starts")
+
+    def __init__(self):
+        self.letters = array.array('I')
+        self.diacritic_masks = array.array('I')
+        self.starts = array.array('i')
+        self.ends = array.array('i')
+        self.word_ids = array.array('i')
+        self.segment_ids = array.array('i')
+        self.texts = []
+        self._segment_starts = array.array('i', [0])
+
+    @classmethod
+    def from_text(cls, text, waqf_marks=None):
+        """Parses a single text segment into a new table."""
+        table = cls()
+        table.append_text(text, waqf_marks)
+        return table
+
+    def append_text(self, text, waqf_marks=None):
+        """
+        Parses text with text_parser.get_letter_complexes (same waqf_marks semantics) and appends
+        its complexes as a new segment. Word ids are counted while walking the segment's word spans
+        alongside the complexes, so word_ids[i] + 1 is the word_position reported for a finding on
+        complex i.
+        Returns the segment id.
+        """
+        from . import text_parser # text_parser imports this module
+        segment_id = len(self.texts)
+        self.texts.append(text)
+        complexes = text_parser.get_letter_complexes(text, waqf_marks)
+        masks = {} # diacritics string -> mask; a text only has a handful of distinct ones
+        for _, diacritics, _, _ in complexes:
+            if diacritics not in masks:
+                masks[diacritics] = diacritics_to_mask(diacritics)
+
+        word_spans = text_parser.get_word_spans(text)
+        counts_as_word = text_parser.counts_as_word
+        word_ids = []
+        span_idx = -1
+        span_end = -1
+        word_count = 0
+        span_word_id = -1 # word position - 1 of the current span, -1 if it is not a word
+        for _, _, start_idx, _ in complexes:
+            while span_end <= start_idx:
+                span_idx += 1
+                span_start, span_end = word_spans[span_idx]
+                if counts_as_word(text[span_start:span_end]):
+                    span_word_id = word_count
+                    word_count += 1
+                else:
+                    span_word_id = -1
+            word_ids.append(span_word_id)
+
+        # Columns are extended once per segment rather than appended to per complex.
+        self.letters.extend([ord(letter) for letter, _, _, _ in complexes])
+        self.diacritic_masks.extend([masks[diacritics] for _, diacritics, _, _ in complexes])
+        self.starts.extend([start_idx for _, _, start_idx, _ in complexes])
+        self.ends.extend([end_idx for _, _, _, end_idx in complexes])
+        self.word_ids.extend(word_ids)
+        self.segment_ids.extend(array.array('i', [segment_id]) * len(complexes))
+        self._segment_starts.append(len(self.letters))
+        return segment_id
+
+    def segment_range(self, segment_id):
+        """Returns the (first, last + 1) complex positions of a segment."""
+        return self._segment_starts[segment_id], self._segment_starts[segment_id + 1]
+
+    def __len__(self):
+        return len(self.letters)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        start = self.starts[idx]
+        end = self.ends[idx]
+        text = self.texts[self.segment_ids[idx]]
+        return (text[start], text[start + 1:end], start, end)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def letter(self, idx):
+        return chr(self.letters[idx])
+
+    def diacritics(self, idx):
+        """The diacritics string of a complex, in its original order."""
+        return self.texts[self.segment_ids[idx]][self.starts[idx] + 1:self.ends[idx]]
+
+    def has_diacritic(self, idx, diacritic_mask):
+        """True if the complex carries any of the diacritics in diacritic_mask (e.g. SUKOON_BIT)."""
+        return bool(self.diacritic_masks[idx] & diacritic_mask)
+
+    def to_complexes(self, segment_id=None):
+        """Returns the classic tuple list, for the whole table or for one segment."""
+        if segment_id is None:
+            return list(self)
+        first, last = self.segment_range(segment_id)
+        return self[first:last]
@@ -1,9 +1,14 @@
 # tajweed_analyzer/main_qalqalah_finder.py
 
-import json
-import quran_processor
-import qalqalah_rules
-import arabic_characters as ac # To select specific waqf marks if needed
+import collections
+from . import corpus_loader
+from . import quran_processor
+from . import qalqalah_rules
+from . import result_writers
+from . import columnar_export
+from . import analysis_cache
+from . import persistent_cache
+from . import arabic_characters as ac # To select specific waqf marks if needed
 
 def main():
     quran_json_file = "tajweed_analyzer/quran_data/quran_nasekh.json" # Adjust path
@@ -23,37 +28,83 @@ def main():
     # Example 3: Only consider end of Ayah (no explicit Waqf marks causing stop effect for Qalqalah Kubra)
     # active_waqf_marks_for_stop = frozenset()
 
+    # To compare several of these configurations, run them all in one scan with
+    # quran_processor.process_quran_for_waqf_sweep and compare them with diff_waqf_sweep.
+
 
     # 2. The rule checking function for Qalqalah
     rule_to_apply = qalqalah_rules.check_qalqalah_for_letter_complex
 
+    # 3. Optionally stream every instance to a file as it is found ("-" for stdout).
+    #    NDJSON (one object per line) or a JSON array; memory use stays flat either way.
+    #    A .tjcol file is a columnar export for analytics (see columnar_export.ColumnarFindings).
+    output_file = None
+    # output_file = "qalqalah_found_modular.ndjson"
+    # output_file = "qalqalah_found_modular.tjcol"
+
     # --- Run the processor ---
-    qalqalah_list = quran_processor.process_quran_for_rule(
+    # use_index=True reads the precompiled corpus index (built next to the JSON on first run
+    # and rebuilt automatically when the JSON changes) instead of re-parsing the whole text.
+    # Instances are streamed: only the printed samples are kept in memory.
+    # Repeated texts (every sura's Bismillah, duplicate Ayahs) are analyzed once via result_cache.
+    # Whole-run findings are kept on disk (see persistent_cache), keyed by the corpus, the rule
+    # modules and active_waqf_marks_for_stop, so an unchanged rerun skips the analysis entirely.
+    result_cache = analysis_cache.SegmentResultCache()
+    results_store = persistent_cache.PersistentResultsCache()
+    instance_stream = (instance for _, instance in quran_processor.iter_rule_instances(
         json_file_path=quran_json_file,
-        rule_check_function=rule_to_apply,
-        considered_waqf_marks=active_waqf_marks_for_stop
-    )
+        rules={"qalqalah": rule_to_apply},
+        considered_waqf_marks=active_waqf_marks_for_stop,
+        use_index=True,
+        result_cache=result_cache,
+        persistent_cache=results_store
+    ))
+
+    sample_size = 10
+    head_sample = []
+    tail_sample = collections.deque(maxlen=sample_size)
+    instance_count = 0
+
+    def sampled(instances):
+        nonlocal instance_count
+        for instance in instances:
+            instance_count += 1
+            if len(head_sample) < 2 * sample_size:
+                head_sample.append(instance)
+            tail_sample.append(instance)
+            yield instance
+
+    try:
+        if output_file and output_file.endswith(columnar_export.COLUMNAR_FILE_EXTENSION):
+            columnar_export.write_columnar((("qalqalah", instance) for instance in sampled(instance_stream)), output_file)
+        elif output_file:
+            write = result_writers.write_ndjson if output_file.endswith(".ndjson") else result_writers.write_json_array
+            write(sampled(instance_stream), output_file)
+        else:
+            for _ in sampled(instance_stream):
+                pass
+    except corpus_loader.CorpusReadError as e:
+        print(f"Error: The corpus could not be read in full, so no results are reported ({e}).")
+        if output_file:
+            print(f"'{output_file}' only holds the findings of the part that was read.")
+        return
 
-    if qalqalah_list:
-        print(f"\nFound {len(qalqalah_list)} Qalqalah instances.")
+    if instance_count:
+        print(f"\nFound {instance_count} Qalqalah instances.")
         
         # Print a sample
-        sample_size = 10
-        if len(qalqalah_list) > 2 * sample_size:
-            for i, instance in enumerate(qalqalah_list[:sample_size]):
+        if instance_count > 2 * sample_size:
+            for instance in head_sample[:sample_size]:
                 print_instance(instance)
             print("...")
-            for i, instance in enumerate(qalqalah_list[-sample_size:]):
+            for instance in tail_sample:
                 print_instance(instance)
         else:
-            for instance in qalqalah_list:
+            for instance in head_sample:
                 print_instance(instance)
-        
-        # Optionally save to file
-        # output_file = "qalqalah_found_modular.json"
-        # with open(output_file, 'w', encoding='utf-8') as f:
-        #     json.dump(qalqalah_list, f, ensure_ascii=False, indent=2)
-        # print(f"\nSaved detailed list to {output_file}")
+
+        if output_file:
+            print(f"\nSaved detailed list to {output_file}")
 
     else:
         print("No Qalqalah instances found or an error occurred.")
@@ -65,20 +116,6 @@ def print_instance(instance):
           f"T:{instance['type']}, C:{instance['condition_details']}")
 
 if __name__ == "__main__":
-    # To run this from the parent directory of tajweed_analyzer:
+    # Run from the directory above tajweed_analyzer/ (the repository root):
     # python -m tajweed_analyzer.main_qalqalah_finder
-    # Or, if you are inside the tajweed_analyzer directory:
-    # Ensure __init__.py exists in tajweed_analyzer if running as a package.
-    # Then, from one level up: python -m tajweed_analyzer.main_qalqalah_finder
-    # If running this file directly and it's in a subdirectory, Python path issues might occur.
-    # For simplicity if running directly from its own directory, change imports from
-    # `from . import module` to `import module` and ensure parent path is in PYTHONPATH.
-    
-    # The simplest way to make imports work for this structure is often to
-    # navigate to the directory *above* `tajweed_analyzer` and run:
-    # `python -m tajweed_analyzer.main_qalqalah_finder`
-    # This requires an empty `__init__.py` file in the `tajweed_analyzer` directory.
-    
-    # Create an empty __init__.py in tajweed_analyzer/
-    # tajweed_analyzer/__init__.py (can be empty)
-    main()
\ No newline at end of file
+    main()
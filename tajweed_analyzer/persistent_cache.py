@@ -0,0 +1,249 @@
+# tajweed_analyzer/persistent_cache.py
+
+import hashlib
+import importlib
+import json
+import os
+import sys
+import zlib
+
+# On-disk cache of whole-corpus rule findings. An entry is keyed by:
+#   - the SHA-256 of the corpus file,
+#   - every rule's identity (name, module and qualified name) and its module's RULE_VERSION, if any,
+#   - the SHA-256 of the source of every rule module and of the analysis pipeline modules,
+#     so editing any of them invalidates the cache automatically,
+#   - the considered Waqf marks.
+# Entries are zlib-compressed columnar JSON: each distinct key layout of the result dicts is stored
+# once and every finding is a row of values, in the order the streaming API produced them.
+# The cache directory is trimmed to max_bytes, evicting the least recently used entries first.
+# write_compressed_json/read_compressed_json (versioned, zlib-compressed JSON files) are also the
+# file format of findings_store and incremental_analysis snapshots.
+
+CACHE_FORMAT_VERSION = 1
+CACHE_FILE_EXTENSION = ".tjres"
+CACHE_DIR_ENV_VAR = "TAJWEED_CACHE_DIR"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Modules whose code shapes every finding, whatever the rule (fully qualified, as in sys.modules):
+# corpus reading, tokenizing, stop contexts, the registered rule modules and the processor itself.
+PIPELINE_MODULE_NAMES = tuple(f"{__package__}.{name}" for name in (
+    "arabic_characters", "corpus_loader", "corpus_index", "text_parser", "letter_complex_table",
+    "letter_analyzer", "qalqalah_rules", "rule_registry", "quran_processor"))
+
+# SHA-256 of files, memoized per (path, mtime, size) for the life of the process.
+_FILE_DIGESTS = {}
+
+
+def default_cache_dir():
+    """$TAJWEED_CACHE_DIR, or ~/.cache/tajweed_analyzer/results."""
+    return os.environ.get(CACHE_DIR_ENV_VAR) or \
+        os.path.join(os.path.expanduser("~"), ".cache", "tajweed_analyzer", "results")
+
+def _hash_file(path):
+    """SHA-256 of a file, memoized in _FILE_DIGESTS."""
+    stat = os.stat(path)
+    cache_key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _FILE_DIGESTS.get(cache_key)
+    if digest is None:
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        _FILE_DIGESTS[cache_key] = digest
+    return digest
+
+def _module_source_hash(module_name):
+    module = sys.modules.get(module_name)
+    path = getattr(module, "__file__", None)
+    if not path or not os.path.exists(path):
+        return None
+    return _hash_file(path)
+
+def pipeline_fingerprint():
+    """
+    {module name: source SHA-256} of the PIPELINE_MODULE_NAMES. Findings computed under another
+    fingerprint may differ even for the same rules and corpus.
+    """
+    # Imported first: rule modules are loaded lazily and may not have been used yet.
+    return {name: _module_source_hash(importlib.import_module(name).__name__)
+            for name in PIPELINE_MODULE_NAMES}
+
+def write_compressed_json(path, payload, format_version):
+    """
+    Writes payload (a JSON-able dict), tagged with format_version, as zlib-compressed JSON.
+    The file is replaced atomically, so readers never see a partial write. Raises OSError.
+    """
+    data = zlib.compress(json.dumps({"format": format_version, **payload},
+                                    ensure_ascii=False, separators=(",", ":")).encode('utf-8'))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def read_compressed_json(path, format_version, description=None):
+    """
+    Reads a file written by write_compressed_json. Returns its payload dict, or None if the file
+    cannot be read or has another format version; with a description (e.g. "findings store"),
+    the reason is printed as an error.
+    """
+    try:
+        with open(path, 'rb') as f:
+            payload = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+    except (OSError, ValueError, zlib.error) as e:
+        if description:
+            print(f"Error: Could not read {description} '{path}': {e}")
+        return None
+    if not isinstance(payload, dict) or payload.get("format") != format_version:
+        if description:
+            print(f"Error: {description.capitalize()} '{path}' has an unsupported format.")
+        return None
+    return payload
+
+def rule_identity(rule_name, rule_check_function):
+    """
+    Returns a JSON-able identity of a rule, or None if the rule cannot be identified across runs
+    (lambdas, closures and other functions without a stable module-level name).
+    """
+    module_name = getattr(rule_check_function, "__module__", None)
+    qualname = getattr(rule_check_function, "__qualname__", None)
+    if not module_name or not qualname or "<" in qualname:
+        return None
+    source_hash = _module_source_hash(module_name)
+    if source_hash is None:
+        return None
+    return {
+        "name": rule_name,
+        "function": f"{module_name}.{qualname}",
+        "version": getattr(sys.modules[module_name], "RULE_VERSION", None),
+        "source_sha256": source_hash,
+    }
+
+
+def pack_rule_instances(rule_instance_pairs):
+    """
+    Columnar, JSON-able form of (rule_name, instance) pairs: rule names and result dict key layouts
+    are stored once, and every instance becomes a [rule_pos, layout_pos, *values] row.
+    """
+    rule_names = []
+    rule_positions = {}
+    layouts = []
+    layout_positions = {}
+    rows = []
+    for rule_name, instance in rule_instance_pairs:
+        rule_pos = rule_positions.get(rule_name)
+        if rule_pos is None:
+            rule_pos = rule_positions[rule_name] = len(rule_names)
+            rule_names.append(rule_name)
+        layout = tuple(instance)
+        layout_pos = layout_positions.get(layout)
+        if layout_pos is None:
+            layout_pos = layout_positions[layout] = len(layouts)
+            layouts.append(layout)
+        rows.append([rule_pos, layout_pos, *instance.values()])
+    return {"rules": rule_names, "layouts": layouts, "rows": rows}
+
+def unpack_rule_instances(packed):
+    """Inverse of pack_rule_instances: returns the [(rule_name, instance), ...] pairs."""
+    rule_names = packed["rules"]
+    layouts = packed["layouts"]
+    return [(rule_names[row[0]], dict(zip(layouts[row[1]], row[2:]))) for row in packed["rows"]]
+
+
+class PersistentResultsCache:
+    """Directory of cached corpus findings; see the module notes for keys, format and eviction."""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def make_key(self, json_file_path, rules, considered_waqf_marks, variant=None):
+        """
+        Cache key for running rules ({rule_name: function}) over a corpus, or None if the run
+        cannot be cached (missing corpus file or a rule without a stable identity).
+        variant distinguishes runs whose output shape differs for the same inputs.
+        """
+        try:
+            corpus_hash = _hash_file(json_file_path)
+        except OSError:
+            return None
+        identities = []
+        for rule_name, rule_check_function in rules.items():
+            identity = rule_identity(rule_name, rule_check_function)
+            if identity is None:
+                return None
+            identities.append(identity)
+        key_material = {
+            "format": CACHE_FORMAT_VERSION,
+            "corpus_sha256": corpus_hash,
+            "rules": identities,
+            "pipeline": pipeline_fingerprint(),
+            "waqf_marks": sorted(ord(mark) for mark in considered_waqf_marks),
+            "variant": variant,
+        }
+        return hashlib.sha256(json.dumps(key_material, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_FILE_EXTENSION)
+
+    def load(self, key):
+        """
+        Returns the cached [(rule_name, instance), ...] stream for key, or None on a miss.
+        A hit refreshes the entry's modification time, which drives LRU eviction.
+        """
+        path = self._entry_path(key)
+        payload = read_compressed_json(path, CACHE_FORMAT_VERSION)
+        if payload is None:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return unpack_rule_instances(payload)
+
+    def store(self, key, rule_instance_pairs):
+        """Writes the (rule_name, instance) stream under key, then trims the cache to max_bytes."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            write_compressed_json(self._entry_path(key), pack_rule_instances(rule_instance_pairs),
+                                  CACHE_FORMAT_VERSION)
+        except OSError as e:
+            print(f"Warning: Could not write results cache entry in '{self.cache_dir}': {e}")
+            return
+        self.evict()
+
+    def entries(self):
+        """Returns [(path, size, mtime)] of the cache entries, least recently used first."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return []
+        found = []
+        for name in names:
+            if not name.endswith(CACHE_FILE_EXTENSION):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            found.append((path, stat.st_size, stat.st_mtime))
+        found.sort(key=lambda entry: entry[2])
+        return found
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,217 @@
+# tajweed_analyzer/profiling.py
+
+import collections
+import contextlib
+import heapq
+import json
+import time
+
+# Opt-in instrumentation for quran_processor. While a PipelineProfiler is active (see
+# profile_pipeline), the processor records per-stage wall time, per-rule call/hit counts and the
+# slowest segments. When no profiler is active the processor only checks ACTIVE_PROFILER once per
+# segment, so the uninstrumented path costs nothing measurable. While one is active,
+# quran_processor.analyze_text_for_rules reports each segment through a SegmentTimer, the timing
+# hooks of its analysis loop.
+#
+#   with profiling.profile_pipeline() as profiler:
+#       quran_processor.process_quran_for_rule(path, rule)
+#   print(profiler.format_summary())
+#   profiler.write_chrome_trace("trace.json") # open in chrome://tracing or Perfetto
+#
+# Only the serial path is instrumented; worker processes of the parallel mode are not.
+
+STAGE_LOAD = "load"
+STAGE_PARSE = "parse"
+STAGE_STOP_CONTEXT = "stop_context"
+STAGE_RULE_CALL = "rule_call"
+STAGE_WORD_LOOKUP = "word_lookup"
+STAGE_RESULT_CONSTRUCTION = "result_construction"
+
+STAGES = (STAGE_LOAD, STAGE_PARSE, STAGE_STOP_CONTEXT, STAGE_RULE_CALL,
+          STAGE_WORD_LOOKUP, STAGE_RESULT_CONSTRUCTION)
+
+# Stages charged within one segment (STAGE_LOAD is charged per corpus read).
+SEGMENT_STAGES = (STAGE_PARSE, STAGE_STOP_CONTEXT, STAGE_RULE_CALL, STAGE_WORD_LOOKUP, STAGE_RESULT_CONSTRUCTION)
+
+DEFAULT_SLOWEST_SEGMENTS = 10
+
+# The profiler the processor reports to, or None when instrumentation is off.
+ACTIVE_PROFILER = None
+
+
+class PipelineProfiler:
+    """
+    Collects timings and counters from quran_processor.
+
+    Args:
+        slowest_segments: How many of the slowest segments to keep.
+        trace: Also keep per-segment events for write_chrome_trace.
+        on_segment: Optional callback, called with a dict (sura, aya, source_type, letters,
+                    seconds, stages) after each analyzed segment.
+    """
+
+    def __init__(self, slowest_segments=DEFAULT_SLOWEST_SEGMENTS, trace=False, on_segment=None):
+        self.stage_seconds = collections.defaultdict(float)
+        self.rule_calls = collections.Counter()
+        self.rule_hits = collections.Counter()
+        self.rule_seconds = collections.defaultdict(float)
+        self.segment_count = 0
+        self.letter_count = 0
+        self.slowest_segments_limit = slowest_segments
+        self._slowest = [] # min-heap of (seconds, sequence, segment record)
+        self.trace = trace
+        self.trace_events = []
+        self.on_segment = on_segment
+        self._origin = time.perf_counter()
+
+    def add_stage(self, stage, seconds):
+        self.stage_seconds[stage] += seconds
+
+    def add_rule(self, rule_name, calls, hits, seconds):
+        self.rule_calls[rule_name] += calls
+        self.rule_hits[rule_name] += hits
+        self.rule_seconds[rule_name] += seconds
+
+    def record_segment(self, sura_idx, aya_idx, source_type, letters, started_at, seconds, stages):
+        """Records one analyzed segment; started_at is its time.perf_counter() start."""
+        self.segment_count += 1
+        self.letter_count += letters
+        record = {"sura": sura_idx, "aya": aya_idx, "source_type": source_type,
+                  "letters": letters, "seconds": seconds, "stages": stages}
+        entry = (seconds, self.segment_count, record)
+        if len(self._slowest) < self.slowest_segments_limit:
+            heapq.heappush(self._slowest, entry)
+        elif self.slowest_segments_limit:
+            heapq.heappushpop(self._slowest, entry)
+        if self.trace:
+            self.trace_events.append({
+                "name": f"S{sura_idx}:A{aya_idx} ({source_type})", "cat": "segment", "ph": "X",
+                "ts": (started_at - self._origin) * 1e6, "dur": seconds * 1e6,
+                "pid": 0, "tid": 0, "args": {"letters": letters, **stages},
+            })
+        if self.on_segment is not None:
+            self.on_segment(record)
+
+    def slowest_segments(self):
+        """The recorded slowest segments, slowest first."""
+        return [record for _, _, record in sorted(self._slowest, reverse=True)]
+
+    def summary(self):
+        """Returns the collected data as a JSON-able dict."""
+        return {
+            "segments": self.segment_count,
+            "letters": self.letter_count,
+            "stage_seconds": {stage: self.stage_seconds.get(stage, 0.0) for stage in STAGES},
+            "rules": {
+                rule_name: {"calls": self.rule_calls[rule_name], "hits": self.rule_hits[rule_name],
+                            "seconds": self.rule_seconds[rule_name]}
+                for rule_name in self.rule_calls
+            },
+            "slowest_segments": self.slowest_segments(),
+        }
+
+    def format_summary(self):
+        """Human-readable report of the summary."""
+        summary = self.summary()
+        total = sum(summary["stage_seconds"].values()) or 1.0
+        lines = [f"Profiled {summary['segments']} segments, {summary['letters']} letters.",
+                 f"{'stage':<22}{'seconds':>10}{'share':>8}"]
+        for stage, seconds in summary["stage_seconds"].items():
+            lines.append(f"{stage:<22}{seconds:>10.4f}{seconds / total:>8.1%}")
+        lines.append(f"{'rule':<22}{'calls':>10}{'hits':>8}{'seconds':>10}")
+        for rule_name, rule_stats in summary["rules"].items():
+            lines.append(f"{rule_name:<22}{rule_stats['calls']:>10}{rule_stats['hits']:>8}{rule_stats['seconds']:>10.4f}")
+        lines.append("Slowest segments:")
+        for record in summary["slowest_segments"]:
+            lines.append(f"  S{record['sura']}:A{record['aya']} ({record['source_type']}) "
+                         f"{record['letters']} letters, {record['seconds'] * 1000:.3f} ms")
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+    def write_chrome_trace(self, path):
+        """Writes the per-segment events (requires trace=True) in the Chrome trace event format."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+
+class SegmentTimer:
+    """
+    Timing hooks for one segment of the analysis loop. charge(stage) adds the time since the
+    previous charge (or since the timer was created) to stage; timed_rules wraps the rule
+    functions so that their calls are timed and counted without touching the loop itself.
+    finish reports the segment to the profiler.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.started_at = self.mark = time.perf_counter()
+        self.stages = dict.fromkeys(SEGMENT_STAGES, 0.0)
+        self.rule_stats = {} # rule_name -> [hits, seconds]
+
+    def charge(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] += now - self.mark
+        self.mark = now
+
+    def timed_rules(self, rule_items):
+        """Returns (rule_name, timed rule function) pairs for (rule_name, rule function) pairs."""
+        return [(rule_name, self._timed_rule(rule_name, rule_check_function))
+                for rule_name, rule_check_function in rule_items]
+
+    def _timed_rule(self, rule_name, rule_check_function):
+        clock = time.perf_counter
+        stages = self.stages
+        rule_stats = self.rule_stats[rule_name] = [0, 0.0]
+        def timed_rule_check(*args):
+            started = clock()
+            rule_finding = rule_check_function(*args)
+            self.mark = finished = clock()
+            stages[STAGE_RULE_CALL] += finished - started
+            rule_stats[1] += finished - started
+            if rule_finding:
+                rule_stats[0] += 1
+            return rule_finding
+        return timed_rule_check
+
+    def finish(self, sura_idx, aya_idx, source_type, letters):
+        profiler = self.profiler
+        for stage, seconds in self.stages.items():
+            profiler.add_stage(stage, seconds)
+        for rule_name, (hits, seconds) in self.rule_stats.items():
+            profiler.add_rule(rule_name, letters, hits, seconds)
+        profiler.record_segment(sura_idx, aya_idx, source_type, letters,
+                                self.started_at, time.perf_counter() - self.started_at, self.stages)
+
+
+@contextlib.contextmanager
+def profile_pipeline(profiler=None, **profiler_kwargs):
+    """
+    Activates a PipelineProfiler (a new one built from profiler_kwargs if none is given) for the
+    duration of the block and yields it. Profilers can be nested; the previous one is restored.
+    """
+    global ACTIVE_PROFILER
+    if profiler is None:
+        profiler = PipelineProfiler(**profiler_kwargs)
+    previous = ACTIVE_PROFILER
+    ACTIVE_PROFILER = profiler
+    try:
+        yield profiler
+    finally:
+        ACTIVE_PROFILER = previous
+
+def timed_iter(iterable, stage, profiler):
+    """Yields from iterable, charging the time spent producing each item to stage."""
+    iterator = iter(iterable)
+    clock = time.perf_counter
+    while True:
+        started = clock()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            profiler.add_stage(stage, clock() - started)
+            return
+        profiler.add_stage(stage, clock() - started)
+        yield item
@@ -1,13 +1,22 @@
 # tajweed_analyzer/qalqalah_rules.py
 
-import arabic_characters as ac
-# from . import letter_analyzer as la # Not strictly needed here if stop_context is passed in
+from . import arabic_characters as ac
+from . import letter_complex_table as lct
+from . import letter_analyzer as la # Only needed by the batched classifier, which computes its own stop contexts
 
 # Qalqalah Types
 QALQALAH_SUGHRA = "Sughra (Minor)"
 QALQALAH_KUBRA = "Kubra (Major)"
 QALQALAH_AKBAR = "Akbar/Kubra (Greatest/Major)" # Or just "Akbar"
 
+# The Qalqalah letter test goes through the letter class table (arabic_characters.CHAR_CLASSES,
+# and CODE_POINT_CLASSES for table columns). The tables are looked up on use, so importing this
+# module does not build them; after the first use they are plain module attributes.
+_CLASS_QALQALAH = ac.CLASS_QALQALAH
+_SUKOON = ac.SUKOON
+_SHADDA = ac.SHADDA
+_VOWELS_TANWEEN = ac.VOWELS_TANWEEN
+
 def check_qalqalah_for_letter_complex(letter_complex, stop_context, 
                                       all_complexes_in_segment=None, current_complex_idx=None): # Added extra args
     """
@@ -26,49 +35,167 @@ def check_qalqalah_for_letter_complex(letter_complex, stop_context,
     """
     letter, diacritics, _, _ = letter_complex
     
-    if letter not in ac.QALQALAH_LETTERS:
+    if not ac.CHAR_CLASSES.get(letter, 0) & _CLASS_QALQALAH:
+        return None
+
+    # Same decisions as _classify_qalqalah, kept inline and short-circuiting for the per-letter path.
+    is_at_designated_stop = stop_context.get("is_stop", False)
+
+    # Rule 1: Letter has an explicit Sukoon (ْ)
+    if _SUKOON in diacritics:
+        if is_at_designated_stop:
+            return _render_qalqalah_finding(letter, diacritics, stop_context, QALQALAH_KUBRA, _DETAILS_SUKOON_AT_STOP)
+        return _render_qalqalah_finding(letter, diacritics, stop_context, QALQALAH_SUGHRA, _DETAILS_SUKOON_MID_SPEECH)
+
+    # Rule 2: Letter is at a Designated Stop and becomes Saakin
+    if not is_at_designated_stop:
         return None
+    if not diacritics:
+        return _render_qalqalah_finding(letter, diacritics, stop_context, QALQALAH_KUBRA, _DETAILS_STOP_ON_VOWEL_OR_PLAIN)
+    if _SHADDA in diacritics:
+        return _render_qalqalah_finding(letter, diacritics, stop_context, QALQALAH_AKBAR, _DETAILS_SHADDA_AT_STOP)
+    for d in diacritics:
+        if d in _VOWELS_TANWEEN:
+            return _render_qalqalah_finding(letter, diacritics, stop_context, QALQALAH_KUBRA, _DETAILS_STOP_ON_VOWEL_OR_PLAIN)
+    return None
 
-    is_qalqalah = False
-    qalqalah_type = ""
+def check_qalqalah_for_table_entry(table, complex_idx, stop_context):
+    """
+    Same as check_qalqalah_for_letter_complex, for entry complex_idx of a
+    letter_complex_table.LetterComplexTable. Diacritic checks are bit tests on the
+    complex's diacritic mask instead of string membership tests.
+    """
+    letter_code = table.letters[complex_idx]
+    if not ac.CODE_POINT_CLASSES.get(letter_code, 0) & _CLASS_QALQALAH:
+        return None
+
+    mask = table.diacritic_masks[complex_idx]
+    return _build_qalqalah_finding(
+        chr(letter_code), table.diacritics(complex_idx), stop_context,
+        has_sukoon=bool(mask & lct.SUKOON_BIT),
+        has_shadda=bool(mask & lct.SHADDA_BIT),
+        has_vowel_or_tanween=bool(mask & lct.VOWELS_TANWEEN_MASK)
+    )
+
+def _build_qalqalah_finding(letter, diacritics, stop_context,
+                            has_sukoon, has_shadda, has_vowel_or_tanween):
+    """Shared Qalqalah check for a Qalqalah letter, given its diacritic flags."""
+    classification = _classify_qalqalah(
+        has_sukoon, has_shadda, has_vowel_or_tanween,
+        has_diacritics=bool(diacritics),
+        is_at_designated_stop=stop_context.get("is_stop", False)
+    )
+    if classification is None:
+        return None
+    return _render_qalqalah_finding(letter, diacritics, stop_context, *classification)
+
+# Condition suffixes appended to the stop context details, one per Qalqalah case.
+_DETAILS_SUKOON_AT_STOP = " Explicit Sukoon at Stop."
+_DETAILS_SUKOON_MID_SPEECH = " Explicit Sukoon mid-speech."
+_DETAILS_STOP_ON_VOWEL_OR_PLAIN = " Stop on voweled/plain letter."
+_DETAILS_SHADDA_AT_STOP = " Shadda at Stop."
+
+def _classify_qalqalah(has_sukoon, has_shadda, has_vowel_or_tanween, has_diacritics, is_at_designated_stop):
+    """
+    Decides the Qalqalah type of a Qalqalah letter.
+    Returns (qalqalah_type, condition_suffix), or None if the letter has no Qalqalah.
+    """
+    # Rule 1: Letter has an explicit Sukoon (ْ)
+    if has_sukoon:
+        if is_at_designated_stop:
+            return QALQALAH_KUBRA, _DETAILS_SUKOON_AT_STOP
+        return QALQALAH_SUGHRA, _DETAILS_SUKOON_MID_SPEECH
+
+    # Rule 2: Letter is at a Designated Stop and becomes Saakin
+    if is_at_designated_stop:
+        has_vowel_or_plain = not has_diacritics or \
+                             has_vowel_or_tanween and not has_shadda
+
+        if has_vowel_or_plain:
+            return QALQALAH_KUBRA, _DETAILS_STOP_ON_VOWEL_OR_PLAIN
+        if has_shadda:
+            return QALQALAH_AKBAR, _DETAILS_SHADDA_AT_STOP
+    return None
+
+def _render_qalqalah_finding(letter, diacritics, stop_context, qalqalah_type, condition_suffix):
+    """Builds the finding dict returned by the Qalqalah checks."""
     # Ensure condition_details starts fresh or correctly incorporates stop_context.details
     condition_details = stop_context.get("details", "").strip() 
     if condition_details and not condition_details.endswith("."): # Add a period if needed for better formatting
         condition_details += "."
+    condition_details += condition_suffix
 
+    return {
+        "type": qalqalah_type,
+        "condition_details": condition_details.strip(),
+        "qalqalah_letter": letter,
+        "full_letter_complex": letter + diacritics
+    }
 
-    is_at_designated_stop = stop_context.get("is_stop", False)
 
-    # Rule 1: Letter has an explicit Sukoon (ْ)
-    if ac.SUKOON in diacritics:
-        is_qalqalah = True
-        if is_at_designated_stop:
-            qalqalah_type = QALQALAH_KUBRA
-            condition_details += " Explicit Sukoon at Stop."
+# --- Batched Qalqalah classification ---
+
+def classify_qalqalah_table(table, considered_waqf_marks, stop_contexts=None):
+    """
+    Classifies every complex of a LetterComplexTable (one segment or a whole corpus) in one pass.
+
+    The table columns are reduced with masks: first the Qalqalah-letter mask selects the few
+    candidate complexes, then the sukoon/shadda/vowel bits and the stop flag decide the type.
+    Stop contexts are only computed for candidates.
+
+    Args:
+        table: letter_complex_table.LetterComplexTable.
+        considered_waqf_marks: A frozenset of Waqf mark characters to consider for stops.
+        stop_contexts (list, optional): Precomputed stop context per table entry.
+
+    Returns:
+        list: (complex_idx, qalqalah_type, condition_suffix, stop_context) for each Qalqalah hit,
+              in table order. Pass to materialize_qalqalah_findings for the detail dicts.
+    """
+    code_point_classes = ac.CODE_POINT_CLASSES
+    qalqalah_bit = _CLASS_QALQALAH
+    candidates = [idx for idx, code in enumerate(table.letters) if code_point_classes.get(code, 0) & qalqalah_bit]
+    if not candidates:
+        return []
+
+    masks = table.diacritic_masks
+    ends = table.ends
+    segment_ids = table.segment_ids
+    texts = table.texts
+    sukoon_bit = lct.SUKOON_BIT
+    shadda_bit = lct.SHADDA_BIT
+    vowels_tanween_mask = lct.VOWELS_TANWEEN_MASK
+
+    hits = []
+    for idx in candidates:
+        if stop_contexts is not None:
+            stop_context = stop_contexts[idx]
         else:
-            qalqalah_type = QALQALAH_SUGHRA
-            condition_details += " Explicit Sukoon mid-speech."
-    
-    # Rule 2: Letter is at a Designated Stop and becomes Saakin
-    elif is_at_designated_stop:
-        has_vowel_or_plain = not diacritics or \
-                             any(d in ac.VOWELS_TANWEEN for d in diacritics) and ac.SHADDA not in diacritics
+            stop_context = la.stop_context_at(texts[segment_ids[idx]], ends[idx], considered_waqf_marks)
+        is_at_designated_stop = stop_context["is_stop"]
+        mask = masks[idx]
+        # Mid-speech letters without sukoon never have Qalqalah; skip them before classifying.
+        if not is_at_designated_stop and not mask & sukoon_bit:
+            continue
+        classification = _classify_qalqalah(
+            bool(mask & sukoon_bit), bool(mask & shadda_bit), bool(mask & vowels_tanween_mask),
+            has_diacritics=bool(mask), is_at_designated_stop=is_at_designated_stop
+        )
+        if classification is not None:
+            hits.append((idx, classification[0], classification[1], stop_context))
+    return hits
 
-        if has_vowel_or_plain:
-            is_qalqalah = True
-            qalqalah_type = QALQALAH_KUBRA
-            condition_details += " Stop on voweled/plain letter."
-        
-        elif ac.SHADDA in diacritics: 
-            is_qalqalah = True
-            qalqalah_type = QALQALAH_AKBAR
-            condition_details += " Shadda at Stop."
-
-    if is_qalqalah:
-        return {
-            "type": qalqalah_type,
-            "condition_details": condition_details.strip(),
-            "qalqalah_letter": letter,
-            "full_letter_complex": letter + diacritics
-        }
-    return None
\ No newline at end of file
+def materialize_qalqalah_findings(table, hits):
+    """
+    Turns classify_qalqalah_table hits into (complex_idx, finding) pairs, where each finding is
+    exactly the dict check_qalqalah_for_letter_complex returns for that complex.
+    """
+    return [
+        (idx, _render_qalqalah_finding(table.letter(idx), table.diacritics(idx), stop_context,
+                                       qalqalah_type, condition_suffix))
+        for idx, qalqalah_type, condition_suffix, stop_context in hits
+    ]
+
+def find_qalqalah_in_table(table, considered_waqf_marks, stop_contexts=None):
+    """Batched equivalent of running check_qalqalah_for_letter_complex over every table entry."""
+    return materialize_qalqalah_findings(table, classify_qalqalah_table(table, considered_waqf_marks, stop_contexts))
@@ -0,0 +1,384 @@
+# tajweed_analyzer/qalqalah_service.py
+
+import argparse
+import asyncio
+import collections
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from . import letter_analyzer
+from . import quran_processor
+from . import rule_registry
+from . import corpus_index
+
+# Local HTTP/JSON service for on-demand analysis, e.g. for a recitation-feedback app.
+#
+#   POST /analyze  {"text": "<vocalized Arabic>"}                       ad-hoc text
+#                  {"sura": 2, "aya": 5, "source_type": "text"}          a corpus segment
+#       optional:  "rules": ["qalqalah"], "waqf_marks": ["ۘ", ...] (default DEFAULT_STOP_WAQF_MARKS)
+#       returns    {"findings": {rule_name: [result dicts]}, ...}
+#   GET  /stats    request counts, batch sizes and latency percentiles
+#   GET  /health
+#
+# The corpus index and the segment lookup table are loaded once at startup and kept in memory.
+# Requests arriving within BATCH_WINDOW_SECONDS of each other are grouped into one batch (up to
+# MAX_BATCH_SIZE) and analyzed by a single call in a worker process, so concurrent clients share
+# the cost of a task round-trip and the workers' warm tokenization caches.
+# Workers are started (from a forkserver, or spawned where that is unavailable, so they never
+# inherit the server's sockets) before the listening socket is opened.
+#
+# Usage (from the repository root):
+#   python -m tajweed_analyzer.qalqalah_service --corpus tajweed_analyzer/quran_data/quran_nasekh.json --port 8765
+
+DEFAULT_CORPUS_PATH = "tajweed_analyzer/quran_data/quran_nasekh.json"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+MAX_BATCH_SIZE = 64
+BATCH_WINDOW_SECONDS = 0.005
+MAX_BODY_BYTES = 1 << 20
+LATENCY_WINDOW = 10000 # most recent requests kept for the percentiles
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+DEFAULT_SERVICE_RULES = (rule_registry.RULE_QALQALAH,)
+
+_HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ServiceError(Exception):
+    """A client error, reported with its HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _analyze_batch(batch):
+    """
+    Worker entry point: analyzes a batch of (sura_idx, aya_idx, source_type, text, waqf_marks,
+    rule_names) requests. Returns one {rule_name: [instances]} dict per request, or an
+    (http_status, error message) tuple for a request that failed; other requests are unaffected.
+    """
+    results = []
+    for sura_idx, aya_idx, source_type, text, waqf_marks, rule_names in batch:
+        try:
+            rules = rule_registry.resolve_rules(list(rule_names))
+        except KeyError as e:
+            results.append((400, str(e.args[0])))
+            continue
+        try:
+            results.append(quran_processor.analyze_text_for_rules(
+                sura_idx, aya_idx, text, source_type, rules, waqf_marks))
+        except Exception as e:
+            results.append((500, f"{type(e).__name__}: {e}"))
+    return results
+
+def _warm_worker():
+    """Worker initializer: resolves the rule registry once, before the first request arrives."""
+    rule_registry.resolve_rules()
+
+def _worker_pid():
+    return os.getpid()
+
+def _worker_context():
+    """Start method of the worker processes: forkserver where available, else spawn (never fork)."""
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(start_method)
+
+_SOURCE_TYPES = (quran_processor.SOURCE_TYPE_TEXT, quran_processor.SOURCE_TYPE_BISMILLAH)
+
+def _check_string_list(value, key):
+    """Returns value if it is a list of strings, else raises a 400 ServiceError naming key."""
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ServiceError(400, f"\"{key}\" must be a list of strings.")
+    return value
+
+
+class LatencyTracker:
+    """Keeps the most recent request latencies and reports percentiles (nearest rank)."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = collections.deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentiles(self, percentiles=LATENCY_PERCENTILES):
+        if not self.samples:
+            return {f"p{p}": None for p in percentiles}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {f"p{p}": ordered[min(last, max(0, -(-p * len(ordered) // 100) - 1))] * 1000 for p in percentiles}
+
+
+class QalqalahService:
+    """
+    The service state: corpus lookup table, request queue, batcher task and worker pool.
+
+    Args:
+        json_file_path: Corpus used to resolve (sura, aya) references; its index is built if needed.
+        workers: Worker processes for the analysis; 0 analyzes in a thread of this process.
+        max_batch_size, batch_window: Micro-batching limits (requests, seconds).
+    """
+
+    def __init__(self, json_file_path=DEFAULT_CORPUS_PATH, workers=DEFAULT_WORKERS,
+                 max_batch_size=MAX_BATCH_SIZE, batch_window=BATCH_WINDOW_SECONDS):
+        self.json_file_path = json_file_path
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.index = None
+        self.segment_lookup = {} # (sura_idx, aya_idx, source_type) -> segment index or text
+        self.executor = None
+        self.queue = None
+        self.latency = LatencyTracker()
+        self.batch_count = 0
+        self.batched_requests = 0
+        self.error_count = 0
+        self._batcher_task = None
+        self._batch_tasks = set() # running _run_batch tasks, referenced until they finish
+
+    def load_corpus(self):
+        """Opens the corpus index (falling back to the parsed JSON) and builds the segment lookup."""
+        self.index = corpus_index.load_corpus_index(self.json_file_path)
+        if self.index is not None:
+            for segment_idx in range(len(self.index)):
+                sura_idx, aya_idx, source_type, _ = self.index.segment(segment_idx)
+                self.segment_lookup[(sura_idx, aya_idx, source_type)] = segment_idx
+            return
+        segments = quran_processor.load_quran_segments(self.json_file_path)
+        if segments is None:
+            print("Warning: No corpus loaded; only ad-hoc text requests can be served.")
+            return
+        for sura_idx, aya_idx, source_type, text in segments:
+            self.segment_lookup[(sura_idx, aya_idx, source_type)] = text
+
+    def segment_text(self, sura_idx, aya_idx, source_type):
+        entry = self.segment_lookup.get((sura_idx, aya_idx, source_type))
+        if entry is None:
+            raise ServiceError(404, f"No {source_type} segment for sura {sura_idx}, aya {aya_idx}.")
+        return self.index.segment_text(entry) if isinstance(entry, int) else entry
+
+    async def start(self):
+        """Loads the corpus and starts the worker processes; call before opening the server socket."""
+        self.load_corpus()
+        if self.workers:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_worker_context(),
+                                                initializer=_warm_worker)
+            # The pool starts its processes lazily; one task per worker starts them all now.
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self.executor, _worker_pid)
+                                   for _ in range(self.workers)))
+        self.queue = asyncio.Queue()
+        self._batcher_task = asyncio.create_task(self._batcher())
+
+    async def stop(self):
+        if self._batcher_task is not None:
+            self._batcher_task.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.index is not None:
+            self.index.close()
+
+    async def _batcher(self):
+        """Collects queued requests into batches and hands each batch to the worker pool."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batch_count += 1
+            self.batched_requests += len(batch)
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, _analyze_batch, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def analyze(self, request):
+        """Validates an /analyze request body, queues it and returns the response dict."""
+        if not isinstance(request, dict):
+            raise ServiceError(400, "Request body must be a JSON object.")
+        rule_names = request.get("rules")
+        if rule_names is None:
+            rule_names = DEFAULT_SERVICE_RULES
+        elif isinstance(rule_names, str):
+            rule_names = [rule_names]
+        else:
+            _check_string_list(rule_names, "rules")
+        waqf_marks = request.get("waqf_marks")
+        if waqf_marks is not None:
+            _check_string_list(waqf_marks, "waqf_marks")
+        waqf_marks = letter_analyzer.normalize_waqf_marks(waqf_marks)
+
+        text = request.get("text")
+        sura_idx = request.get("sura", 0)
+        aya_idx = request.get("aya", 0)
+        source_type = request.get("source_type", quran_processor.SOURCE_TYPE_TEXT)
+        if source_type not in _SOURCE_TYPES:
+            raise ServiceError(400, f"\"source_type\" must be one of {', '.join(_SOURCE_TYPES)}.")
+        if text is None:
+            if not isinstance(sura_idx, int) or not isinstance(aya_idx, int) or not sura_idx:
+                raise ServiceError(400, "Provide either \"text\" or integer \"sura\" and \"aya\".")
+            text = self.segment_text(sura_idx, aya_idx, source_type)
+        elif not isinstance(text, str):
+            raise ServiceError(400, "\"text\" must be a string.")
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(((sura_idx, aya_idx, source_type, text, waqf_marks, tuple(rule_names)), future))
+        result = await future
+        if isinstance(result, tuple):
+            raise ServiceError(*result)
+        return {"sura": sura_idx, "aya": aya_idx, "source_type": source_type, "text": text, "findings": result}
+
+    def stats(self):
+        return {
+            "requests": self.latency.count,
+            "errors": self.error_count,
+            "batches": self.batch_count,
+            "mean_batch_size": self.batched_requests / self.batch_count if self.batch_count else None,
+            "latency_ms": self.latency.percentiles(),
+            "corpus_segments": len(self.segment_lookup),
+            "rules": sorted(rule_registry.rule_names()),
+        }
+
+    async def handle_connection(self, reader, writer):
+        """Serves HTTP/1.1 requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                started = time.perf_counter()
+                keep_alive = await self._handle_request(request_line, reader, writer)
+                self.latency.record(time.perf_counter() - started)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line, reader, writer):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close"
+
+        try:
+            method, path, _ = request_line.decode('latin-1').split(" ", 2)
+        except ValueError:
+            self._respond(writer, 400, {"error": "Malformed request line."}, False)
+            return False
+
+        try:
+            body = b""
+            try:
+                content_length = int(headers.get("content-length") or 0)
+            except ValueError:
+                content_length = -1
+            if content_length < 0:
+                keep_alive = False # the body cannot be delimited, so the connection cannot be reused
+                raise ServiceError(400, "Content-Length must be a non-negative integer.")
+            if content_length > MAX_BODY_BYTES:
+                keep_alive = False # the body is not read
+                raise ServiceError(413, f"Request body exceeds {MAX_BODY_BYTES} bytes.")
+            if content_length:
+                body = await reader.readexactly(content_length)
+
+            if path == "/analyze":
+                if method != "POST":
+                    raise ServiceError(405, "Use POST for /analyze.")
+                try:
+                    request = json.loads(body.decode('utf-8'))
+                except ValueError as e:
+                    raise ServiceError(400, f"Invalid JSON body: {e}")
+                status, payload = 200, await self.analyze(request)
+            elif path == "/stats":
+                status, payload = 200, self.stats()
+            elif path == "/health":
+                status, payload = 200, {"status": "ok"}
+            else:
+                raise ServiceError(404, f"Unknown path '{path}'.")
+        except ServiceError as e:
+            self.error_count += 1
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            self.error_count += 1
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        self._respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    @staticmethod
+    def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {_HTTP_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+
+
+async def serve(json_file_path=DEFAULT_CORPUS_PATH, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                workers=DEFAULT_WORKERS, max_batch_size=MAX_BATCH_SIZE, batch_window=BATCH_WINDOW_SECONDS):
+    """Runs the service until cancelled."""
+    service = QalqalahService(json_file_path, workers, max_batch_size, batch_window)
+    await service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Serving Qalqalah analysis on http://{host}:{port} "
+          f"({len(service.segment_lookup)} corpus segments, {workers or 'no'} worker processes)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Qalqalah analysis over HTTP/JSON.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_PATH, help="Quran JSON used for (sura, aya) lookups.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Worker processes (0 analyzes in a thread of the server process).")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--batch-window-ms", type=float, default=BATCH_WINDOW_SECONDS * 1000)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.corpus, args.host, args.port, args.workers,
+                          args.batch_size, args.batch_window_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,27 @@
 # tajweed_analyzer/quran_processor.py
 
-import json
-import text_parser
-import letter_analyzer
-import arabic_characters as ac # For default waqf marks
+import itertools
+from . import text_parser
+from . import letter_analyzer
+from . import rule_registry
+from . import corpus_index
+from . import corpus_loader
+from . import corpus_offsets
+from . import profiling
+from . import analysis_cache
+from . import result_records
+from .letter_complex_table import LetterComplexTable
+
+SOURCE_TYPE_TEXT = corpus_loader.SOURCE_TYPE_TEXT
+SOURCE_TYPE_BISMILLAH = corpus_loader.SOURCE_TYPE_BISMILLAH
+
+# Key used when a single rule function is run through the multi-rule engine.
+_SINGLE_RULE_KEY = "rule"
 
 def analyze_text_for_rule(sura_idx, aya_idx, text_content, source_type,
                           rule_check_function, considered_waqf_marks,
-                          base_char_offset=0, all_complexes_for_context=None, current_complex_index=None):
+                          base_char_offset=0, all_complexes_for_context=None, current_complex_index=None,
+                          result_cache=None):
     """
     Analyzes a text string (Ayah or Bismillah) for instances of a specific Tajweed rule.
 
@@ -21,172 +35,640 @@ def analyze_text_for_rule(sura_idx, aya_idx, text_content, source_type,
         considered_waqf_marks: A frozenset of Waqf mark characters to consider for stops.
         base_char_offset: Offset for character indexing if text is part of a larger string.
         all_complexes_for_context (list, optional): Pre-parsed list of all letter complexes in text_content.
-                                                    Useful for rules needing broader context (like next/prev letter).
-        current_complex_index (int, optional): Index of the current_complex within all_complexes_for_context.
+                                                    If omitted, text_content is parsed here.
+        current_complex_index (int, optional): Kept for backwards compatibility; not used.
+        result_cache (analysis_cache.SegmentResultCache, optional): Memo cache for repeated texts.
 
     Returns:
         list: A list of dictionaries, each representing a found rule instance.
     """
-    results = []
+    results_by_rule = analyze_text_for_rules(
+        sura_idx, aya_idx, text_content, source_type,
+        {_SINGLE_RULE_KEY: rule_check_function}, considered_waqf_marks,
+        base_char_offset=base_char_offset, letter_complexes=all_complexes_for_context,
+        result_cache=result_cache
+    )
+    return results_by_rule[_SINGLE_RULE_KEY]
+
+
+def analyze_text_for_rules(sura_idx, aya_idx, text_content, source_type,
+                           rules, considered_waqf_marks,
+                           base_char_offset=0, letter_complexes=None, stop_contexts=None,
+                           result_cache=None):
+    """
+    Analyzes a text string (Ayah or Bismillah) for several Tajweed rules at once.
+
+    The text is tokenized once and the stop context of every letter complex is computed once;
+    each complex is then handed to every rule in `rules`.
+
+    Args:
+        sura_idx, aya_idx, text_content, source_type: As in analyze_text_for_rule.
+        rules (dict): {rule_name: rule_check_function}, see rule_registry.resolve_rules.
+        considered_waqf_marks: A frozenset of Waqf mark characters to consider for stops.
+        base_char_offset: Offset for character indexing if text is part of a larger string.
+        letter_complexes (list, optional): Pre-parsed letter complexes of text_content.
+        stop_contexts (list, optional): Precomputed stop context of each complex in letter_complexes
+                                        (e.g. from a corpus_index.CorpusIndex), computed here if omitted.
+        result_cache (analysis_cache.SegmentResultCache, optional): If given, findings of a text that
+                                        was already analyzed with the same Waqf marks and rule are
+                                        taken from the cache and rebased onto this sura/aya.
+
+    Returns:
+        dict: {rule_name: [found rule instances]}, with one (possibly empty) list per rule.
+    """
+    considered_waqf_marks = letter_analyzer.normalize_waqf_marks(considered_waqf_marks)
+    if result_cache is not None and text_content:
+        return _analyze_text_for_rules_cached(
+            result_cache, sura_idx, aya_idx, text_content, source_type, rules, considered_waqf_marks,
+            base_char_offset, letter_complexes, stop_contexts
+        )
+
+    # Timing hooks, only while a profiling.PipelineProfiler is active.
+    timer = None
+    if profiling.ACTIVE_PROFILER is not None:
+        timer = profiling.SegmentTimer(profiling.ACTIVE_PROFILER)
+
+    results_by_rule = {rule_name: [] for rule_name in rules}
     if not text_content:
-        return results
-
-    # If all_complexes_for_context is not provided, parse it now.
-    # This is for the case where analyze_text_for_rule is called directly on a single segment.
-    # If called from process_quran_for_rule, all_complexes_for_context will be the full ayah's complexes.
-    if all_complexes_for_context is None:
-        # This path is less common if using the main processor, which should pre-parse.
-        # print("Warning: all_complexes_for_context not provided to analyze_text_for_rule. Parsing locally.")
-        all_complexes_for_context = text_parser.get_letter_complexes(text_content)
-        # If parsed locally, we iterate through them.
-        for i, current_complex_tuple in enumerate(all_complexes_for_context):
-            letter, diacritics, start_idx, end_idx_after_diacritics = current_complex_tuple
-            
-            stop_context = letter_analyzer.get_letter_stop_context(
-                text_content,
-                end_idx_after_diacritics,
-                considered_waqf_marks
-            )
-
-            rule_finding = rule_check_function(current_complex_tuple, stop_context, all_complexes_for_context, i)
-
-            if rule_finding:
-                word_context = text_parser.get_word_at_index(text_content, start_idx)
-                instance_data = {
-                    "sura": sura_idx,
-                    "aya": aya_idx,
-                    "source_type": source_type,
-                    "word_context": word_context,
-                    "char_index_in_text": base_char_offset + start_idx,
-                }
-                instance_data.update(rule_finding) 
-                results.append(instance_data)
-        return results # Return early if parsed locally
-
-    # This is the typical path if all_complexes_for_context and current_complex_index are provided
-    # (e.g. when iterating from process_quran_for_rule)
-    # The arguments `all_complexes_for_context` and `current_complex_index` are not directly used here
-    # if the function is meant to iterate itself.
-    # Let's stick to the original design where analyze_text_for_rule processes its *own* text_content
-    # by generating complexes, and the rule_check_function receives the full list for context.
-
-    # Reverting to the simpler design for this function:
-    # It gets letter complexes for *its own* text_content.
-    # The rule_check_function is given these specific complexes.
-    
-    letter_complexes_for_this_text = text_parser.get_letter_complexes(text_content)
-
-    for i, current_complex_tuple in enumerate(letter_complexes_for_this_text):
-        letter, diacritics, start_idx, end_idx_after_diacritics = current_complex_tuple
-        
-        stop_context = letter_analyzer.get_letter_stop_context(
-            text_content, # context for stop is within this specific text_content
-            end_idx_after_diacritics,
-            considered_waqf_marks
+        return results_by_rule
+
+    if letter_complexes is None:
+        letter_complexes = text_parser.get_letter_complexes(text_content)
+    if timer is not None:
+        timer.charge(profiling.STAGE_PARSE)
+    if stop_contexts is None:
+        # Stop context is rule-independent, so it is computed once per complex
+        # (within this specific text_content) and shared by all rules.
+        stop_contexts = letter_analyzer.get_stop_contexts(text_content, letter_complexes, considered_waqf_marks)
+    if timer is not None:
+        timer.charge(profiling.STAGE_STOP_CONTEXT)
+
+    # Built lazily on the first hit: segments without findings never need word spans.
+    word_table = None
+    rule_items = list(rules.items())
+    if timer is not None:
+        rule_items = timer.timed_rules(rule_items)
+    for i, current_complex_tuple in enumerate(letter_complexes):
+        start_idx = current_complex_tuple[2]
+        stop_context = stop_contexts[i]
+        word_context = None
+        for rule_name, rule_check_function in rule_items:
+            # Rules receive the complexes of the *current text segment* (e.g. just the Bismillah,
+            # or just the Ayah text), which rules like Idgham need to look at the *next* letter.
+            rule_finding = rule_check_function(current_complex_tuple, stop_context, letter_complexes, i)
+            if not rule_finding:
+                continue
+
+            if word_context is None:
+                if word_table is None:
+                    word_table = text_parser.WordSpanTable(text_content)
+                word_context, word_position = word_table.word_and_position_at(start_idx)
+            if timer is not None:
+                timer.charge(profiling.STAGE_WORD_LOOKUP)
+
+            results_by_rule[rule_name].append(_make_instance(
+                sura_idx, aya_idx, source_type, word_context,
+                base_char_offset + start_idx, word_position, rule_finding, stop_context
+            ))
+            if timer is not None:
+                timer.charge(profiling.STAGE_RESULT_CONSTRUCTION)
+
+    if timer is not None:
+        timer.finish(sura_idx, aya_idx, source_type, len(letter_complexes))
+    return results_by_rule
+
+
+def _analyze_text_for_rules_cached(result_cache, sura_idx, aya_idx, text_content, source_type,
+                                   rules, considered_waqf_marks,
+                                   base_char_offset, letter_complexes, stop_contexts):
+    """
+    analyze_text_for_rules through a SegmentResultCache: rules whose findings for this text are
+    cached cost a dictionary lookup; only the remaining rules are actually run.
+    """
+    considered_waqf_marks = frozenset(considered_waqf_marks)
+    digest = analysis_cache.text_digest(text_content)
+    results_by_rule = {}
+    missing_rules = {}
+    missing_keys = {}
+    for rule_name, rule_check_function in rules.items():
+        key = result_cache.make_key(digest, considered_waqf_marks, rule_check_function)
+        templates = result_cache.get(key)
+        if templates is None:
+            missing_rules[rule_name] = rule_check_function
+            missing_keys[rule_name] = key
+            continue
+        results_by_rule[rule_name] = instances_from_templates(sura_idx, aya_idx, source_type, templates,
+                                                              base_char_offset)
+
+    if missing_rules:
+        fresh_results = analyze_text_for_rules(
+            sura_idx, aya_idx, text_content, source_type, missing_rules, considered_waqf_marks,
+            base_char_offset=base_char_offset, letter_complexes=letter_complexes, stop_contexts=stop_contexts
         )
+        for rule_name, instances in fresh_results.items():
+            result_cache.put(missing_keys[rule_name],
+                             analysis_cache.instances_to_templates(instances, base_char_offset))
+            results_by_rule[rule_name] = instances
+
+    return {rule_name: results_by_rule[rule_name] for rule_name in rules}
+
+
+def stop_fields(stop_context):
+    """
+    The stop of a finding as structured result dict fields: stop_reason (a letter_analyzer.STOP_REASON_*
+    constant, or None mid-speech) and waqf_char (the Waqf mark stopped at, or None).
+    """
+    return {"stop_reason": stop_context["reason"], "waqf_char": stop_context["waqf_char"]}
+
+def _make_instance(sura_idx, aya_idx, source_type, word_context, char_index_in_text, word_position, rule_finding,
+                   stop_context=None):
+    """
+    Builds the result dict of one rule finding, with the stop_fields of stop_context.
+    stop_context is None when rule_finding already holds them (see instances_from_templates).
+    """
+    instance_data = {
+        "sura": sura_idx,
+        "aya": aya_idx,
+        "source_type": source_type,
+        "word_context": word_context,
+        "char_index_in_text": char_index_in_text,
+        "word_position": word_position,
+        "word_id": text_parser.make_word_id(sura_idx, aya_idx, source_type, word_position),
+    }
+    if stop_context is not None:
+        instance_data.update(stop_fields(stop_context))
+    instance_data.update(rule_finding)
+    return instance_data
+
+
+def instances_from_templates(sura_idx, aya_idx, source_type, templates, base_char_offset=0):
+    """
+    Rebuilds result dicts for a segment from analysis_cache.instances_to_templates templates,
+    i.e. findings of the same text computed for another sura/aya (or another corpus).
+    Template findings carry their stop_fields.
+    """
+    return [
+        _make_instance(sura_idx, aya_idx, source_type, word_context,
+                       base_char_offset + start_idx, word_position, finding)
+        for start_idx, word_context, word_position, finding in templates
+    ]
+
+
+def load_quran_segments(json_file_path, errors=None):
+    """
+    Loads the Quran JSON and flattens it into a list of text segments.
+    Prefer corpus_loader.iter_corpus_segments when the segments can be consumed as a stream.
+    errors (list, optional) receives the read errors of a partially loaded corpus.
+
+    Returns:
+        list: (sura_idx, aya_idx, source_type, text) tuples in canonical order
+              (each Ayah text followed by its Bismillah, if any), or None on error,
+              including a corpus that could only be read in part.
+    """
+    reader = corpus_loader.open_corpus(json_file_path)
+    if reader is None:
+        return None
+    with reader:
+        segments = list(reader.iter_segments())
+    if reader.errors:
+        if errors is not None:
+            errors.extend(reader.errors)
+        return None
+    return segments
+
+
+def process_quran_for_rules(json_file_path, rules=None,
+                            considered_waqf_marks=None, use_index=False, index_path=None,
+                            workers=None, chunk_size=1, result_cache=None, persistent_cache=None,
+                            absolute_char_index=False):
+    """
+    Loads Quran JSON once and applies several rule check functions in a single pass.
+
+    Each segment is tokenized once and every letter complex gets its stop context computed once,
+    so N rules cost roughly one parse plus N rule calls per complex instead of N full passes.
+
+    Args:
+        json_file_path: Path to the Quran JSON file.
+        rules: Rules to apply; a {rule_name: function} dict, a list of registered rule names,
+               or None for every registered rule (rule_registry.rule_names()).
+        considered_waqf_marks: A frozenset of Waqf mark characters to consider for stops.
+        use_index: If True, read letter complexes and stop positions from the precompiled corpus index
+                   (see corpus_index), building it on first use, instead of parsing the JSON text.
+        index_path: Location of the corpus index; defaults to the JSON path with a .tjidx extension.
+        workers: Number of worker processes. None, 0 or 1 runs serially in this process;
+                 more shards the corpus by sura across a ProcessPoolExecutor (see _process_segments_parallel).
+        chunk_size: Number of suras per worker task when running in parallel.
+        result_cache: Optional analysis_cache.SegmentResultCache so repeated texts (Bismillahs,
+                      duplicate Ayahs) are analyzed once. Only used by the serial path.
+        persistent_cache: Optional persistent_cache.PersistentResultsCache. On a hit the stored
+                          findings are returned without reading or parsing the corpus; on a miss
+                          the findings are computed as usual and stored.
+        absolute_char_index: If True, char_index_in_text is the absolute corpus position of the
+                             finding (the corpus_offsets layout), via base_char_offset.
+
+    Returns:
+        dict: {rule_name: [found rule instances]} in canonical sura/aya order. Every list is empty
+              if the corpus could not be opened or was only read in part.
+    """
+    considered_waqf_marks = letter_analyzer.normalize_waqf_marks(considered_waqf_marks)
+
+    rules = rule_registry.resolve_rules(rules)
+    all_rule_instances = {rule_name: [] for rule_name in rules}
+
+    cache_key = None
+    if persistent_cache is not None:
+        cache_key = persistent_cache.make_key(json_file_path, rules, considered_waqf_marks,
+                                              variant=_offset_variant(absolute_char_index))
+        cached_pairs = persistent_cache.load(cache_key) if cache_key is not None else None
+        if cached_pairs is not None:
+            for rule_name, instance in cached_pairs:
+                all_rule_instances[rule_name].append(instance)
+            return all_rule_instances
+    # (rule_name, instance) pairs in streaming order, kept only to fill the persistent cache.
+    stream_pairs = [] if cache_key is not None else None
+    segment_count = 0
+    load_errors = [] # a corpus that could only be read in part gives no findings and is not cached
+
+    if workers is None or workers <= 1:
+        for results_by_rule in _iter_segment_results(json_file_path, rules, considered_waqf_marks,
+                                                     use_index, index_path, result_cache,
+                                                     absolute_char_index, load_errors):
+            segment_count += 1
+            _collect_segment_results(results_by_rule, all_rule_instances, stream_pairs)
+        if load_errors:
+            return {rule_name: [] for rule_name in rules}
+        if stream_pairs is not None and segment_count:
+            persistent_cache.store(cache_key, stream_pairs)
+        return all_rule_instances
+
+    segments = None
+    if use_index:
+        index = corpus_index.load_corpus_index(json_file_path, index_path)
+        if index is not None:
+            with index:
+                segments = list(index.iter_segments())
+        else:
+            print("Warning: Corpus index unavailable, falling back to parsing the JSON file.")
+    if segments is None:
+        segments = load_quran_segments(json_file_path, load_errors)
+    if segments is not None:
+        _process_segments_parallel(segments, rules, considered_waqf_marks,
+                                   workers, chunk_size, all_rule_instances, stream_pairs,
+                                   absolute_char_index)
+        if stream_pairs is not None and segments:
+            persistent_cache.store(cache_key, stream_pairs)
+    return all_rule_instances
+
+def _offset_variant(absolute_char_index):
+    """Persistent cache variant of a run: absolute and segment-relative char indexes differ."""
+    return "absolute_char_index" if absolute_char_index else None
+
+def _collect_segment_results(results_by_rule, all_rule_instances, stream_pairs=None):
+    """Appends one segment's {rule_name: [instances]} to the totals (and to stream_pairs, if given)."""
+    for rule_name, instances in results_by_rule.items():
+        all_rule_instances[rule_name].extend(instances)
+        if stream_pairs is not None:
+            stream_pairs.extend((rule_name, instance) for instance in instances)
+
+
+def process_quran_for_rules_compact(json_file_path, rules=None, considered_waqf_marks=None,
+                                    use_index=False, index_path=None, result_cache=None):
+    """
+    Like process_quran_for_rules, but collects the findings into a result_records.ResultRecordTable
+    instead of keeping one dict per hit, which is much smaller for whole-corpus multi-rule runs.
+    Each segment's result dicts are dropped as soon as they have been appended to the table.
 
-        # The rule_check_function receives the complexes of the *current text segment*
-        # (e.g., just the Bismillah, or just the Ayah text)
-        # This is important for rules like Idgham that look at the *next* letter within that segment.
-        rule_finding = rule_check_function(
-            current_complex_tuple, 
-            stop_context, 
-            letter_complexes_for_this_text, # Pass the list of complexes for this segment
-            i                               # Pass the index within this segment's complexes
+    Args: As in process_quran_for_rules (serial only).
+
+    Returns:
+        result_records.ResultRecordTable: Findings in iter_rule_instances order; use
+        table.records(rule_name) for one rule, or record.to_dict() / table.to_rule_results()
+        where result dicts are needed.
+    """
+    table = result_records.ResultRecordTable()
+    table.extend(iter_rule_instances(json_file_path, rules, considered_waqf_marks,
+                                     use_index=use_index, index_path=index_path, result_cache=result_cache))
+    return table
+
+
+def iter_rule_instances(json_file_path, rules=None, considered_waqf_marks=None,
+                        use_index=False, index_path=None, result_cache=None, persistent_cache=None,
+                        absolute_char_index=False):
+    """
+    Streaming counterpart of process_quran_for_rules: yields (rule_name, instance) pairs as soon as
+    each segment has been analyzed, in the same canonical order, without accumulating results.
+    Without a result_cache or persistent_cache, peak memory is bounded by the corpus reader's buffer
+    and the largest sura, not by the corpus size or the number of findings
+    (see tests/test_streaming_memory.py).
+
+    Args: As in process_quran_for_rules (serial only). A result_cache grows with the distinct texts
+          it memoizes. With a persistent_cache, a miss keeps the yielded pairs until the corpus is
+          exhausted so they can be stored; a stream closed early stores nothing.
+
+    Raises:
+        corpus_loader.CorpusReadError: After the last pair, if the corpus could not be opened or
+            was only read in part (e.g. a truncated file). The pairs already yielded are then
+            incomplete and nothing is cached.
+
+    Yields:
+        tuple: (rule_name, instance dict). Within a segment, findings are grouped by rule.
+    """
+    considered_waqf_marks = letter_analyzer.normalize_waqf_marks(considered_waqf_marks)
+    rules = rule_registry.resolve_rules(rules)
+
+    cache_key = None
+    if persistent_cache is not None:
+        cache_key = persistent_cache.make_key(json_file_path, rules, considered_waqf_marks,
+                                              variant=_offset_variant(absolute_char_index))
+        cached_pairs = persistent_cache.load(cache_key) if cache_key is not None else None
+        if cached_pairs is not None:
+            yield from cached_pairs
+            return
+    stream_pairs = [] if cache_key is not None else None
+    segment_count = 0
+    load_errors = []
+
+    for results_by_rule in _iter_segment_results(json_file_path, rules, considered_waqf_marks,
+                                                 use_index, index_path, result_cache, absolute_char_index,
+                                                 load_errors):
+        segment_count += 1
+        for rule_name, instances in results_by_rule.items():
+            for instance in instances:
+                if stream_pairs is not None:
+                    stream_pairs.append((rule_name, instance))
+                yield rule_name, instance
+
+    if load_errors:
+        raise corpus_loader.CorpusReadError("; ".join(load_errors))
+    if stream_pairs is not None and segment_count:
+        persistent_cache.store(cache_key, stream_pairs)
+
+
+def _iter_segment_results(json_file_path, rules, considered_waqf_marks, use_index, index_path,
+                          result_cache=None, absolute_char_index=False, load_errors=None):
+    """
+    Yields the {rule_name: [instances]} results of every segment of the corpus, in order.
+    With absolute_char_index, each segment is analyzed with its corpus_offsets start as base_char_offset.
+    load_errors (list, optional) receives the corpus read errors (see corpus_loader.iter_corpus_segments).
+    """
+    segment_inputs = _iter_segment_inputs(json_file_path, considered_waqf_marks, use_index, index_path,
+                                          load_errors)
+    profiler = profiling.ACTIVE_PROFILER
+    if profiler is not None:
+        segment_inputs = profiling.timed_iter(segment_inputs, profiling.STAGE_LOAD, profiler)
+
+    segment_start = 0
+    for sura_idx, aya_idx, source_type, text, letter_complexes, stop_contexts in segment_inputs:
+        yield analyze_text_for_rules(sura_idx, aya_idx, text, source_type, rules, considered_waqf_marks,
+                                     base_char_offset=segment_start if absolute_char_index else 0,
+                                     letter_complexes=letter_complexes, stop_contexts=stop_contexts,
+                                     result_cache=result_cache)
+        segment_start += len(text) + corpus_offsets.SEGMENT_SEPARATOR_LENGTH
+
+def _iter_segment_inputs(json_file_path, considered_waqf_marks, use_index, index_path, load_errors=None):
+    """
+    Yields (sura_idx, aya_idx, source_type, text, letter_complexes, stop_contexts) for every segment.
+    letter_complexes and stop_contexts come from the corpus index when use_index is set, else None.
+    """
+    if use_index:
+        index = corpus_index.load_corpus_index(json_file_path, index_path)
+        if index is not None:
+            with index:
+                for segment_idx in range(len(index)):
+                    sura_idx, aya_idx, source_type, text = index.segment(segment_idx)
+                    yield (sura_idx, aya_idx, source_type, text,
+                           index.letter_complexes(segment_idx, text),
+                           index.stop_contexts(segment_idx, considered_waqf_marks, len(text)))
+            return
+        print("Warning: Corpus index unavailable, falling back to parsing the JSON file.")
+
+    # The corpus is parsed incrementally, so analysis of a sura overlaps with parsing the next.
+    for sura_idx, aya_idx, source_type, text in corpus_loader.iter_corpus_segments(json_file_path, load_errors):
+        yield sura_idx, aya_idx, source_type, text, None, None
+
+
+def _process_segments_parallel(segments, rules, considered_waqf_marks,
+                               workers, chunk_size, all_rule_instances, stream_pairs=None,
+                               absolute_char_index=False):
+    """
+    Shards segments by sura (chunk_size suras per task) across a ProcessPoolExecutor and merges the
+    shard results back in submission order, which is the canonical sura/aya/char order of the
+    serial path, so the output is identical to it. Shards return per-segment results so that
+    stream_pairs, if given, receives the pairs in the same order iter_rule_instances yields them.
+
+    Workers only receive the (sura, aya, source_type, text, base_char_offset) tuples of their shard,
+    the waqf marks and the rules. Registered rules are shipped by name and resolved in the worker through
+    rule_registry; other rule functions must be picklable (i.e. defined at module level).
+    """
+    rule_specs = rule_registry.rule_specs(rules)
+    segment_start = 0
+    positioned_segments = []
+    for segment in segments:
+        positioned_segments.append((*segment, segment_start if absolute_char_index else 0))
+        segment_start += len(segment[3]) + corpus_offsets.SEGMENT_SEPARATOR_LENGTH
+    sura_groups = [list(group) for _, group in itertools.groupby(positioned_segments, key=lambda segment: segment[0])]
+    chunk_size = max(1, chunk_size)
+    shards = [
+        [segment for group in sura_groups[shard_start:shard_start + chunk_size] for segment in group]
+        for shard_start in range(0, len(sura_groups), chunk_size)
+    ]
+
+    # Imported here: concurrent.futures.process pulls in multiprocessing, which dominates the
+    # import time of this module and is only needed for parallel runs.
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        shard_results = executor.map(
+            _analyze_shard, shards,
+            itertools.repeat(rule_specs), itertools.repeat(considered_waqf_marks)
         )
+        for shard_segment_results in shard_results:
+            for results_by_rule in shard_segment_results:
+                _collect_segment_results(results_by_rule, all_rule_instances, stream_pairs)
 
-        if rule_finding:
-            word_context = text_parser.get_word_at_index(text_content, start_idx)
-            
-            instance_data = {
-                "sura": sura_idx,
-                "aya": aya_idx,
-                "source_type": source_type,
-                "word_context": word_context,
-                "char_index_in_text": base_char_offset + start_idx,
-            }
-            instance_data.update(rule_finding) 
-            results.append(instance_data)
-            
+def _analyze_shard(shard_segments, rule_specs, considered_waqf_marks):
+    """
+    Worker entry point: runs the rules over one shard of (sura, aya, source_type, text, base_char_offset)
+    segments.
+    Returns the {rule_name: [instances]} of each segment that has findings, in order.
+    """
+    rules = rule_registry.resolve_rules(rule_specs)
+    results = []
+    for sura_idx, aya_idx, source_type, text, base_char_offset in shard_segments:
+        segment_results = analyze_text_for_rules(sura_idx, aya_idx, text, source_type,
+                                                 rules, considered_waqf_marks, base_char_offset)
+        if any(segment_results.values()):
+            results.append(segment_results)
     return results
 
 
 def process_quran_for_rule(json_file_path, rule_check_function, 
-                           considered_waqf_marks=None):
+                           considered_waqf_marks=None, use_index=False, index_path=None,
+                           workers=None, chunk_size=1, result_cache=None, persistent_cache=None,
+                           absolute_char_index=False):
     """
     Loads Quran JSON and applies a rule_check_function to find all instances.
+    See process_quran_for_rules for the other arguments.
     """
-    if considered_waqf_marks is None:
-        considered_waqf_marks = ac.DEFAULT_STOP_WAQF_MARKS
-        
-    try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            quran_data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: JSON file '{json_file_path}' not found.")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON from '{json_file_path}': {e}")
-        return []
+    return process_quran_for_rules(json_file_path, {_SINGLE_RULE_KEY: rule_check_function},
+                                   considered_waqf_marks, use_index=use_index,
+                                   index_path=index_path, workers=workers,
+                                   chunk_size=chunk_size, result_cache=result_cache,
+                                   persistent_cache=persistent_cache,
+                                   absolute_char_index=absolute_char_index)[_SINGLE_RULE_KEY]
 
-    all_rule_instances = []
 
-    # Adapt based on your JSON structure. This is one common structure.
-    if "quran" in quran_data and "suras" in quran_data["quran"]:
-        data_iterator = quran_data["quran"]["suras"]
-        sura_key, aya_key, text_key, bismillah_key = "index", "index", "text", "bismillah"
-        ayas_list_key = "ayas"
-    elif isinstance(quran_data, list) and quran_data and ("sura_number" in quran_data[0] or "index" in quran_data[0]): # list of sura objects
-        data_iterator = quran_data
-        # Try to determine keys more flexibly
-        sura_example = quran_data[0]
-        sura_key = "sura_number" if "sura_number" in sura_example else "index"
-        
-        ayas_list_key = "verses" if "verses" in sura_example and sura_example["verses"] else \
-                        "ayas" if "ayas" in sura_example and sura_example["ayas"] else None
-        if not ayas_list_key or not sura_example[ayas_list_key]:
-             print("Error: Could not determine ayas list key or ayas list is empty in the simpler JSON structure.")
-             return []
-
-        aya_example = sura_example[ayas_list_key][0]
-        aya_key = "verse_number" if "verse_number" in aya_example else "index"
-        text_key = "text" if "text" in aya_example else None # text is crucial
-        if not text_key:
-            print(f"Error: Could not determine 'text_key' for ayas in simpler JSON structure for sura {sura_example.get(sura_key)}")
-            return []
-            
-        bismillah_key = "bismillah" # This might not exist in this simpler structure or be part of text
-    else: 
-        print("Error: JSON structure is not recognized. Please adapt quran_processor.py.")
-        return []
 
+def process_quran_for_waqf_sweep(json_file_path, waqf_configurations, rules=None):
+    """
+    Runs rules over the corpus under several Waqf-mark configurations in a single scan.
+
+    Stop contexts only depend on the configuration through the character that follows a letter:
+    the end-of-text flag and the next meaningful character are looked up once per letter complex.
+    A letter that is not followed by any of the swept marks has the
+    same stop context under every configuration, so each rule is called once and its finding is
+    shared by all configurations. Otherwise the configurations split into those that stop at that
+    mark and those that do not, and each rule is called at most twice.
+
+    Args:
+        json_file_path: Path to the Quran JSON file.
+        waqf_configurations: {config_name: frozenset of Waqf marks}, or a sequence of frozensets
+                             (each set is then its own config_name).
+        rules: As in process_quran_for_rules; defaults to every registered rule.
+
+    Returns:
+        dict: {config_name: {rule_name: [found rule instances]}}, where each result set is what
+              process_quran_for_rules(json_file_path, rules, marks) returns for that configuration.
+              Instances that do not depend on the configuration are the same dict objects in every
+              result set; treat them as read-only. See diff_waqf_sweep for a comparison view.
+    """
+    if not isinstance(waqf_configurations, dict):
+        waqf_configurations = {frozenset(marks): frozenset(marks) for marks in waqf_configurations}
+    config_names = list(waqf_configurations)
+    config_marks = [letter_analyzer.normalize_waqf_marks(waqf_configurations[name]) for name in config_names]
+    swept_marks = frozenset().union(*config_marks)
+    # For each swept mark, which configurations stop at it.
+    stopping_configs = {
+        mark: tuple(config_pos for config_pos, marks in enumerate(config_marks) if mark in marks)
+        for mark in swept_marks
+    }
 
-    for sura_obj in data_iterator:
-        sura_idx = sura_obj.get(sura_key)
-        if not sura_idx: # Skip if sura index is missing
-            print(f"Warning: Missing Sura index for object: {sura_obj}")
+    rules = rule_registry.resolve_rules(rules)
+    rule_items = list(rules.items())
+    per_config = [{rule_name: [] for rule_name in rules} for _ in config_names]
+    all_configs = tuple(range(len(config_names)))
+    load_errors = []
+
+    for sura_idx, aya_idx, source_type, text in corpus_loader.iter_corpus_segments(json_file_path, load_errors):
+        if not text:
             continue
+        letter_complexes = text_parser.get_letter_complexes(text)
+        text_length = len(text)
+        word_table = None
 
-        if ayas_list_key in sura_obj:
-            for aya_obj in sura_obj[ayas_list_key]:
-                aya_idx = aya_obj.get(aya_key)
-                text = aya_obj.get(text_key, "")
-                bismillah = aya_obj.get(bismillah_key) 
+        for i, current_complex_tuple in enumerate(letter_complexes):
+            start_idx = current_complex_tuple[2]
+            end_idx_after_diacritics = current_complex_tuple[3]
 
-                if text:
-                    all_rule_instances.extend(
-                        analyze_text_for_rule(sura_idx, aya_idx, text, "text", # source_type = "text"
-                                              rule_check_function, considered_waqf_marks)
-                    )
-                if bismillah:
-                    # For Bismillah, aya_idx might be considered 0 or the current aya_idx.
-                    # If Bismillah is only at the start of a Sura, it might be associated with aya 1 (or 0).
-                    # Let's assume Bismillah from aya_obj is related to that aya_idx.
-                    # If your JSON means Bismillah is *before* aya 1 of most Suras,
-                    # you might want a fixed aya_idx (like 0) for bismillah.
-                    b_aya_idx = aya_idx # Or 0 if Bismillah is always "verse 0"
-                    all_rule_instances.extend(
-                        analyze_text_for_rule(sura_idx, b_aya_idx, bismillah, "bismillah", # source_type = "bismillah"
-                                              rule_check_function, considered_waqf_marks)
+            at_end_of_text = letter_analyzer.is_end_of_text(text_length, end_idx_after_diacritics)
+            next_char = None
+            if not at_end_of_text:
+                next_char = letter_analyzer.get_next_meaningful_char(text, end_idx_after_diacritics)
+
+            stopping = stopping_configs.get(next_char)
+            if stopping is None or len(stopping) == len(all_configs):
+                # Same stop context for every configuration.
+                groups = ((all_configs, letter_analyzer.shared_stop_context(at_end_of_text, next_char, swept_marks)),)
+            else:
+                non_stopping = tuple(config_pos for config_pos in all_configs if config_pos not in stopping)
+                groups = (
+                    (stopping, letter_analyzer.shared_stop_context(at_end_of_text, next_char, swept_marks)),
+                    (non_stopping, letter_analyzer.shared_stop_context(at_end_of_text, next_char, ())),
+                )
+
+            for rule_name, rule_check_function in rule_items:
+                for config_group, stop_context in groups:
+                    rule_finding = rule_check_function(current_complex_tuple, stop_context, letter_complexes, i)
+                    if not rule_finding:
+                        continue
+                    if word_table is None:
+                        word_table = text_parser.WordSpanTable(text)
+                    word_context, word_position = word_table.word_and_position_at(start_idx)
+                    instance = _make_instance(
+                        sura_idx, aya_idx, source_type, word_context, start_idx, word_position, rule_finding,
+                        stop_context
                     )
-    return all_rule_instances
\ No newline at end of file
+                    for config_pos in config_group:
+                        per_config[config_pos][rule_name].append(instance)
+
+    if load_errors: # A corpus read in part gives no findings, as in process_quran_for_rules.
+        return {config_name: {rule_name: [] for rule_name in rules} for config_name in config_names}
+    return dict(zip(config_names, per_config))
+
+def diff_waqf_sweep(sweep_results, base_config, other_config):
+    """
+    Compares two configurations of a process_quran_for_waqf_sweep result.
+
+    Instances are matched by (sura, aya, source_type, char_index_in_text).
+
+    Returns:
+        dict: {rule_name: {"only_in_base": [instances], "only_in_other": [instances],
+                           "changed": [(base_instance, other_instance)]}}, e.g. a Qalqalah letter
+              with sukoon that is Sughra under base_config and Kubra under other_config is "changed".
+    """
+    def position(instance):
+        return (instance["sura"], instance["aya"], instance["source_type"], instance["char_index_in_text"])
+
+    base_results = sweep_results[base_config]
+    other_results = sweep_results[other_config]
+    diff = {}
+    for rule_name, base_instances in base_results.items():
+        other_by_position = {position(instance): instance for instance in other_results.get(rule_name, [])}
+        only_in_base = []
+        changed = []
+        for base_instance in base_instances:
+            other_instance = other_by_position.pop(position(base_instance), None)
+            if other_instance is None:
+                only_in_base.append(base_instance)
+            elif other_instance is not base_instance and other_instance != base_instance:
+                changed.append((base_instance, other_instance))
+        diff[rule_name] = {
+            "only_in_base": only_in_base,
+            # Whatever was not matched, still in canonical order.
+            "only_in_other": [instance for instance in other_results.get(rule_name, [])
+                              if position(instance) in other_by_position],
+            "changed": changed,
+        }
+    return diff
+
+
+def process_quran_for_qalqalah_batched(json_file_path, considered_waqf_marks=None):
+    """
+    Batched Qalqalah mode: parses the whole corpus into one LetterComplexTable and classifies
+    all complexes at once with qalqalah_rules.find_qalqalah_in_table. Only hits get a result dict.
+
+    Returns exactly what process_quran_for_rule(json_file_path, check_qalqalah_for_letter_complex,
+    considered_waqf_marks) returns.
+    """
+    considered_waqf_marks = letter_analyzer.normalize_waqf_marks(considered_waqf_marks)
+
+    segments = load_quran_segments(json_file_path)
+    if segments is None:
+        return []
+
+    table = LetterComplexTable()
+    for _, _, _, text in segments:
+        table.append_text(text)
+
+    from . import qalqalah_rules # Rule modules are loaded on demand (see rule_registry)
+    all_rule_instances = []
+    hits = qalqalah_rules.classify_qalqalah_table(table, considered_waqf_marks)
+    for (idx, finding), (_, _, _, stop_context) in zip(qalqalah_rules.materialize_qalqalah_findings(table, hits),
+                                                       hits):
+        sura_idx, aya_idx, source_type, text = segments[table.segment_ids[idx]]
+        start_idx = table.starts[idx]
+        # The table already holds the word position; only the hit's word is looked up.
+        all_rule_instances.append(_make_instance(
+            sura_idx, aya_idx, source_type, text_parser.get_word_at_index(text, start_idx),
+            start_idx, table.word_ids[idx] + 1, finding, stop_context
+        ))
+    return all_rule_instances
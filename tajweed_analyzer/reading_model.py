@@ -0,0 +1,147 @@
+# tajweed_analyzer/reading_model.py
+
+from . import corpus_loader
+from . import letter_analyzer
+from . import quran_processor
+from . import rule_registry
+from . import text_parser
+
+# Cross-ayah reading model. Within a segment, letter_analyzer treats the end of every Ayah as a stop.
+# A reciter may instead continue (wasl) into the next Ayah, so the last letter of the Ayah is
+# pronounced mid-speech and rules that look ahead see the first letters of the next Ayah.
+#
+# process_quran_for_readings computes the findings of both readings in one linear sweep:
+#   READING_STOP      every Ayah end is a stop; identical to quran_processor.process_quran_for_rules.
+#   READING_CONTINUE  each Ayah text joins the next Ayah of the same sura (the last Ayah of a sura
+#                     and Bismillah segments are read as in READING_STOP). A Bismillah listed
+#                     between two Ayahs does not interrupt the join.
+# Every segment is parsed and analyzed once. An Ayah is held back only until the next Ayah text has
+# been parsed; then just its last letter complex, the only one whose stop context changes, is
+# re-checked with the stop context of the joined reading and the first lookahead_complexes
+# complexes of the next Ayah appended to the context the rules see. All other findings are shared
+# with READING_STOP.
+
+READING_STOP = "stop"
+READING_CONTINUE = "continue"
+
+DEFAULT_LOOKAHEAD_COMPLEXES = 8
+
+
+def _continued_findings(segment, next_segment, rules, considered_waqf_marks, lookahead_complexes):
+    """
+    Findings of segment (sura_idx, aya_idx, source_type, text, letter_complexes, stop_results)
+    when read on into next_segment, as {rule_name: [instances]}.
+    """
+    sura_idx, aya_idx, source_type, text, letter_complexes, stop_results = segment
+    next_text = next_segment[3]
+    next_complexes = next_segment[4]
+    if not letter_complexes:
+        return stop_results
+
+    # The next Ayah's complexes, as if both Ayahs were one text joined by a space.
+    shift = len(text) + 1
+    joined_complexes = letter_complexes + [
+        (letter, diacritics, start + shift, end + shift)
+        for letter, diacritics, start, end in next_complexes[:lookahead_complexes]
+    ]
+    next_char = letter_analyzer.get_next_meaningful_char(next_text, 0)
+
+    # Only the last complex is read differently, whatever lookahead_complexes is.
+    tail_start = len(letter_complexes) - 1
+    tail_char_index = letter_complexes[tail_start][2]
+    word_table = None # built on the first hit
+
+    tail_templates = {rule_name: [] for rule_name in rules}
+    for i in range(tail_start, len(letter_complexes)):
+        current_complex_tuple = letter_complexes[i]
+        start_idx, end_idx_after_diacritics = current_complex_tuple[2], current_complex_tuple[3]
+        if letter_analyzer.is_end_of_text(len(text), end_idx_after_diacritics):
+            stop_context = letter_analyzer.shared_stop_context(False, next_char, considered_waqf_marks)
+        else:
+            stop_context = letter_analyzer.stop_context_at(text, end_idx_after_diacritics, considered_waqf_marks)
+        for rule_name, rule_check_function in rules.items():
+            rule_finding = rule_check_function(current_complex_tuple, stop_context, joined_complexes, i)
+            if rule_finding:
+                if word_table is None:
+                    word_table = text_parser.WordSpanTable(text)
+                tail_templates[rule_name].append((start_idx, *word_table.word_and_position_at(start_idx),
+                                                  {**quran_processor.stop_fields(stop_context), **rule_finding}))
+
+    return {
+        rule_name: [instance for instance in stop_results[rule_name]
+                    if instance["char_index_in_text"] < tail_char_index] +
+                   quran_processor.instances_from_templates(sura_idx, aya_idx, source_type,
+                                                            tail_templates[rule_name])
+        for rule_name in rules
+    }
+
+
+def process_quran_for_readings(json_file_path, rules=None, considered_waqf_marks=None,
+                               lookahead_complexes=DEFAULT_LOOKAHEAD_COMPLEXES):
+    """
+    Applies rules to the corpus under the stop and continue readings (see the module notes).
+
+    Args:
+        json_file_path: Path to the Quran JSON file.
+        rules: As in quran_processor.process_quran_for_rules.
+        considered_waqf_marks: A frozenset of Waqf mark characters to consider for stops.
+        lookahead_complexes: How many letter complexes of the next Ayah the rules may look at
+                             when the last complex of an Ayah is re-checked (at least 1).
+
+    Returns:
+        dict: {READING_STOP: {rule_name: [instances]}, READING_CONTINUE: {rule_name: [instances]}}.
+              Instances not affected by the reading are the same dict objects in both. Every list
+              is empty if the corpus could not be opened or was only read in part.
+
+    Raises:
+        ValueError: If lookahead_complexes is less than 1.
+    """
+    if lookahead_complexes < 1:
+        raise ValueError(f"lookahead_complexes must be at least 1, got {lookahead_complexes}.")
+    considered_waqf_marks = letter_analyzer.normalize_waqf_marks(considered_waqf_marks)
+    rules = rule_registry.resolve_rules(rules)
+    readings = {READING_STOP: {rule_name: [] for rule_name in rules},
+                READING_CONTINUE: {rule_name: [] for rule_name in rules}}
+
+    def emit(segment, continued_results):
+        for rule_name, instances in segment[5].items():
+            readings[READING_STOP][rule_name].extend(instances)
+        for rule_name, instances in continued_results.items():
+            readings[READING_CONTINUE][rule_name].extend(instances)
+
+    pending = None # the last Ayah text, waiting for the next Ayah text
+    held_back = [] # Bismillah segments read after pending; emitted after it, in corpus order
+    load_errors = []
+    for sura_idx, aya_idx, source_type, text in corpus_loader.iter_corpus_segments(json_file_path, load_errors):
+        letter_complexes = text_parser.get_letter_complexes(text) if text else []
+        stop_results = quran_processor.analyze_text_for_rules(
+            sura_idx, aya_idx, text, source_type, rules, considered_waqf_marks, letter_complexes=letter_complexes)
+        segment = (sura_idx, aya_idx, source_type, text, letter_complexes, stop_results)
+
+        if source_type != quran_processor.SOURCE_TYPE_TEXT:
+            # The corpus lists a Bismillah after the text of its Ayah, but it does not end that
+            # Ayah: the continue reading of Ayah 1 still joins Ayah 2.
+            if pending is None:
+                emit(segment, stop_results)
+            else:
+                held_back.append(segment)
+            continue
+
+        if pending is not None:
+            if sura_idx == pending[0] and aya_idx == pending[1] + 1:
+                emit(pending, _continued_findings(pending, segment, rules, considered_waqf_marks,
+                                                  lookahead_complexes))
+            else:
+                emit(pending, pending[5])
+            for held_segment in held_back:
+                emit(held_segment, held_segment[5])
+            held_back = []
+        pending = segment
+
+    if pending is not None:
+        emit(pending, pending[5])
+    for held_segment in held_back:
+        emit(held_segment, held_segment[5])
+    if load_errors: # A corpus read in part gives no findings, as in quran_processor.process_quran_for_rules.
+        return {reading: {rule_name: [] for rule_name in rules} for reading in readings}
+    return readings
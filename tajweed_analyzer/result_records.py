@@ -0,0 +1,207 @@
+# tajweed_analyzer/result_records.py
+
+import array
+from . import analysis_cache
+from . import text_parser
+
+# Compact storage for rule findings. A result dict costs several hundred bytes, most of it in keys
+# and strings repeated by every hit (source_type, type labels, the condition_details sentence,
+# the word). ResultRecordTable keeps one array per position field and replaces every string by a
+# small code into an interned lookup table, so a Qalqalah hit takes a few dozen bytes:
+#   - rule names, source types and words each have their own intern table,
+#   - the rule-specific keys of a finding (their layout) are interned once per distinct key tuple,
+#   - finding values (type, condition_details, letters, ...) are codes into a shared value table,
+#   - word_id is not stored at all; it is rendered from sura/aya/source_type/word_position on demand.
+# ResultRecord is a lightweight view of one row; to_dict() rebuilds the original result dict.
+
+# Keys of a result dict that are stored in the position columns.
+_POSITION_KEY_SET = frozenset(analysis_cache.POSITION_KEYS)
+
+
+class InternTable:
+    """Maps values to small integer codes and back; each distinct value is stored once."""
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        # Keyed on the type too, so that 1, 1.0 and True keep their own codes.
+        key = (type(value), value)
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def find(self, value):
+        """Code of value, or None if it was never interned."""
+        return self._codes.get((type(value), value))
+
+
+class ResultRecordTable:
+    """Struct-of-arrays table of rule findings; see the module notes."""
+
+    def __init__(self):
+        self.rule_names = InternTable()
+        self.source_types = InternTable()
+        self.words = InternTable()
+        self.layouts = InternTable() # tuples of rule-specific keys
+        self.finding_values = InternTable()
+
+        self.rule_codes = array.array('H')
+        self.suras = array.array('H')
+        self.ayas = array.array('H')
+        self.source_codes = array.array('B')
+        self.char_indexes = array.array('I')
+        self.word_positions = array.array('I')
+        self.word_codes = array.array('I')
+        self.layout_codes = array.array('H')
+        # Finding value codes of every record, back to back; record i owns
+        # value_codes[value_starts[i]:value_starts[i] + len(layout of record i)].
+        self.value_starts = array.array('I')
+        self.value_codes = array.array('I')
+
+    def __len__(self):
+        return len(self.rule_codes)
+
+    def __getitem__(self, record_idx):
+        if record_idx < 0:
+            record_idx += len(self)
+        if not 0 <= record_idx < len(self):
+            raise IndexError("result record index out of range")
+        return ResultRecord(self, record_idx)
+
+    def __iter__(self):
+        for record_idx in range(len(self)):
+            yield ResultRecord(self, record_idx)
+
+    def append(self, rule_name, instance):
+        """Adds one result dict (as built by quran_processor) found by rule_name."""
+        self.rule_codes.append(self.rule_names.code(rule_name))
+        self.suras.append(instance["sura"])
+        self.ayas.append(instance["aya"])
+        self.source_codes.append(self.source_types.code(instance["source_type"]))
+        self.char_indexes.append(instance["char_index_in_text"])
+        self.word_positions.append(instance["word_position"])
+        self.word_codes.append(self.words.code(instance["word_context"]))
+
+        finding_keys = tuple(key for key in instance if key not in _POSITION_KEY_SET)
+        self.layout_codes.append(self.layouts.code(finding_keys))
+        self.value_starts.append(len(self.value_codes))
+        value_code = self.finding_values.code
+        self.value_codes.extend(value_code(instance[key]) for key in finding_keys)
+
+    def extend(self, rule_instance_pairs):
+        for rule_name, instance in rule_instance_pairs:
+            self.append(rule_name, instance)
+
+    def rule_name(self, record_idx):
+        return self.rule_names.values[self.rule_codes[record_idx]]
+
+    def records(self, rule_name=None):
+        """Yields the ResultRecord views, optionally only those found by rule_name."""
+        if rule_name is None:
+            yield from self
+            return
+        rule_code = self.rule_names.find(rule_name)
+        if rule_code is None:
+            return
+        for record_idx, code in enumerate(self.rule_codes):
+            if code == rule_code:
+                yield ResultRecord(self, record_idx)
+
+    def to_dict(self, record_idx):
+        """Rebuilds the result dict of a record, with the same keys and key order as the original."""
+        sura_idx = self.suras[record_idx]
+        aya_idx = self.ayas[record_idx]
+        source_type = self.source_types.values[self.source_codes[record_idx]]
+        word_position = self.word_positions[record_idx]
+        instance = {
+            "sura": sura_idx,
+            "aya": aya_idx,
+            "source_type": source_type,
+            "word_context": self.words.values[self.word_codes[record_idx]],
+            "char_index_in_text": self.char_indexes[record_idx],
+            "word_position": word_position,
+            "word_id": text_parser.make_word_id(sura_idx, aya_idx, source_type, word_position),
+        }
+        finding_keys = self.layouts.values[self.layout_codes[record_idx]]
+        value_start = self.value_starts[record_idx]
+        values = self.finding_values.values
+        for offset, key in enumerate(finding_keys):
+            instance[key] = values[self.value_codes[value_start + offset]]
+        return instance
+
+    def to_rule_results(self):
+        """Returns {rule_name: [result dicts]} as process_quran_for_rules does (rules without findings are absent)."""
+        results = {rule_name: [] for rule_name in self.rule_names.values}
+        for record_idx in range(len(self)):
+            results[self.rule_name(record_idx)].append(self.to_dict(record_idx))
+        return results
+
+
+class ResultRecord:
+    """
+    View of one row of a ResultRecordTable. Supports read-only dict-style access
+    (record["type"], record.get("qalqalah_letter")), so it can stand in for a result dict;
+    values are looked up in the table on access.
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    @property
+    def rule_name(self):
+        return self.table.rule_name(self.index)
+
+    def to_dict(self):
+        return self.table.to_dict(self.index)
+
+    def __getitem__(self, key):
+        table = self.table
+        idx = self.index
+        if key == "sura":
+            return table.suras[idx]
+        if key == "aya":
+            return table.ayas[idx]
+        if key == "source_type":
+            return table.source_types.values[table.source_codes[idx]]
+        if key == "char_index_in_text":
+            return table.char_indexes[idx]
+        if key == "word_position":
+            return table.word_positions[idx]
+        if key == "word_context":
+            return table.words.values[table.word_codes[idx]]
+        if key == "word_id":
+            return text_parser.make_word_id(table.suras[idx], table.ayas[idx], self["source_type"],
+                                            table.word_positions[idx])
+        finding_keys = table.layouts.values[table.layout_codes[idx]]
+        if key in finding_keys:
+            value_code = table.value_codes[table.value_starts[idx] + finding_keys.index(key)]
+            return table.finding_values.values[value_code]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if isinstance(other, ResultRecord):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ResultRecord({self.rule_name!r}, {self.to_dict()!r})"
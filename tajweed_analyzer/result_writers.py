@@ -0,0 +1,63 @@
+# tajweed_analyzer/result_writers.py
+
+import contextlib
+import json
+import sys
+
+# Incremental writers for rule findings. Records are written one at a time as they are produced
+# (e.g. by quran_processor.iter_rule_instances), so nothing is buffered beyond the current record.
+
+STDOUT_DESTINATION = "-"
+
+@contextlib.contextmanager
+def _open_destination(destination):
+    """Yields a writable text stream for a path, "-" (stdout) or an already open file object."""
+    if hasattr(destination, "write"):
+        yield destination
+    elif destination == STDOUT_DESTINATION:
+        yield sys.stdout
+    else:
+        with open(destination, 'w', encoding='utf-8') as f:
+            yield f
+
+def tag_rule_instances(rule_instance_pairs):
+    """
+    Turns the (rule_name, instance) pairs of iter_rule_instances into flat records with a leading
+    "rule" key, ready for the writers below.
+    """
+    for rule_name, instance in rule_instance_pairs:
+        record = {"rule": rule_name}
+        record.update(instance)
+        yield record
+
+def write_ndjson(records, destination):
+    """
+    Streams records as NDJSON (one JSON object per line) to destination.
+    Returns the number of records written.
+    """
+    count = 0
+    with _open_destination(destination) as out:
+        for record in records:
+            out.write(json.dumps(record, ensure_ascii=False))
+            out.write("\n")
+            count += 1
+    return count
+
+def write_json_array(records, destination, indent=2):
+    """
+    Streams records as a single JSON array to destination, writing each element as it arrives
+    (same content as json.dump(list(records), ...), without materializing the list).
+    Returns the number of records written.
+    """
+    count = 0
+    with _open_destination(destination) as out:
+        out.write("[")
+        for record in records:
+            out.write(",\n" if count else "\n")
+            element = json.dumps(record, ensure_ascii=False, indent=indent)
+            if indent:
+                element = "\n".join(" " * indent + line for line in element.split("\n"))
+            out.write(element)
+            count += 1
+        out.write("\n]\n" if count else "]\n")
+    return count
@@ -0,0 +1,80 @@
+# tajweed_analyzer/rule_registry.py
+
+import importlib
+
+# Registry of Tajweed rule check functions, keyed by a short rule name.
+# Every rule function has the same signature:
+#     rule(letter_complex, stop_context, all_complexes_in_segment, current_complex_idx) -> dict | None
+# New rules (Noon Sakinah, Idgham, Izhar, ...) should be added here with `register_rule`
+# so that the multi-rule engine in quran_processor can pick them up by name.
+#
+# Built-in rules are registered by module and function name (`register_lazy_rule`) and their module
+# is only imported when the rule is first resolved, so importing the registry, or a worker that
+# runs a subset of the rules, does not load every rule module.
+RULE_QALQALAH = "qalqalah"
+
+# Loaded rules: {rule_name: rule_check_function}. Use rule_names() for every registered name.
+RULES = {}
+
+# Rules whose module is not imported yet: {rule_name: (module_name, function_name)}.
+# Module names starting with "." are relative to this package.
+_LAZY_RULES = {
+    RULE_QALQALAH: (".qalqalah_rules", "check_qalqalah_for_letter_complex"),
+}
+
+def register_rule(rule_name, rule_check_function):
+    """Registers (or replaces) a rule check function under rule_name."""
+    RULES[rule_name] = rule_check_function
+    return rule_check_function
+
+def register_lazy_rule(rule_name, module_name, function_name):
+    """
+    Registers a rule whose module is imported the first time the rule is resolved.
+    module_name is absolute, or relative to this package if it starts with ".".
+    """
+    RULES.pop(rule_name, None)
+    _LAZY_RULES[rule_name] = (module_name, function_name)
+
+def rule_names():
+    """Every registered rule name (loaded or not), built-in rules first."""
+    return list(dict.fromkeys([*_LAZY_RULES, *RULES]))
+
+def get_rule(rule_name):
+    """Returns the rule check function registered under rule_name, or raises KeyError."""
+    rule_check_function = RULES.get(rule_name)
+    if rule_check_function is not None:
+        return rule_check_function
+    if rule_name not in _LAZY_RULES:
+        raise KeyError(f"Unknown rule '{rule_name}'. Registered rules: {sorted(rule_names())}")
+    module_name, function_name = _LAZY_RULES[rule_name]
+    rule_check_function = RULES[rule_name] = getattr(importlib.import_module(module_name, __package__), function_name)
+    return rule_check_function
+
+def resolve_rules(rules=None):
+    """
+    Normalizes the different ways rules can be specified into an ordered {rule_name: function} dict.
+
+    Args:
+        rules: None (all registered rules), a dict of {rule_name: function or registered name},
+               or an iterable of registered rule names.
+
+    Returns:
+        dict: {rule_name: rule_check_function}
+    """
+    if rules is None:
+        return {name: get_rule(name) for name in rule_names()}
+    if isinstance(rules, dict):
+        return {name: get_rule(rule) if isinstance(rule, str) else rule
+                for name, rule in rules.items()}
+    if isinstance(rules, str):
+        rules = [rules]
+    return {name: get_rule(name) for name in rules}
+
+def rule_specs(rules):
+    """
+    Form of resolved rules ({rule_name: function}) to ship to worker processes: registered rules
+    become their name, other rule functions are kept (and must be picklable). Workers turn the
+    specs back into functions with resolve_rules.
+    """
+    return {rule_name: rule_name if RULES.get(rule_name) is rule_check_function else rule_check_function
+            for rule_name, rule_check_function in rules.items()}
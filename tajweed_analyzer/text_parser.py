@@ -1,37 +1,55 @@
 # tajweed_analyzer/text_parser.py
 
-import arabic_characters as ac
+import bisect
+import functools
+import re
+from . import arabic_characters as ac
+from .letter_complex_table import LetterComplexTable
 
-def get_letter_complexes(text):
+def get_letter_complexes(text, waqf_marks=None):
     """
     Breaks down Arabic text into a list of (letter, diacritics_string, start_idx, end_idx_after_diacritics) tuples.
     Skips over non-letter characters like spaces or Waqf marks initially,
     these are handled by the letter_analyzer.
+
+    Args:
+        text: The Arabic text to tokenize.
+        waqf_marks: Waqf marks to skip over (never treated as letters).
+                    Defaults to ac.DEFAULT_STOP_WAQF_MARKS.
     """
+    if waqf_marks is None:
+        waqf_marks = ac.DEFAULT_STOP_WAQF_MARKS
+    elif not isinstance(waqf_marks, frozenset):
+        waqf_marks = frozenset(waqf_marks)
+    # One regex match per complex: (skipped chars, base letter, contiguous diacritics).
+    # Offsets are rebuilt from the group lengths, which avoids creating a match object per complex.
     complexes = []
-    i = 0
-    while i < len(text):
-        char = text[i]
-
-        # Skip spaces, waqf marks, or diacritics if they appear before a letter
-        # (though ideally, input is clean or diacritics are part of a letter complex)
-        if char.isspace() or char in ac.ARABIC_DIACRITICS_CHARS or char in ac.DEFAULT_STOP_WAQF_MARKS: # Using default here, can be parameterized
-            i += 1
-            continue
-
-        # Assume 'char' is a base letter
-        letter = char
-        original_letter_start_idx = i
-        diacritics_str = ""
-        j = i + 1
-        while j < len(text) and text[j] in ac.ARABIC_DIACRITICS_CHARS:
-            diacritics_str += text[j]
-            j += 1
-        
-        complexes.append((letter, diacritics_str, original_letter_start_idx, j))
-        i = j  # Move to the character after the diacritics
+    append = complexes.append
+    end_idx = 0
+    for skipped, letter, diacritics in _letter_complex_pattern(waqf_marks).findall(text):
+        start_idx = end_idx + len(skipped)
+        end_idx = start_idx + 1 + len(diacritics)
+        append((letter, diacritics, start_idx, end_idx))
     return complexes
 
+@functools.lru_cache(maxsize=32)
+def _letter_complex_pattern(waqf_marks):
+    """
+    Compiles the tokenizer for a set of Waqf marks: `(skipped*)(letter)(diacritic*)`.
+    Skipped chars are whitespace (same definition as str.isspace), stray diacritics and the Waqf marks;
+    a letter is any other char.
+    """
+    diacritics = "".join(re.escape(char) for char in sorted(ac.ARABIC_DIACRITICS_CHARS))
+    skipped = "\\s" + diacritics + "".join(re.escape(char) for char in sorted(waqf_marks))
+    return re.compile(f"([{skipped}]*)([^{skipped}])([{diacritics}]*)")
+
+def get_letter_complex_table(text, waqf_marks=None):
+    """
+    Columnar alternative to get_letter_complexes: returns a LetterComplexTable with the same
+    complexes stored as parallel arrays (letter code point, diacritic bitmask, offsets, word id).
+    """
+    return LetterComplexTable.from_text(text, waqf_marks)
+
 def get_words(text):
     """
     Splits text into words. Basic implementation, might need refinement for complex cases.
@@ -54,4 +72,94 @@ def get_word_at_index(text, char_index):
     while word_end < len(text) -1 and not text[word_end + 1].isspace(): # Check word_end + 1
         word_end += 1
     
-    return text[word_start : word_end + 1]
\ No newline at end of file
+    return text[word_start : word_end + 1]
+
+def get_word_spans(text):
+    """
+    Returns the (start_idx, end_idx_exclusive) span of every whitespace-separated word in text.
+    A word span matches what get_word_at_index returns for any index inside it.
+    """
+    return [match.span() for match in _WORD_PATTERN.finditer(text)]
+
+# A whitespace-separated run (\s is the same definition of whitespace as str.isspace).
+_WORD_PATTERN = re.compile(r"\S+")
+
+
+class WordSpanTable:
+    """
+    Word spans of one text segment, so that word lookups by char index are a binary search over
+    the word starts instead of the backward/forward scans of get_word_at_index. Build one per
+    segment that has findings; tables are not cached.
+
+        starts, ends     char offsets of every whitespace-separated run (end is exclusive)
+        words            the run strings
+        positions        1-based position of each run among the runs that contain a letter
+                         (runs made only of Waqf marks/diacritics get position 0)
+    """
+
+    __slots__ = ("text", "starts", "ends", "words", "positions")
+
+    def __init__(self, text):
+        self.text = text
+        self.starts = []
+        self.ends = []
+        self.words = []
+        self.positions = []
+        position = 0
+        for match in _WORD_PATTERN.finditer(text):
+            word = match.group()
+            if counts_as_word(word):
+                position += 1
+                self.positions.append(position)
+            else:
+                self.positions.append(0)
+            self.starts.append(match.start())
+            self.ends.append(match.end())
+            self.words.append(word)
+
+    def __len__(self):
+        return len(self.words)
+
+    def word_index_at(self, char_index):
+        """Index of the word holding char_index, or -1 for whitespace/out of range."""
+        word_idx = bisect.bisect_right(self.starts, char_index) - 1
+        if word_idx < 0 or char_index >= self.ends[word_idx]:
+            return -1
+        return word_idx
+
+    def word_at(self, char_index):
+        """Binary-search equivalent of get_word_at_index."""
+        word_idx = self.word_index_at(char_index)
+        return self.words[word_idx] if word_idx >= 0 else ""
+
+    def word_position_at(self, char_index):
+        """1-based position within the segment of the word holding char_index (0 if none)."""
+        word_idx = self.word_index_at(char_index)
+        return self.positions[word_idx] if word_idx >= 0 else 0
+
+    def word_and_position_at(self, char_index):
+        """(word_at(char_index), word_position_at(char_index)) with a single search."""
+        word_idx = self.word_index_at(char_index)
+        if word_idx < 0:
+            return "", 0
+        return self.words[word_idx], self.positions[word_idx]
+
+# Characters that do not make a whitespace-separated run count as a word of its own.
+_NON_WORD_CHARS_STR = "".join(sorted(ac.ARABIC_DIACRITICS_CHARS.union(ac.DEFAULT_STOP_WAQF_MARKS, [ac.WAQF_LA])))
+
+def counts_as_word(run):
+    """
+    True if a whitespace-separated run gets a word position, i.e. it holds a char other than
+    diacritics and Waqf marks.
+    """
+    # Stripping the non-word chars leaves something iff the run has another char.
+    return bool(run.strip(_NON_WORD_CHARS_STR))
+
+def make_word_id(sura_idx, aya_idx, source_type, word_position):
+    """
+    Stable identifier of a word for joining with other datasets: "sura:aya:position" for Ayah text,
+    with the source type inserted for other segments (e.g. "1:1:bismillah:2").
+    """
+    if source_type == "text":
+        return f"{sura_idx}:{aya_idx}:{word_position}"
+    return f"{sura_idx}:{aya_idx}:{source_type}:{word_position}"
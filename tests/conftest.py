@@ -0,0 +1,24 @@
+# tests/conftest.py
+
+import json
+import os
+import sys
+import pytest
+
+# Make `import tajweed_analyzer` work however pytest is started.
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPOSITORY_ROOT not in sys.path:
+    sys.path.insert(0, REPOSITORY_ROOT)
+
+
+def write_corpus(path, corpus):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(corpus, f, ensure_ascii=False)
+    return str(path)
+
+@pytest.fixture(scope="session")
+def synthetic_corpus(tmp_path_factory):
+    """Path of benchmark_pipeline's 1x synthetic corpus (every Qalqalah branch occurs in it)."""
+    from tajweed_analyzer import benchmark_pipeline
+    return write_corpus(tmp_path_factory.mktemp("corpus") / "synthetic.json",
+                        benchmark_pipeline.generate_synthetic_corpus(scale=1))
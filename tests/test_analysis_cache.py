@@ -0,0 +1,48 @@
+# tests/test_analysis_cache.py
+
+import pytest
+from tajweed_analyzer import analysis_cache
+from tajweed_analyzer import arabic_characters as ac
+from tajweed_analyzer import qalqalah_rules
+from tajweed_analyzer import quran_processor
+
+
+@pytest.mark.parametrize("absolute_char_index", [False, True])
+def test_cached_results_equal_uncached_results(synthetic_corpus, absolute_char_index):
+    expected = quran_processor.process_quran_for_rules(synthetic_corpus, absolute_char_index=absolute_char_index)
+    cache = analysis_cache.SegmentResultCache()
+    first = quran_processor.process_quran_for_rules(synthetic_corpus, result_cache=cache,
+                                                    absolute_char_index=absolute_char_index)
+    assert first == expected
+    assert cache.hits > 0 # Every sura's Bismillah after the first is a repeated text.
+
+    misses = cache.misses
+    second = quran_processor.process_quran_for_rules(synthetic_corpus, result_cache=cache,
+                                                     absolute_char_index=absolute_char_index)
+    assert second == expected
+    assert cache.misses == misses
+
+def test_waqf_marks_and_rule_are_part_of_the_key(synthetic_corpus):
+    cache = analysis_cache.SegmentResultCache()
+    quran_processor.process_quran_for_rules(synthetic_corpus, result_cache=cache)
+    entries = len(cache)
+
+    meem = frozenset([ac.WAQF_MEEM])
+    assert quran_processor.process_quran_for_rules(synthetic_corpus, considered_waqf_marks=meem,
+                                                   result_cache=cache) == \
+        quran_processor.process_quran_for_rules(synthetic_corpus, considered_waqf_marks=meem)
+    assert len(cache) == 2 * entries
+
+    def other_rule(letter_complex, stop_context, all_letter_complexes, current_complex_idx):
+        return qalqalah_rules.check_qalqalah_for_letter_complex(letter_complex, stop_context,
+                                                                all_letter_complexes, current_complex_idx)
+    misses = cache.misses
+    quran_processor.process_quran_for_rules(synthetic_corpus, rules={"qalqalah": other_rule}, result_cache=cache)
+    assert cache.misses - misses == entries
+
+def test_evictions_keep_results_correct(synthetic_corpus):
+    cache = analysis_cache.SegmentResultCache(max_entries=2)
+    assert quran_processor.process_quran_for_rules(synthetic_corpus, result_cache=cache) == \
+        quran_processor.process_quran_for_rules(synthetic_corpus)
+    assert len(cache) == 2
+    assert cache.evictions == cache.misses - 2
@@ -0,0 +1,18 @@
+# tests/test_batch_runner.py
+
+from tajweed_analyzer import batch_runner
+from tajweed_analyzer import quran_processor
+from tajweed_analyzer import rule_registry
+
+
+def test_texts_per_task_below_one_is_clamped(synthetic_corpus):
+    expected = quran_processor.process_quran_for_rules(synthetic_corpus)
+    for texts_per_task in (0, -1):
+        batch = batch_runner.run_batch([synthetic_corpus], texts_per_task=texts_per_task)
+        assert batch["results"][synthetic_corpus] == expected
+
+def test_rule_specs_ship_registered_rules_by_name():
+    def custom_rule(letter_complex, stop_context, all_complexes_in_segment, current_complex_idx):
+        return None
+    rules = rule_registry.resolve_rules({"qalqalah": "qalqalah", "custom": custom_rule})
+    assert rule_registry.rule_specs(rules) == {"qalqalah": "qalqalah", "custom": custom_rule}
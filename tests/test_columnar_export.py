@@ -0,0 +1,39 @@
+# tests/test_columnar_export.py
+
+import collections
+import pytest
+from tajweed_analyzer import arabic_characters as ac
+from tajweed_analyzer import columnar_export
+from tajweed_analyzer import quran_processor
+
+ROUND_TRIP_COLUMNS = {
+    "sura": "sura", "aya": "aya", "source_type": "source_type", "char_index": "char_index_in_text",
+    "word_position": "word_position", "type": "type", "letter": "qalqalah_letter",
+    "stop_reason": "stop_reason", "waqf_char": "waqf_char",
+}
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, columnar_export.DEFAULT_CHUNK_ROWS])
+def test_columnar_round_trip(synthetic_corpus, tmp_path, chunk_rows):
+    waqf_marks = frozenset([ac.WAQF_MEEM, ac.WAQF_QALA])
+    instances = quran_processor.process_quran_for_rules(synthetic_corpus, considered_waqf_marks=waqf_marks)["qalqalah"]
+    path = str(tmp_path / ("findings" + columnar_export.COLUMNAR_FILE_EXTENSION))
+    assert columnar_export.write_columnar((("qalqalah", instance) for instance in instances), path,
+                                          chunk_rows=chunk_rows) == len(instances)
+
+    with columnar_export.ColumnarFindings(path) as findings:
+        assert len(findings) == len(instances)
+        for column, key in ROUND_TRIP_COLUMNS.items():
+            if column in columnar_export.DICTIONARY_COLUMNS:
+                values = findings.decoded_column(column)
+            else:
+                values = findings.column(column).tolist()
+            assert values == [instance[key] for instance in instances], column
+        assert findings.decoded_column("rule") == ["qalqalah"] * len(instances)
+        assert findings.count_by("type") == collections.Counter(instance["type"] for instance in instances)
+
+def test_rejects_a_file_that_is_not_columnar(tmp_path):
+    path = tmp_path / "findings.tjcol"
+    path.write_bytes(b"not a columnar findings file")
+    with pytest.raises(ValueError):
+        columnar_export.ColumnarFindings(str(path))
@@ -0,0 +1,33 @@
+# tests/test_compressed_json.py
+
+from tajweed_analyzer import findings_store
+from tajweed_analyzer import incremental_analysis
+from tajweed_analyzer import persistent_cache
+from tajweed_analyzer import quran_processor
+
+
+def test_read_checks_the_format_version(tmp_path, capsys):
+    path = str(tmp_path / "payload.bin")
+    persistent_cache.write_compressed_json(path, {"values": [1, "ب"]}, 3)
+    assert persistent_cache.read_compressed_json(path, 3) == {"format": 3, "values": [1, "ب"]}
+    assert persistent_cache.read_compressed_json(path, 4) is None
+    assert capsys.readouterr().out == ""
+    assert persistent_cache.read_compressed_json(path, 4, "findings store") is None
+    assert "Findings store" in capsys.readouterr().out
+    assert persistent_cache.read_compressed_json(str(tmp_path / "missing.bin"), 3, "analysis snapshot") is None
+    assert "Could not read analysis snapshot" in capsys.readouterr().out
+
+def test_stores_and_snapshots_round_trip(synthetic_corpus, tmp_path):
+    results = quran_processor.process_quran_for_rules(synthetic_corpus)
+
+    store = findings_store.FindingsStore.from_rule_results(results)
+    store.save(str(tmp_path / "findings.tjstore"))
+    loaded_store = findings_store.FindingsStore.load(str(tmp_path / "findings.tjstore"))
+    assert loaded_store.records == store.records
+    assert loaded_store.count(type="Kubra (Major)") == store.count(type="Kubra (Major)")
+
+    snapshot, _ = incremental_analysis.analyze_incrementally(synthetic_corpus)
+    snapshot.save(str(tmp_path / "corpus.tjsnap"))
+    loaded_snapshot = incremental_analysis.AnalysisSnapshot.load(str(tmp_path / "corpus.tjsnap"))
+    assert loaded_snapshot.results == snapshot.results == results
+    assert loaded_snapshot.digests == snapshot.digests
@@ -0,0 +1,49 @@
+# tests/test_corpus_index.py
+
+import os
+import pytest
+from conftest import write_corpus
+from tajweed_analyzer import arabic_characters as ac
+from tajweed_analyzer import corpus_index
+from tajweed_analyzer import letter_analyzer
+from tajweed_analyzer import quran_processor
+from tajweed_analyzer import text_parser
+
+TEXT = "قُلْ هُوَ ٱللَّهُ أَحَدْ"
+
+
+def test_index_round_trip_matches_the_parsed_json(synthetic_corpus, tmp_path):
+    index_path = corpus_index.build_corpus_index(synthetic_corpus, str(tmp_path / "synthetic.tjidx"))
+    segments = quran_processor.load_quran_segments(synthetic_corpus)
+    with corpus_index.CorpusIndex(index_path) as index:
+        assert list(index.iter_segments()) == segments
+        for segment_idx, (_, _, _, text) in enumerate(segments):
+            letter_complexes = text_parser.get_letter_complexes(text)
+            assert index.letter_complexes(segment_idx) == letter_complexes
+            assert index.word_spans(segment_idx) == text_parser.get_word_spans(text)
+            assert index.stop_contexts(segment_idx, ac.DEFAULT_STOP_WAQF_MARKS) == \
+                letter_analyzer.get_stop_contexts(text, letter_complexes, ac.DEFAULT_STOP_WAQF_MARKS)
+    assert quran_processor.process_quran_for_rules(synthetic_corpus, use_index=True, index_path=index_path) == \
+        quran_processor.process_quran_for_rules(synthetic_corpus)
+
+def test_stale_index_is_rebuilt(tmp_path):
+    ayas = [{"index": 1, "text": TEXT}]
+    corpus = write_corpus(tmp_path / "corpus.json", {"quran": {"suras": [{"index": 112, "ayas": ayas}]}})
+    with corpus_index.load_corpus_index(corpus) as index:
+        assert index.segment_count == 1
+
+    write_corpus(corpus, {"quran": {"suras": [{"index": 112, "ayas": ayas + [{"index": 2, "text": TEXT}]}]}})
+    assert corpus_index.load_corpus_index(corpus, rebuild=False) is None
+    with corpus_index.load_corpus_index(corpus) as index:
+        assert index.segment_count == 2
+        assert index.source_sha256 == corpus_index.hash_source_file(corpus)
+
+
+@pytest.mark.parametrize("aya_idx", [None, "2", 1 << 40])
+def test_ids_the_index_cannot_store_fall_back_to_the_json(tmp_path, aya_idx):
+    corpus = write_corpus(tmp_path / "corpus.json", {"quran": {"suras": [
+        {"index": 1, "ayas": [{"index": 1, "text": TEXT}, {"index": aya_idx, "text": TEXT}]}]}})
+    assert corpus_index.load_corpus_index(corpus) is None
+    assert not os.path.exists(corpus_index.default_index_path(corpus))
+    assert quran_processor.process_quran_for_rules(corpus, use_index=True) == \
+        quran_processor.process_quran_for_rules(corpus)
@@ -0,0 +1,49 @@
+# tests/test_corpus_loader.py
+
+import json
+import pytest
+from conftest import write_corpus
+from tajweed_analyzer import corpus_loader
+from tajweed_analyzer import quran_processor
+
+
+def _segments_of(corpus):
+    """The segments of a {"quran": {"suras": ...}} corpus, flattened from the fully decoded JSON."""
+    segments = []
+    for sura in corpus["quran"]["suras"]:
+        for aya in sura["ayas"]:
+            segments.append((sura["index"], aya["index"], corpus_loader.SOURCE_TYPE_TEXT, aya["text"]))
+            if aya.get("bismillah"):
+                segments.append((sura["index"], aya["index"], corpus_loader.SOURCE_TYPE_BISMILLAH,
+                                 aya["bismillah"]))
+    return segments
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_stream_reader_across_chunk_boundaries(synthetic_corpus, monkeypatch, chunk_size):
+    monkeypatch.setattr(corpus_loader, "_READ_CHUNK_SIZE", chunk_size)
+    with open(synthetic_corpus, encoding='utf-8') as f:
+        expected = _segments_of(json.load(f))
+    errors = []
+    assert list(corpus_loader.iter_corpus_segments(synthetic_corpus, errors)) == expected
+    assert errors == []
+
+def test_stream_reader_of_a_sura_list_with_numbers_at_chunk_edges(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus_loader, "_READ_CHUNK_SIZE", 3)
+    corpus = write_corpus(tmp_path / "list.json", [
+        {"sura_number": 12345, "verses": [{"verse_number": 67890, "text": "قُلْ"}]},
+        {"sura_number": 2, "extra": [1.5, None, {"x": "y"}], "verses": [{"verse_number": 1, "text": "هُوَ"}]},
+    ])
+    assert list(corpus_loader.iter_corpus_segments(corpus)) == [
+        (12345, 67890, corpus_loader.SOURCE_TYPE_TEXT, "قُلْ"), (2, 1, corpus_loader.SOURCE_TYPE_TEXT, "هُوَ")]
+
+def test_truncated_file_reports_an_error(synthetic_corpus, tmp_path):
+    with open(synthetic_corpus, encoding='utf-8') as f:
+        corpus_text = f.read()
+    truncated = tmp_path / "truncated.json"
+    truncated.write_text(corpus_text[:len(corpus_text) // 2], encoding='utf-8')
+
+    errors = []
+    partial = list(corpus_loader.iter_corpus_segments(str(truncated), errors))
+    assert partial and len(errors) == 1
+    assert partial == _segments_of(json.loads(corpus_text))[:len(partial)]
+    assert quran_processor.load_quran_segments(str(truncated)) is None
@@ -0,0 +1,42 @@
+# tests/test_corpus_offsets.py
+
+from conftest import write_corpus
+from tajweed_analyzer import corpus_offsets
+from tajweed_analyzer import quran_processor
+
+# Every segment ends in a Qalqalah letter with sukoon; the Bismillah follows the text of its Ayah.
+AYAS = [
+    {"index": 1, "text": "قُلْ هُوَ ٱللَّهُ أَحَدْ", "bismillah": "ٱللَّهُ ٱلصَّمَدْ"},
+    {"index": 2, "text": "ٱللَّهُ ٱلصَّمَدْ"},
+]
+
+
+def test_in_ayas_covers_the_trailing_bismillah_of_the_last_aya(tmp_path):
+    corpus = write_corpus(tmp_path / "corpus.json", {"quran": {"suras": [{"index": 112, "ayas": AYAS}]}})
+    offsets = corpus_offsets.CorpusOffsetIndex.from_corpus(corpus)
+    instances = quran_processor.process_quran_for_rules(corpus)["qalqalah"]
+    findings = corpus_offsets.PositionedFindings(offsets, instances)
+
+    first_aya = findings.in_ayas((112, 1), (112, 1))
+    assert {instance["source_type"] for instance in first_aya} == \
+        {quran_processor.SOURCE_TYPE_TEXT, quran_processor.SOURCE_TYPE_BISMILLAH}
+    assert first_aya + findings.in_ayas((112, 2), (112, 2)) == findings.in_ayas((112, 1), (112, 2))
+    assert offsets.aya_end(112, 1) == offsets.aya_start(112, 2)
+
+def test_absolute_char_index_matches_the_offset_index(synthetic_corpus):
+    offsets = corpus_offsets.CorpusOffsetIndex.from_corpus(synthetic_corpus)
+    relative = quran_processor.process_quran_for_rules(synthetic_corpus)["qalqalah"]
+    absolute = quran_processor.process_quran_for_rules(synthetic_corpus, absolute_char_index=True)["qalqalah"]
+    assert relative and len(absolute) == len(relative)
+    for relative_instance, absolute_instance in zip(relative, absolute):
+        position = absolute_instance["char_index_in_text"]
+        assert position == offsets.position_of(relative_instance)
+        assert offsets.resolve(position) == (relative_instance["sura"], relative_instance["aya"],
+                                             relative_instance["source_type"],
+                                             relative_instance["char_index_in_text"])
+        assert dict(absolute_instance, char_index_in_text=relative_instance["char_index_in_text"]) == \
+            relative_instance
+
+    by_relative = corpus_offsets.PositionedFindings(offsets, relative)
+    by_absolute = corpus_offsets.PositionedFindings(offsets, absolute, absolute_char_index=True)
+    assert list(by_relative.positions) == list(by_absolute.positions)
@@ -0,0 +1,54 @@
+# tests/test_import_time.py
+
+import os
+import subprocess
+import sys
+import pytest
+from tajweed_analyzer import benchmark_pipeline
+from conftest import REPOSITORY_ROOT
+
+# The wall-clock budget depends on the machine, so it is only checked when asked for,
+# e.g. on the reference benchmark host: TAJWEED_IMPORT_BUDGET_TEST=1 python -m pytest tests
+IMPORT_BUDGET_TEST_ENV_VAR = "TAJWEED_IMPORT_BUDGET_TEST"
+
+
+def _fresh_interpreter_env(tmp_path):
+    """Environment with bytecode caching on (in tmp_path), so timings do not include compilation."""
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPYCACHEPREFIX"] = str(tmp_path / "pycache")
+    return env
+
+def _modules_loaded_by(statement, env):
+    completed = subprocess.run(
+        [sys.executable, "-c", f"import sys; {statement}; print('\\n'.join(sys.modules))"],
+        cwd=REPOSITORY_ROOT, env=env, capture_output=True, text=True, check=True)
+    return set(completed.stdout.split())
+
+
+def test_package_import_loads_no_submodule(tmp_path):
+    loaded = _modules_loaded_by("import tajweed_analyzer", _fresh_interpreter_env(tmp_path))
+    assert "tajweed_analyzer" in loaded
+    assert not [name for name in loaded if name.startswith("tajweed_analyzer.")]
+
+def test_cli_import_skips_parallel_and_service_modules(tmp_path):
+    loaded = _modules_loaded_by("import tajweed_analyzer.main_qalqalah_finder", _fresh_interpreter_env(tmp_path))
+    assert "concurrent.futures.process" not in loaded
+    assert "multiprocessing" not in loaded
+    assert "tajweed_analyzer.qalqalah_service" not in loaded
+    assert "tajweed_analyzer.batch_runner" not in loaded
+
+def test_cli_import_does_not_build_the_letter_class_tables(tmp_path):
+    loaded = _modules_loaded_by(
+        "import tajweed_analyzer.main_qalqalah_finder; "
+        "from tajweed_analyzer import arabic_characters as ac; "
+        "assert 'CHAR_CLASSES' not in vars(ac) and 'CODE_POINT_CLASSES' not in vars(ac)",
+        _fresh_interpreter_env(tmp_path))
+    assert "tajweed_analyzer.qalqalah_rules" in loaded
+
+@pytest.mark.skipif(not os.environ.get(IMPORT_BUDGET_TEST_ENV_VAR),
+                    reason=f"wall-clock budget; set {IMPORT_BUDGET_TEST_ENV_VAR}=1 to run it")
+def test_cli_import_within_budget(tmp_path):
+    timing = benchmark_pipeline.measure_import_time(repeat=5, env=_fresh_interpreter_env(tmp_path))
+    assert timing is not None
+    assert timing["total_ms"] <= benchmark_pipeline.DEFAULT_IMPORT_BUDGET_MS, timing
@@ -0,0 +1,20 @@
+# tests/test_incremental_analysis.py
+
+from tajweed_analyzer import incremental_analysis
+from tajweed_analyzer import letter_analyzer
+from tajweed_analyzer import rule_registry
+
+
+def test_snapshot_is_tied_to_the_pipeline_code(synthetic_corpus, tmp_path):
+    snapshot, _ = incremental_analysis.analyze_incrementally(synthetic_corpus)
+    snapshot.save(tmp_path / "synthetic.tjsnap")
+    loaded = incremental_analysis.AnalysisSnapshot.load(tmp_path / "synthetic.tjsnap")
+    rules = rule_registry.resolve_rules(None)
+    marks = letter_analyzer.normalize_waqf_marks(None)
+    assert loaded.is_compatible(rules, marks)
+
+    loaded.pipeline = dict(loaded.pipeline, **{next(iter(loaded.pipeline)): "0" * 64})
+    assert not loaded.is_compatible(rules, marks)
+    rerun, changes = incremental_analysis.analyze_incrementally(synthetic_corpus, loaded)
+    assert changes["unchanged"] == 0
+    assert rerun.results == snapshot.results
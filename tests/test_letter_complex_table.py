@@ -0,0 +1,23 @@
+# tests/test_letter_complex_table.py
+
+from tajweed_analyzer import arabic_characters as ac
+from tajweed_analyzer import text_parser
+from tajweed_analyzer.letter_complex_table import LetterComplexTable
+
+
+def test_word_ids_match_word_positions():
+    # A Waqf mark standing alone between words is not a word of its own for word positions.
+    text = f"قَدْ {ac.WAQF_MEEM} أَفْلَحَ  {ac.WAQF_QALA} مَنْ"
+    table = LetterComplexTable.from_text(text)
+    word_table = text_parser.WordSpanTable(text)
+    assert len(table) == len(text_parser.get_letter_complexes(text))
+    assert [word_id + 1 for word_id in table.word_ids] == \
+           [word_table.word_position_at(start_idx) for start_idx in table.starts]
+    assert max(table.word_ids) == 2
+
+def test_waqf_marks_are_passed_to_the_tokenizer():
+    text = f"قَدْ {ac.WAQF_MEEM} مَنْ"
+    assert len(LetterComplexTable.from_text(text)) == len(text_parser.get_letter_complexes(text))
+    table = LetterComplexTable.from_text(text, frozenset())
+    assert list(table) == text_parser.get_letter_complexes(text, frozenset())
+    assert ac.WAQF_MEEM in [table.letter(idx) for idx in range(len(table))]
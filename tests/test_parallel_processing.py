@@ -0,0 +1,24 @@
+# tests/test_parallel_processing.py
+
+import pytest
+from tajweed_analyzer import arabic_characters as ac
+from tajweed_analyzer import quran_processor
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3])
+@pytest.mark.parametrize("absolute_char_index", [False, True])
+def test_parallel_results_equal_serial_results(synthetic_corpus, chunk_size, absolute_char_index):
+    waqf_marks = frozenset([ac.WAQF_MEEM, ac.WAQF_QALA])
+    serial = quran_processor.process_quran_for_rules(synthetic_corpus, considered_waqf_marks=waqf_marks,
+                                                     absolute_char_index=absolute_char_index)
+    parallel = quran_processor.process_quran_for_rules(synthetic_corpus, considered_waqf_marks=waqf_marks,
+                                                       workers=2, chunk_size=chunk_size,
+                                                       absolute_char_index=absolute_char_index)
+    assert serial["qalqalah"]
+    assert parallel == serial
+
+def test_parallel_index_run_equals_serial_results(synthetic_corpus, tmp_path):
+    index_path = str(tmp_path / "synthetic.tjidx")
+    assert quran_processor.process_quran_for_rules(synthetic_corpus, use_index=True, index_path=index_path,
+                                                   workers=2) == \
+        quran_processor.process_quran_for_rules(synthetic_corpus)
@@ -0,0 +1,38 @@
+# tests/test_persistent_cache.py
+
+import pytest
+from tajweed_analyzer import corpus_loader
+from tajweed_analyzer import persistent_cache
+from tajweed_analyzer import quran_processor
+
+
+def test_truncated_corpus_is_not_cached(synthetic_corpus, tmp_path):
+    with open(synthetic_corpus, encoding='utf-8') as f:
+        corpus_text = f.read()
+    truncated = tmp_path / "truncated.json"
+    truncated.write_text(corpus_text[:len(corpus_text) // 2], encoding='utf-8')
+
+    for workers in (None, 2):
+        cache = persistent_cache.PersistentResultsCache(tmp_path / f"cache_{workers}")
+        partial = quran_processor.process_quran_for_rules(str(truncated), workers=workers,
+                                                          persistent_cache=cache)
+        assert partial == {"qalqalah": []}
+        assert cache.entries() == []
+
+        complete = quran_processor.process_quran_for_rules(synthetic_corpus, workers=workers,
+                                                           persistent_cache=cache)
+        assert len(cache.entries()) == 1
+        assert quran_processor.process_quran_for_rules(synthetic_corpus, persistent_cache=cache) == complete
+
+    cache = persistent_cache.PersistentResultsCache(tmp_path / "cache_stream")
+    for use_index in (False, True):
+        streamed = []
+        with pytest.raises(corpus_loader.CorpusReadError):
+            streamed.extend(quran_processor.iter_rule_instances(str(truncated), use_index=use_index,
+                                                                persistent_cache=cache))
+        assert streamed # the pairs of the part that was read come before the error
+        assert cache.entries() == []
+
+def test_pipeline_fingerprint_covers_rule_and_loader_modules():
+    for name in ("corpus_loader", "qalqalah_rules", "letter_complex_table"):
+        assert f"tajweed_analyzer.{name}" in persistent_cache.PIPELINE_MODULE_NAMES
@@ -0,0 +1,18 @@
+# tests/test_profiling.py
+
+from tajweed_analyzer import profiling
+from tajweed_analyzer import quran_processor
+
+
+def test_profiled_run_matches_plain_run(synthetic_corpus):
+    expected = quran_processor.process_quran_for_rules(synthetic_corpus)
+    with profiling.profile_pipeline() as profiler:
+        assert quran_processor.process_quran_for_rules(synthetic_corpus) == expected
+
+    summary = profiler.summary()
+    hits = len(expected["qalqalah"])
+    assert summary["segments"] > 0
+    assert summary["rules"]["qalqalah"]["calls"] == summary["letters"]
+    assert summary["rules"]["qalqalah"]["hits"] == hits
+    for stage in profiling.SEGMENT_STAGES:
+        assert summary["stage_seconds"][stage] > 0
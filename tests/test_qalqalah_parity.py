@@ -0,0 +1,34 @@
+# tests/test_qalqalah_parity.py
+
+import pytest
+from tajweed_analyzer import arabic_characters as ac
+from tajweed_analyzer import letter_analyzer
+from tajweed_analyzer import qalqalah_rules
+from tajweed_analyzer import quran_processor
+from tajweed_analyzer import text_parser
+
+WAQF_CONFIGURATIONS = {
+    "default": ac.DEFAULT_STOP_WAQF_MARKS,
+    "meem_qala": frozenset([ac.WAQF_MEEM, ac.WAQF_QALA]),
+    "end_of_ayah_only": frozenset(),
+}
+
+
+@pytest.mark.parametrize("waqf_marks", WAQF_CONFIGURATIONS.values(), ids=WAQF_CONFIGURATIONS.keys())
+def test_batched_matches_scalar(synthetic_corpus, waqf_marks):
+    scalar = quran_processor.process_quran_for_rule(
+        synthetic_corpus, qalqalah_rules.check_qalqalah_for_letter_complex, waqf_marks)
+    batched = quran_processor.process_quran_for_qalqalah_batched(synthetic_corpus, waqf_marks)
+    # The synthetic corpus exercises every Qalqalah branch.
+    assert {instance["type"] for instance in scalar} == {
+        qalqalah_rules.QALQALAH_SUGHRA, qalqalah_rules.QALQALAH_KUBRA, qalqalah_rules.QALQALAH_AKBAR}
+    assert batched == scalar
+
+@pytest.mark.parametrize("waqf_marks", WAQF_CONFIGURATIONS.values(), ids=WAQF_CONFIGURATIONS.keys())
+def test_table_entry_check_matches_scalar(synthetic_corpus, waqf_marks):
+    for _, _, _, text in quran_processor.load_quran_segments(synthetic_corpus):
+        table = text_parser.get_letter_complex_table(text)
+        for idx, letter_complex in enumerate(text_parser.get_letter_complexes(text)):
+            stop_context = letter_analyzer.get_letter_stop_context(text, letter_complex[3], waqf_marks)
+            assert qalqalah_rules.check_qalqalah_for_table_entry(table, idx, stop_context) == \
+                   qalqalah_rules.check_qalqalah_for_letter_complex(letter_complex, stop_context)
@@ -0,0 +1,68 @@
+# tests/test_qalqalah_service.py
+
+import asyncio
+import pytest
+from conftest import write_corpus
+from tajweed_analyzer import qalqalah_service
+
+TEXT = "قُلْ هُوَ ٱللَّهُ أَحَدْ"
+
+
+def _run(service, requests):
+    async def run():
+        await service.start()
+        try:
+            return await asyncio.gather(*(service.analyze(request) for request in requests),
+                                        return_exceptions=True)
+        finally:
+            await service.stop()
+    return asyncio.run(run())
+
+@pytest.fixture
+def corpus(tmp_path):
+    return write_corpus(tmp_path / "corpus.json",
+                        {"quran": {"suras": [{"index": 112, "ayas": [{"index": 1, "text": TEXT}]}]}})
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_bad_requests_fail_alone(corpus, workers):
+    service = qalqalah_service.QalqalahService(corpus, workers=workers, batch_window=0.05)
+    good, unknown_rule, bad_marks, bad_rules, corpus_segment, bad_source_type = _run(service, [
+        {"text": TEXT},
+        {"text": TEXT, "rules": ["no_such_rule"]},
+        {"text": TEXT, "waqf_marks": [1, 2]},
+        {"text": TEXT, "rules": {"qalqalah": True}},
+        {"sura": 112, "aya": 1},
+        {"sura": 112, "aya": 1, "source_type": ["text"]},
+    ])
+    assert good["findings"]["qalqalah"]
+    assert corpus_segment["text"] == TEXT
+    assert len(corpus_segment["findings"]["qalqalah"]) == len(good["findings"]["qalqalah"])
+    for error in (unknown_rule, bad_marks, bad_rules, bad_source_type):
+        assert isinstance(error, qalqalah_service.ServiceError) and error.status == 400
+    assert service.batch_count == 1
+
+def test_analysis_errors_are_reported_per_request():
+    batch = [(1, 1, "text", TEXT, None, ("qalqalah",)), (1, 1, "text", 123, None, ("qalqalah",))]
+    good, failed = qalqalah_service._analyze_batch(batch)
+    assert good["qalqalah"]
+    assert failed[0] == 500
+
+@pytest.mark.parametrize("content_length", ["abc", "-5"])
+def test_invalid_content_length_is_a_bad_request(corpus, content_length):
+    service = qalqalah_service.QalqalahService(corpus, workers=0)
+
+    async def run():
+        await service.start()
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(f"POST /analyze HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+            status_line = await reader.readline()
+            writer.close()
+            return status_line
+        finally:
+            server.close()
+            await service.stop()
+
+    assert asyncio.run(run()).split()[1] == b"400"
@@ -0,0 +1,36 @@
+# tests/test_reading_model.py
+
+import pytest
+from conftest import write_corpus
+from tajweed_analyzer import quran_processor
+from tajweed_analyzer import reading_model
+
+# Ayah 1 ends in a voweled Qalqalah letter: a Kubra finding when stopping, none when read on.
+AYAS = [{"index": 1, "text": "قُلْ هُوَ ٱللَّهُ أَحَدٌ"}, {"index": 2, "text": "ٱللَّهُ ٱلصَّمَدُ"}]
+BISMILLAH = "بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ"
+
+
+def _corpus(ayas):
+    return {"quran": {"suras": [{"index": 112, "ayas": ayas}]}}
+
+def test_bismillah_does_not_break_the_continue_reading(tmp_path):
+    plain = write_corpus(tmp_path / "plain.json", _corpus(AYAS))
+    with_bismillah = write_corpus(tmp_path / "bismillah.json",
+                                  _corpus([dict(AYAS[0], bismillah=BISMILLAH), AYAS[1]]))
+
+    expected = reading_model.process_quran_for_readings(plain)
+    assert len(expected[reading_model.READING_CONTINUE]["qalqalah"]) < \
+        len(expected[reading_model.READING_STOP]["qalqalah"])
+
+    readings = reading_model.process_quran_for_readings(with_bismillah)
+    assert readings[reading_model.READING_STOP] == quran_processor.process_quran_for_rules(with_bismillah)
+    assert [instance for instance in readings[reading_model.READING_CONTINUE]["qalqalah"]
+            if instance["source_type"] == quran_processor.SOURCE_TYPE_TEXT] == \
+        expected[reading_model.READING_CONTINUE]["qalqalah"]
+
+def test_lookahead_only_widens_the_context_of_the_last_complex(tmp_path):
+    corpus = write_corpus(tmp_path / "plain.json", _corpus(AYAS))
+    with pytest.raises(ValueError):
+        reading_model.process_quran_for_readings(corpus, lookahead_complexes=0)
+    assert reading_model.process_quran_for_readings(corpus, lookahead_complexes=1) == \
+        reading_model.process_quran_for_readings(corpus, lookahead_complexes=100)
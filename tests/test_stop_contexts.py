@@ -0,0 +1,34 @@
+# tests/test_stop_contexts.py
+
+import pytest
+from tajweed_analyzer import arabic_characters as ac
+from tajweed_analyzer import letter_analyzer
+from tajweed_analyzer import quran_processor
+from tajweed_analyzer import text_parser
+
+WAQF_CONFIGURATIONS = {
+    "default": ac.DEFAULT_STOP_WAQF_MARKS,
+    "meem_qala": frozenset([ac.WAQF_MEEM, ac.WAQF_QALA]),
+    "end_of_ayah_only": frozenset(),
+}
+
+
+@pytest.mark.parametrize("waqf_marks", WAQF_CONFIGURATIONS.values(), ids=WAQF_CONFIGURATIONS.keys())
+def test_stop_contexts_match_the_per_letter_scan(synthetic_corpus, waqf_marks):
+    for _, _, _, text in quran_processor.load_quran_segments(synthetic_corpus):
+        letter_complexes = text_parser.get_letter_complexes(text)
+        assert letter_analyzer.get_stop_contexts(text, letter_complexes, waqf_marks) == [
+            letter_analyzer.get_letter_stop_context(text, letter_complex[3], waqf_marks)
+            for letter_complex in letter_complexes
+        ]
+
+def test_stop_contexts_are_shared_and_read_only():
+    text = f"قُلْ {ac.WAQF_MEEM} أَحَدْ  "
+    contexts = letter_analyzer.get_stop_contexts(text, text_parser.get_letter_complexes(text),
+                                                 ac.DEFAULT_STOP_WAQF_MARKS)
+    assert contexts[0] is letter_analyzer.NO_STOP_CONTEXT
+    assert contexts[1]["waqf_char"] == ac.WAQF_MEEM
+    # Trailing spaces: the last letter does not end the text.
+    assert contexts[-1] is letter_analyzer.NO_STOP_CONTEXT
+    with pytest.raises(TypeError):
+        contexts[0]["is_stop"] = True
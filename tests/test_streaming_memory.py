@@ -0,0 +1,30 @@
+# tests/test_streaming_memory.py
+
+import tracemalloc
+from conftest import write_corpus
+from tajweed_analyzer import benchmark_pipeline
+from tajweed_analyzer import corpus_loader
+from tajweed_analyzer import quran_processor
+
+
+def _streaming_peak(corpus_path):
+    """Peak traced memory while streaming every finding of a corpus, and the finding count."""
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in quran_processor.iter_rule_instances(corpus_path))
+        return tracemalloc.get_traced_memory()[1], count
+    finally:
+        tracemalloc.stop()
+
+def test_streaming_peak_memory_does_not_grow_with_the_corpus(synthetic_corpus, tmp_path, monkeypatch):
+    # The 1x corpus fits in one default read chunk; a small chunk makes both corpora stream.
+    monkeypatch.setattr(corpus_loader, "_READ_CHUNK_SIZE", 4096)
+    double_corpus = write_corpus(tmp_path / "synthetic_x2.json",
+                                 benchmark_pipeline.generate_synthetic_corpus(scale=2))
+    # Warm up the lazily built tables and compiled patterns so they are not charged to either run.
+    sum(1 for _ in quran_processor.iter_rule_instances(synthetic_corpus))
+
+    single_peak, single_count = _streaming_peak(synthetic_corpus)
+    double_peak, double_count = _streaming_peak(double_corpus)
+    assert double_count > 1.5 * single_count
+    assert double_peak < 1.25 * single_peak
@@ -0,0 +1,41 @@
+# tests/test_tokenizer.py
+
+import pytest
+from tajweed_analyzer import arabic_characters as ac
+from tajweed_analyzer import quran_processor
+from tajweed_analyzer import text_parser
+
+EDGE_TEXTS = [
+    "",
+    "   ",
+    "َْقُلْ",                        # stray diacritics before the first letter
+    f"أَحَدْ {ac.WAQF_MEEM} ٱللَّهُ{ac.WAQF_LA}",
+    "قُلْ\u00a0هُوَ\u2003ٱللَّهُ\tأَحَدٌ\n",    # non-ASCII whitespace
+    "abc 123 ۝١٢",
+    f"{ac.WAQF_QALA}{ac.WAQF_MEEM}",
+]
+
+
+def _scan_letter_complexes(text, waqf_marks):
+    """The character-by-character scanner get_letter_complexes replaced, kept as the reference."""
+    complexes = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char.isspace() or char in ac.ARABIC_DIACRITICS_CHARS or char in waqf_marks:
+            i += 1
+            continue
+        j = i + 1
+        while j < len(text) and text[j] in ac.ARABIC_DIACRITICS_CHARS:
+            j += 1
+        complexes.append((char, text[i + 1:j], i, j))
+        i = j
+    return complexes
+
+@pytest.mark.parametrize("waqf_marks", [None, frozenset(), frozenset([ac.WAQF_MEEM])],
+                         ids=["default", "none", "meem"])
+def test_regex_tokenizer_equals_the_scanner(synthetic_corpus, waqf_marks):
+    reference_marks = ac.DEFAULT_STOP_WAQF_MARKS if waqf_marks is None else waqf_marks
+    texts = EDGE_TEXTS + [text for _, _, _, text in quran_processor.load_quran_segments(synthetic_corpus)]
+    for text in texts:
+        assert text_parser.get_letter_complexes(text, waqf_marks) == _scan_letter_complexes(text, reference_marks)
@@ -0,0 +1,26 @@
+# tests/test_waqf_marks.py
+
+from tajweed_analyzer import arabic_characters as ac
+from tajweed_analyzer import qalqalah_rules
+from tajweed_analyzer import quran_processor
+from tajweed_analyzer import rule_registry
+
+MARKS = frozenset([ac.WAQF_MEEM, ac.WAQF_QALA])
+
+
+def test_analyze_text_accepts_a_set():
+    text = f"أَحَدٌ {ac.WAQF_MEEM} قُلْ هُوَ ٱللَّهُ أَحَدْ"
+    rules = rule_registry.resolve_rules()
+    expected = quran_processor.analyze_text_for_rules(1, 1, text, "text", rules, MARKS)
+    assert expected["qalqalah"]
+    assert quran_processor.analyze_text_for_rules(1, 1, text, "text", rules, set(MARKS)) == expected
+    assert quran_processor.analyze_text_for_rules(1, 1, text, "text", rules, list(MARKS)) == expected
+
+def test_corpus_entry_points_accept_a_set(synthetic_corpus):
+    rule = qalqalah_rules.check_qalqalah_for_letter_complex
+    expected = quran_processor.process_quran_for_rule(synthetic_corpus, rule, MARKS)
+    assert quran_processor.process_quran_for_rule(synthetic_corpus, rule, set(MARKS)) == expected
+    assert quran_processor.process_quran_for_rules(synthetic_corpus, ["qalqalah"], list(MARKS))["qalqalah"] == expected
+    assert quran_processor.process_quran_for_qalqalah_batched(synthetic_corpus, set(MARKS)) == expected
+    assert quran_processor.process_quran_for_waqf_sweep(
+        synthetic_corpus, {"marks": set(MARKS)}, ["qalqalah"])["marks"]["qalqalah"] == expected
@@ -0,0 +1,28 @@
+# tests/test_waqf_sweep.py
+
+from tajweed_analyzer import arabic_characters as ac
+from tajweed_analyzer import quran_processor
+
+CONFIGURATIONS = {
+    "default": ac.DEFAULT_STOP_WAQF_MARKS,
+    "meem_qala": frozenset([ac.WAQF_MEEM, ac.WAQF_QALA]),
+    "meem": frozenset([ac.WAQF_MEEM]),
+    "none": frozenset(),
+}
+
+
+def test_sweep_equals_one_run_per_configuration(synthetic_corpus):
+    sweep = quran_processor.process_quran_for_waqf_sweep(synthetic_corpus, CONFIGURATIONS)
+    assert list(sweep) == list(CONFIGURATIONS)
+    for config_name, marks in CONFIGURATIONS.items():
+        assert sweep[config_name] == \
+            quran_processor.process_quran_for_rules(synthetic_corpus, considered_waqf_marks=marks), config_name
+
+    diff = quran_processor.diff_waqf_sweep(sweep, "none", "default")["qalqalah"]
+    assert diff["changed"]
+
+def test_sequence_of_configurations_is_keyed_by_marks(synthetic_corpus):
+    marks = CONFIGURATIONS["meem_qala"]
+    sweep = quran_processor.process_quran_for_waqf_sweep(synthetic_corpus, [marks, frozenset()])
+    assert list(sweep) == [marks, frozenset()]
+    assert sweep[marks] == quran_processor.process_quran_for_rules(synthetic_corpus, considered_waqf_marks=marks)